@@ -0,0 +1,370 @@
+"""
+Micro-benchmarks for the scan pipeline, run against the saved screenshots in the repo root.
+
+    python benchmark.py proposal [--scales 1 0.5 0.25] [--repeat 5] [--upscale 2] [images...]
+    python benchmark.py templates [--count 8] [--size 40 24] [--repeat 3] [images...]
+    python benchmark.py executor [--workers 4] [--repeat 3] [--ocr] [images...]
+    python benchmark.py upscale [--factors 3 auto] [--repeat 3] [--ocr] [--truth labels.json] [crops...]
+    python benchmark.py prefilter [--thresholds 0.3 0.5 0.7] [--repeat 3] [images...]
+"""
+import argparse
+import concurrent.futures
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+from thefuzz import fuzz
+
+from core.color_classifier import get_color_classifier, propose_regions
+from core.config_manager import config_manager
+from core.frame import Frame
+from core.ocr_engine import OCRBackend, get_ocr_backend
+from core.ocr_executor import ProcessOCRExecutor
+from core.preprocess import Binarize, Clahe, MedianBlur, PreprocessPipeline, Upscale, joined_text, psm_for_box, read_crop
+from core.templates import SearchImage, Template, match_templates
+from core.text_likelihood import text_likelihood
+
+DEFAULT_IMAGES = ["debug_screen.png", "current_screen.png", "debug_current_full.png", "crop_*.png"]
+MIN_REGION_SIZE = 10
+
+
+def load_images(patterns, upscale=1):
+    """Loads the images as RGB; `upscale` > 1 emulates high-DPI captures of the same content."""
+    images = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            bgr = cv2.imread(path)
+            if bgr is None:
+                continue
+            if upscale > 1:
+                bgr = cv2.resize(bgr, None, fx=upscale, fy=upscale, interpolation=cv2.INTER_NEAREST)
+            images.append((path, cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)))
+    return images
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def propose(rgb, classifier, scale):
+    """Region proposal as done by scan_for_keywords, on a fresh frame so nothing is cached."""
+    frame = Frame.from_rgb(rgb)
+    labels = classifier.classify(frame.scaled_hsv(scale), scale=scale)
+    if labels is None:
+        return []
+    return [r for r in propose_regions(frame, labels, min_size=MIN_REGION_SIZE)
+            if r[2] >= MIN_REGION_SIZE and r[3] >= MIN_REGION_SIZE]
+
+
+def bench_proposal(args):
+    images = load_images(args.images or DEFAULT_IMAGES, args.upscale)
+    if not images:
+        print("No images found.")
+        return
+    classifier = get_color_classifier(config_manager.get("BUTTON_COLOR_PROFILES", []))
+    reference = {path: propose(rgb, classifier, 1.0) for path, rgb in images}
+    total_pixels = sum(rgb.shape[0] * rgb.shape[1] for _, rgb in images)
+    print(f"{len(images)} image(s), {total_pixels / 1e6:.1f} MP, "
+          f"{sum(len(r) for r in reference.values())} reference region(s) at full resolution")
+    print(f"{'scale':>6} {'ms/MP':>8} {'regions':>8} {'recall':>7} {'mean IoU':>9}")
+
+    for scale in args.scales:
+        elapsed = 0.0
+        found = matched = 0
+        ious = []
+        for path, rgb in images:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                rects = propose(rgb, classifier, scale)
+            elapsed += (time.perf_counter() - start) / args.repeat
+            found += len(rects)
+            for ref in reference[path]:
+                best = max((iou(ref, r) for r in rects), default=0.0)
+                if best >= 0.5:
+                    matched += 1
+                    ious.append(best)
+        n_ref = sum(len(r) for r in reference.values())
+        recall = matched / n_ref if n_ref else 1.0
+        mean_iou = float(np.mean(ious)) if ious else 0.0
+        print(f"{scale:>6.2f} {elapsed * 1000 / (total_pixels / 1e6):>8.2f} {found:>8} {recall:>7.1%} {mean_iou:>9.3f}")
+
+
+def match_color_loop(bgr, templates, threshold):
+    """Template matching as scan_for_keywords did it before core.templates: full color, first hit wins."""
+    results = []
+    for template in templates:
+        t_h, t_w = template.shape[:2]
+        res = cv2.matchTemplate(bgr, template, cv2.TM_CCOEFF_NORMED)
+        hits = []
+        for x, y in zip(*np.where(res >= threshold)[::-1]):
+            if not any(abs(hx - x) < t_w and abs(hy - y) < t_h for hx, hy in hits):
+                hits.append((x, y))
+        results.append(hits)
+    return results
+
+
+def cut_templates(bgr, count, size, rng):
+    """Random textured patches of the image, as (x, y, color patch); flat patches make poor templates."""
+    h, w = bgr.shape[:2]
+    cuts = []
+    for _ in range(count * 20):
+        if len(cuts) == count or h <= size or w <= size:
+            break
+        x, y = int(rng.integers(0, w - size)), int(rng.integers(0, h - size))
+        patch = bgr[y:y + size, x:x + size]
+        if cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY).std() > 25:
+            cuts.append((x, y, patch.copy()))
+    return cuts
+
+
+def bench_templates(args):
+    images = load_images(args.images or DEFAULT_IMAGES[:3], args.upscale)
+    if not images:
+        print("No images found.")
+        return
+    rng = np.random.default_rng(0)
+    print(f"{'size':>5} {'engine':>8} {'ms/frame':>9} {'recall':>7} {'hits':>6}")
+    for size in args.size:
+        timings = {"color": 0.0, "gray": 0.0}
+        found = {"color": 0, "gray": 0}
+        hits_total = {"color": 0, "gray": 0}
+        n_cuts = 0
+        for _, rgb in images:
+            bgr = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+            cuts = cut_templates(bgr, args.count, size, rng)
+            if not cuts:
+                continue
+            n_cuts += len(cuts)
+            patches = [patch for _, _, patch in cuts]
+            templates = [Template(f"cut{i}.png", cv2.cvtColor(p, cv2.COLOR_BGR2GRAY)) for i, p in enumerate(patches)]
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                color_hits = match_color_loop(bgr, patches, args.threshold)
+            timings["color"] += (time.perf_counter() - start) / args.repeat
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                frame = Frame.from_rgb(rgb)
+                haystack = SearchImage(frame.gray)
+                gray_hits = [[(x, y) for x, y, _ in hits]
+                             for hits in match_templates([(haystack, t, args.threshold) for t in templates])]
+            timings["gray"] += (time.perf_counter() - start) / args.repeat
+
+            for engine, per_template in (("color", color_hits), ("gray", gray_hits)):
+                for (x, y, _), hits in zip(cuts, per_template):
+                    hits_total[engine] += len(hits)
+                    found[engine] += any(abs(hx - x) <= 1 and abs(hy - y) <= 1 for hx, hy in hits)
+        for engine in ("color", "gray"):
+            recall = found[engine] / n_cuts if n_cuts else 1.0
+            print(f"{size:>5} {engine:>8} {timings[engine] * 1000 / len(images):>9.1f} "
+                  f"{recall:>7.1%} {hits_total[engine]:>6}")
+
+
+class NullBackend(OCRBackend):
+    """Reads nothing, so only preprocessing and dispatch are timed."""
+    name = "none"
+
+    def image_to_data(self, image, psm=3):
+        return {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+
+
+def contour_jobs(images, pad=5):
+    """(key, padded gray crop, w, h) for every proposed region, as scan_for_keywords cuts them."""
+    classifier = get_color_classifier(config_manager.get("BUTTON_COLOR_PROFILES", []))
+    jobs = []
+    for path, rgb in images:
+        gray = Frame.from_rgb(rgb).gray
+        for x, y, w, h in propose(rgb, classifier, 1.0):
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            crop = gray[y0:min(gray.shape[0], y + h + pad), x0:min(gray.shape[1], x + w + pad)]
+            jobs.append((len(jobs), crop, w, h))
+    return jobs
+
+
+def bench_executor(args):
+    images = load_images(args.images or DEFAULT_IMAGES[:3], args.upscale)
+    if not images:
+        print("No images found.")
+        return
+    # Every mode has to do the work each time; workers inherit the environment
+    os.environ["OCR_CACHE_ENABLED"] = "false"
+    jobs = contour_jobs(images)
+    factory = get_ocr_backend if args.ocr else NullBackend
+    backend = factory()
+    print(f"{len(jobs)} crop(s) from {len(images)} image(s), OCR {'on' if args.ocr else 'off'}, {args.workers} worker(s)")
+
+    def inline():
+        for _, crop, w, h in jobs:
+            read_crop(backend, crop, w, h)
+
+    threads = concurrent.futures.ThreadPoolExecutor(max_workers=args.workers)
+
+    def threaded():
+        list(threads.map(lambda job: read_crop(backend, *job[1:]), jobs))
+
+    processes = ProcessOCRExecutor(args.workers, backend_factory=factory)
+
+    def in_processes():
+        list(processes.read_crops(jobs))
+
+    print(f"{'mode':>8} {'ms/scan':>9} {'speedup':>8}")
+    baseline = None
+    try:
+        for mode, run in (("inline", inline), ("thread", threaded), ("process", in_processes)):
+            run()  # warm-up: starts workers and engines
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                run()
+            elapsed = (time.perf_counter() - start) / args.repeat
+            baseline = baseline or elapsed
+            print(f"{mode:>8} {elapsed * 1000:>9.1f} {baseline / elapsed:>7.2f}x")
+    finally:
+        threads.shutdown()
+        processes.shutdown()
+
+
+def load_crop_corpus(patterns, saved_factor):
+    """
+    The saved DEBUG crops (crop_*.png) were written after a fixed upscale by `saved_factor`;
+    shrinking them back gives the screen-sized crops scan_for_keywords cuts.
+    """
+    crops = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                continue
+            if saved_factor > 1:
+                gray = cv2.resize(gray, None, fx=1 / saved_factor, fy=1 / saved_factor, interpolation=cv2.INTER_AREA)
+            crops.append((os.path.basename(path), gray))
+    return crops
+
+
+def bench_upscale(args):
+    crops = load_crop_corpus(args.images or ["crop_*.png"], args.saved_factor)
+    if not crops:
+        print("No crops found.")
+        return
+    truth = {}
+    if args.truth:
+        with open(args.truth) as f:
+            truth = json.load(f)
+    backend = get_ocr_backend() if args.ocr else None
+    print(f"{len(crops)} crop(s), OCR {'on' if args.ocr else 'off'}, "
+          f"accuracy against {'--truth' if truth else 'the first factor'}")
+    print(f"{'factor':>7} {'prep ms':>8} {'ocr ms':>8} {'MP':>6} {'mean x':>7} {'exact':>6} {'fuzz':>6}")
+
+    reference = dict(truth)
+    for factor in args.factors:
+        pipeline = PreprocessPipeline([Clahe(), Binarize(), Upscale(factor), MedianBlur()])
+        prep = ocr_time = 0.0
+        pixels = 0
+        scales = []
+        texts = {}
+        for name, crop in crops:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                image, scale = pipeline.run(crop, reuse=True)
+            prep += (time.perf_counter() - start) / args.repeat
+            pixels += image.size
+            scales.append(scale)
+            if backend is not None:
+                # Contours are padded by 5 px on every side before they are cut
+                w, h = max(1, crop.shape[1] - 10), max(1, crop.shape[0] - 10)
+                start = time.perf_counter()
+                texts[name] = joined_text(backend.image_to_data(image, psm=psm_for_box(w, h)))
+                ocr_time += time.perf_counter() - start
+        exact = ratio = "-"
+        if backend is not None:
+            if not reference:
+                reference = texts
+            scored = [name for name in texts if name in reference]
+            if scored:
+                exact = f"{sum(texts[n] == reference[n] for n in scored) / len(scored):.0%}"
+                ratio = f"{np.mean([fuzz.ratio(texts[n], reference[n]) for n in scored]):.1f}"
+        print(f"{factor:>7} {prep * 1000:>8.1f} {ocr_time * 1000:>8.1f} {pixels / 1e6:>6.2f} "
+              f"{np.mean(scales):>7.2f} {exact:>6} {ratio:>6}")
+
+
+def bench_prefilter(args):
+    images = load_images(args.images or DEFAULT_IMAGES[:3])
+    if not images:
+        print("No images found.")
+        return
+    jobs = contour_jobs(images)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        scores = [text_likelihood(crop) for _, crop, _, _ in jobs]
+    elapsed = (time.perf_counter() - start) / args.repeat
+    print(f"{len(jobs)} contour(s) from {len(images)} image(s), {elapsed * 1000 / max(1, len(jobs)):.3f} ms/contour")
+    print(f"{'threshold':>9} {'skipped':>8} {'share':>6}")
+    for threshold in args.thresholds:
+        skipped = sum(score < threshold for score in scores)
+        print(f"{threshold:>9.2f} {skipped:>8} {skipped / max(1, len(jobs)):>6.0%}")
+    if args.dump:
+        # Crops named by score, to check by eye what a threshold would drop
+        os.makedirs(args.dump, exist_ok=True)
+        for (key, crop, _, _), score in zip(jobs, scores):
+            cv2.imwrite(os.path.join(args.dump, f"{score:.2f}_{key}.png"), crop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("proposal", help="color region proposal time vs. recall per REGION_PROPOSAL_SCALE")
+    p.add_argument("images", nargs="*", help="image files or globs (default: saved screenshots and crops)")
+    p.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5, 0.25])
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--upscale", type=int, default=1, help="enlarge the images to emulate 4K captures")
+    p.set_defaults(func=bench_proposal)
+
+    p = sub.add_parser("templates", help="color full-resolution matching vs. the gray pyramid engine")
+    p.add_argument("images", nargs="*", help="image files or globs (default: saved screenshots)")
+    p.add_argument("--count", type=int, default=8, help="templates cut from each image")
+    p.add_argument("--size", type=int, nargs="+", default=[40, 24], help="template side lengths")
+    p.add_argument("--threshold", type=float, default=0.8)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--upscale", type=int, default=1, help="enlarge the images to emulate 4K captures")
+    p.set_defaults(func=bench_templates)
+
+    p = sub.add_parser("executor", help="contour OCR inline vs. thread pool vs. worker processes (OCR_EXECUTOR)")
+    p.add_argument("images", nargs="*", help="image files or globs (default: saved screenshots)")
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--ocr", action="store_true", help="run the configured OCR engine, not just preprocessing")
+    p.add_argument("--upscale", type=int, default=1, help="enlarge the images to emulate 4K captures")
+    p.set_defaults(func=bench_executor)
+
+    p = sub.add_parser("upscale", help="fixed vs. glyph-height adaptive upscale factor on the saved crop corpus")
+    p.add_argument("images", nargs="*", help="saved crops or globs (default: crop_*.png)")
+    p.add_argument("--factors", nargs="+", default=["3", "auto"], help="fixed factors and/or auto")
+    p.add_argument("--saved-factor", type=float, default=3, help="upscale the saved crops were written with")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--ocr", action="store_true", help="read the crops with the configured OCR engine")
+    p.add_argument("--truth", help="JSON file mapping crop file names to their expected text")
+    p.set_defaults(func=bench_upscale)
+
+    p = sub.add_parser("prefilter", help="text likelihood cost and skip rate per TEXT_PREFILTER_THRESHOLD")
+    p.add_argument("images", nargs="*", help="image files or globs (default: saved screenshots)")
+    p.add_argument("--thresholds", type=float, nargs="+", default=[0.3, 0.5, 0.7])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--dump", help="directory to write every contour crop to, named by its score")
+    p.set_defaults(func=bench_prefilter)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
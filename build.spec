@@ -20,6 +20,24 @@ a = Analysis(
         'main',
         'config',
         'core.ocr',
+        'core.ocr_engine',
+        'core.ocr_batch',
+        'core.ocr_cache',
+        'core.frame_diff',
+        'core.capture',
+        'core.frame',
+        'core.motion',
+        'core.color_classifier',
+        'core.mask_integral',
+        'core.keyword_matcher',
+        'core.templates',
+        'core.spatial_index',
+        'core.ocr_tiles',
+        'core.preprocess',
+        'core.ocr_executor',
+        'core.ocr_vocabulary',
+        'core.text_likelihood',
+        'core.contour_priority',
         'core.actions',
         'core.verification',
         'utils.logger',
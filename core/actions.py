@@ -154,11 +154,12 @@ def perform_scroll(box, amount=-500):
         logger.error(f"Scroll action failed: {e}")
         return False
 
-def scroll_all_scrollbars(region=None):
+def scroll_all_scrollbars(region=None, frame=None):
     """
     Finds all scrollbars and scrolls down.
+    `frame` is an already captured image of `region`, if the caller has one.
     """
-    scrollbars = detect_scrollbars(region=region)
+    scrollbars = detect_scrollbars(region=region, frame=frame)
     if not scrollbars:
         return False
         
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import mss
+import numpy as np
+
+from utils.logger import logger
+
+
+class CaptureService:
+    """
+    Long-lived screen grabber.
+    mss handles are bound to the thread that created them, so one session is kept open
+    per thread and reused for every capture; mss then also reuses its bitmap buffers
+    while the capture size stays the same. Frames are returned as numpy views of the
+    raw BGRA buffer, without any PIL round trip.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.captures = 0
+        self.total_time = 0.0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+
+    def _session(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._prune_dead_sessions()
+                self._sessions[threading.current_thread()] = sct
+        return sct
+
+    def _prune_dead_sessions(self):
+        for thread in [t for t in self._sessions if not t.is_alive()]:
+            try:
+                self._sessions.pop(thread).close()
+            except Exception as e:
+                logger.debug(f"Failed to close capture session: {e}")
+
+    def grab(self, region=None):
+        """Captures the screen or a region (x, y, w, h) as an HxWx4 BGRA uint8 array."""
+        start = time.perf_counter()
+        sct = self._session()
+        if region:
+            x, y, w, h = region
+            monitor = {"top": int(y), "left": int(x), "width": int(w), "height": int(h)}
+        else:
+            # Grab primary monitor if no region specified
+            monitor = sct.monitors[1]
+        shot = sct.grab(monitor)
+        frame = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.captures += 1
+            self.total_time += latency
+            self.last_latency = latency
+            self.max_latency = max(self.max_latency, latency)
+        return frame
+
+    def stats(self):
+        with self._lock:
+            avg = self.total_time / self.captures if self.captures else 0.0
+            return {
+                "captures": self.captures,
+                "avg_ms": avg * 1000,
+                "last_ms": self.last_latency * 1000,
+                "max_ms": self.max_latency * 1000,
+            }
+
+    def close(self):
+        """Closes every open session. Threads open a new one on their next capture."""
+        with self._lock:
+            for sct in self._sessions.values():
+                try:
+                    sct.close()
+                except Exception as e:
+                    logger.debug(f"Failed to close capture session: {e}")
+            self._sessions.clear()
+        self._local = threading.local()
+
+
+# Global Instance
+capture_service = CaptureService()
@@ -0,0 +1,231 @@
+import json
+import threading
+
+import cv2
+import numpy as np
+
+from core.config_manager import config_manager
+from core.mask_integral import MaskIntegral
+from utils.logger import logger
+
+# OpenCV hue range is 0-179, saturation and value 0-255
+CHANNEL_SIZE = 256
+PROFILES_PER_PLANE = 8
+# _BIT_TABLE[value, b] is bit b of a label byte, so a histogram of label bytes times this
+# table gives the pixel count of every profile in the plane
+_BIT_TABLE = (np.arange(256)[:, None] >> np.arange(PROFILES_PER_PLANE)) & 1
+
+
+def parse_profiles(profiles):
+    """
+    Normalizes BUTTON_COLOR_PROFILES (list of dicts or dict keyed by name) to
+    [(name, lower, upper)]. Malformed profiles are skipped with a warning.
+    """
+    if isinstance(profiles, dict):
+        items = [(name, p) for name, p in profiles.items()]
+    elif isinstance(profiles, list):
+        items = [(p.get("name", "unknown") if isinstance(p, dict) else "unknown", p) for p in profiles]
+    else:
+        return []
+
+    parsed = []
+    for name, p in items:
+        try:
+            lower = [int(c) for c in p.get("lower", p.get("low", [0, 0, 0]))]
+            upper = [int(c) for c in p.get("upper", p.get("high", [180, 255, 255]))]
+            if len(lower) != 3 or len(upper) != 3:
+                raise ValueError("bounds need 3 channels")
+            parsed.append((name, lower, upper))
+        except Exception as e:
+            logger.warning(f"Skipping malformed profile {p}: {e}")
+    return parsed
+
+
+class ColorLabels:
+    """
+    Per-pixel profile membership of one frame, as bitmask planes (8 profiles per uint8 plane).
+    The combined mask is cleaned with morphology once and cached; per-profile masks are raw.
+    `scale` is the resolution of the planes relative to the frame they were computed from.
+    """
+
+    def __init__(self, planes, names, scale=1.0, classifier=None):
+        self.planes = planes
+        self.names = names
+        self.scale = scale
+        self.classifier = classifier
+        self._combined = None
+        self._integrals = {}
+
+    @property
+    def shape(self):
+        return self.planes[0].shape
+
+    def bit(self, name):
+        """(plane index, bit value) of a profile."""
+        i = self.names.index(name)
+        return i // PROFILES_PER_PLANE, 1 << (i % PROFILES_PER_PLANE)
+
+    def mask(self, name):
+        """0/255 mask of the pixels inside profile `name`."""
+        plane, bit = self.bit(name)
+        return cv2.compare(cv2.bitwise_and(self.planes[plane], bit), 0, cv2.CMP_GT)
+
+    def masks(self):
+        return {name: self.mask(name) for name in self.names}
+
+    def integral(self, name=None):
+        """Summed-area table of the combined mask, or of profile `name`; built once per frame."""
+        table = self._integrals.get(name)
+        if table is None:
+            table = MaskIntegral(self.combined() if name is None else self.mask(name))
+            self._integrals[name] = table
+        return table
+
+    def profile_counts(self, rect):
+        """Number of pixels of each profile inside the (x, y, w, h) rect, given in frame pixels."""
+        x, y, w, h = rect
+        s = self.scale
+        x0, y0 = int(x * s), int(y * s)
+        x1, y1 = max(x0 + 1, int(np.ceil((x + w) * s))), max(y0 + 1, int(np.ceil((y + h) * s)))
+        counts = {}
+        for p, plane in enumerate(self.planes):
+            hist = np.bincount(plane[y0:y1, x0:x1].ravel(), minlength=256)
+            per_bit = hist @ _BIT_TABLE
+            for b, name in enumerate(self.names[p * PROFILES_PER_PLANE:(p + 1) * PROFILES_PER_PLANE]):
+                counts[name] = counts.get(name, 0) + int(per_bit[b])
+        return counts
+
+    def dominant_profile(self, rect):
+        """Name of the profile covering most of the rect, or None if it has no colored pixel."""
+        counts = self.profile_counts(rect)
+        name, count = max(counts.items(), key=lambda item: item[1], default=(None, 0))
+        return name if count else None
+
+    def combined(self):
+        """0/255 mask of pixels inside any profile, after one close/open pass."""
+        if self._combined is None:
+            mask = cv2.compare(self.planes[0], 0, cv2.CMP_GT)
+            for plane in self.planes[1:]:
+                mask = cv2.bitwise_or(mask, cv2.compare(plane, 0, cv2.CMP_GT))
+            # 5x5 at full resolution, shrunk with the planes; below 3x3 it would be a no-op
+            size = int(5 * self.scale + 0.5) | 1
+            if size >= 3:
+                kernel = np.ones((size, size), np.uint8)
+                mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+                mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+            self._combined = mask
+        return self._combined
+
+
+class ColorClassifier:
+    """
+    Compiled form of the color profiles.
+    Every profile is an axis-aligned HSV box, so membership separates per channel:
+    a pixel is in profile i iff bit i is set in H_LUT[h] & S_LUT[s] & V_LUT[v].
+    That is exactly what cv2.inRange computes, but all profiles are labeled with three
+    256-entry table lookups and two ANDs instead of one inRange per profile.
+    """
+
+    def __init__(self, profiles):
+        self.names = [name for name, _, _ in profiles]
+        n_planes = max(1, -(-len(profiles) // PROFILES_PER_PLANE))
+        # tables[plane][channel] -> uint8 bitmask indexed by the channel value
+        self.tables = [[np.zeros(CHANNEL_SIZE, dtype=np.uint8) for _ in range(3)] for _ in range(n_planes)]
+        for i, (_, lower, upper) in enumerate(profiles):
+            plane, bit = i // PROFILES_PER_PLANE, np.uint8(1 << (i % PROFILES_PER_PLANE))
+            for ch in range(3):
+                lo, hi = max(0, lower[ch]), min(CHANNEL_SIZE - 1, upper[ch])
+                if lo <= hi:
+                    self.tables[plane][ch][lo:hi + 1] |= bit
+
+    def classify(self, hsv, scale=1.0):
+        """
+        Labels every pixel of an HSV image (`scale` is its size relative to the source frame).
+        Returns ColorLabels, or None if there are no profiles.
+        """
+        if not self.names:
+            return None
+        h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+        planes = []
+        for tables in self.tables:
+            labels = cv2.bitwise_and(cv2.LUT(h, tables[0]), cv2.LUT(s, tables[1]))
+            planes.append(cv2.bitwise_and(labels, cv2.LUT(v, tables[2])))
+        return ColorLabels(planes, self.names, scale=scale, classifier=self)
+
+
+# Full-resolution context needed around a pixel for the 5x5 close + open to match a whole-frame pass
+REFINE_CONTEXT = 8
+REFINE_TILE = 64
+
+
+def propose_regions(frame, color_labels, min_size=0):
+    """
+    Bounding boxes (x, y, w, h), in frame pixels, of the colored regions in `color_labels`.
+    Labels computed on a downscaled frame only say where to look: the full-resolution mask is
+    then built for the REFINE_TILE tiles the coarse mask touches (each run of tiles with enough
+    context around it that the morphology matches a whole-frame pass), and the boxes come from
+    that mask. Coarse regions too small to hold a `min_size` box are ignored.
+    """
+    scale = color_labels.scale
+    if scale >= 1.0:
+        contours, _ = cv2.findContours(color_labels.combined(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return [cv2.boundingRect(cnt) for cnt in contours]
+
+    inv = 1.0 / scale
+    coarse = color_labels.combined()
+    contours, _ = cv2.findContours(coarse, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    # Mark the tiles each large enough coarse region (plus one coarse pixel) touches
+    t = REFINE_TILE
+    rows, cols = -(-frame.height // t), -(-frame.width // t)
+    active = np.zeros((rows, cols), dtype=bool)
+    for cnt in contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        # A region can only grow by about one coarse pixel per side at full resolution
+        if (w + 2) * inv < min_size or (h + 2) * inv < min_size:
+            continue
+        x0, y0 = max(0, int((x - 1) * inv)), max(0, int((y - 1) * inv))
+        x1, y1 = int(np.ceil((x + w + 1) * inv)), int(np.ceil((y + h + 1) * inv))
+        active[y0 // t:(y1 - 1) // t + 1, x0 // t:(x1 - 1) // t + 1] = True
+
+    fine_mask = np.zeros((frame.height, frame.width), dtype=np.uint8)
+    c = REFINE_CONTEXT
+    for r in np.flatnonzero(active.any(axis=1)):
+        # Runs of consecutive active tiles in this tile row are labeled as one window
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], active[r].view(np.int8), [0]))))
+        for start, stop in zip(edges[::2], edges[1::2]):
+            x0, x1 = start * t, min(frame.width, stop * t)
+            y0, y1 = r * t, min(frame.height, (r + 1) * t)
+            wx0, wy0 = max(0, x0 - c), max(0, y0 - c)
+            wx1, wy1 = min(frame.width, x1 + c), min(frame.height, y1 + c)
+            fine = color_labels.classifier.classify(frame.hsv_roi((wx0, wy0, wx1 - wx0, wy1 - wy0)))
+            fine_mask[y0:y1, x0:x1] = fine.combined()[y0 - wy0:y1 - wy0, x0 - wx0:x1 - wx0]
+
+    contours, _ = cv2.findContours(fine_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return [cv2.boundingRect(cnt) for cnt in contours]
+
+
+_classifier = None
+_classifier_key = None
+_classifier_lock = threading.Lock()
+
+
+def get_color_classifier(profiles=None):
+    """
+    Returns the classifier compiled from `profiles` (BUTTON_COLOR_PROFILES by default).
+    It is only recompiled when the profiles change.
+    """
+    global _classifier, _classifier_key
+    if profiles is None:
+        profiles = config_manager.get("BUTTON_COLOR_PROFILES", [])
+    try:
+        key = json.dumps(profiles, sort_keys=True)
+    except (TypeError, ValueError):
+        key = repr(profiles)
+
+    with _classifier_lock:
+        if _classifier is None or _classifier_key != key:
+            _classifier = ColorClassifier(parse_profiles(profiles))
+            _classifier_key = key
+            logger.debug(f"Color classifier compiled for {len(_classifier.names)} profile(s)")
+        return _classifier
@@ -62,7 +62,32 @@ class ConfigManager:
         "APP_TITLE": "Zapweb.app Prompt Assist and AutoClicker",
         "DEBUG_MODE": False,
         "CLICK_ALL_MATCHES": True,
+        "FIRST_MATCH_MIN_CONFIDENCE": 80,
         "SCAN_PARALLELISM": 4,
+        "OCR_BACKEND": "auto",
+        "OCR_BATCH_MODE": "contour",
+        "OCR_EXECUTOR": "thread",
+        "OCR_WORKERS": 0,
+        "OCR_TILE_SIZE": 1024,
+        "OCR_TILE_OVERLAP": 48,
+        "OCR_PREPROCESS_STAGES": ["clahe", "binarize", "upscale", "median"],
+        "OCR_CONSTRAIN_TO_KEYWORDS": False,
+        "TEXT_PREFILTER_ENABLED": True,
+        "TEXT_PREFILTER_THRESHOLD": 0.5,
+        "OCR_CACHE_ENABLED": True,
+        "OCR_CACHE_MAX_ENTRIES": 512,
+        "OCR_CACHE_MAX_MB": 8,
+        "REGION_PROPOSAL_SCALE": 1.0,
+        "DIRTY_RECT_ENABLED": True,
+        "DIRTY_TILE_SIZE": 32,
+        "MOTION_SCALE": 0.5,
+        "MOTION_PERSISTENCE": 2,
+        "MOTION_DIFF_THRESHOLD": 25,
+        "MOTION_MAX_FRAME_AGE": 2.0,
+        "OCR_ALIASES": {},
+        "TEMPLATE_ROI_ENABLED": True,
+        "TEMPLATE_ROI_MARGIN": 16,
+        "TEMPLATE_FULL_SEARCH_INTERVAL": 10,
         "CLICK_DEDUP_ENABLED": True,
         "CLICK_VERIFY_PIXEL": True
     }
@@ -72,6 +97,9 @@ class ConfigManager:
         self.base_path = get_base_path()
         self.config_path = os.path.join(self.base_path, filename)
         self._config = self.DEFAULT_CONFIG.copy()
+        # Bumped on every change so callers can invalidate derived state
+        self.revision = 0
+        self._listeners = []
         self.load_config()
 
     def load_config(self):
@@ -135,7 +163,18 @@ class ConfigManager:
     def set(self, key: str, value: Any):
         """Sets a configuration value and saves the file."""
         self._config[key] = value
+        self.revision += 1
         self.save_config()
+        for keys, callback in list(self._listeners):
+            if keys is None or key in keys:
+                try:
+                    callback(key, value)
+                except Exception as e:
+                    logger.error(f"Config listener failed for {key}: {e}")
+
+    def add_listener(self, callback, keys=None):
+        """Calls callback(key, value) after set() changes one of `keys` (any key if None)."""
+        self._listeners.append((frozenset(keys) if keys is not None else None, callback))
 
 # Global Instance
 config_manager = ConfigManager()
@@ -0,0 +1,65 @@
+import threading
+from collections import deque
+
+# Contour heights (px) of a line of button text, and the width/height ratios of button labels
+TEXT_HEIGHT_RANGE = (12, 48)
+BUTTON_ASPECT_RANGE = (1.5, 8.0)
+
+
+def _overlaps(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+class HitHistory:
+    """
+    Boxes (screen coordinates) where keywords were recently found. Buttons tend to show up
+    where they were before, so contours over these spots are read first.
+    """
+
+    def __init__(self, max_hits=32):
+        self._hits = deque(maxlen=max_hits)
+        self._lock = threading.Lock()
+
+    def record(self, boxes):
+        with self._lock:
+            for box in boxes:
+                box = tuple(box)
+                if box in self._hits:
+                    self._hits.remove(box)
+                self._hits.append(box)
+
+    def overlaps(self, box):
+        with self._lock:
+            return any(_overlaps(box, hit) for hit in self._hits)
+
+    def clear(self):
+        with self._lock:
+            self._hits.clear()
+
+
+def contour_priority(rect, profile=None, keyword_profiles=(), recent_hit=False):
+    """
+    How promising a contour is for a keyword match; higher is read first. A recent hit at the
+    same spot outweighs everything else, then a color KEYWORD_COLOR_PROFILES puts keywords on,
+    then a button-like shape: a text-line height and a wide label aspect each add up to 1.
+    """
+    _, _, w, h = rect
+    score = 4.0 if recent_hit else 0.0
+    if profile is not None and profile in keyword_profiles:
+        score += 2.0
+
+    lo, hi = TEXT_HEIGHT_RANGE
+    if lo <= h <= hi:
+        score += 1.0
+    elif hi < h <= 2 * hi:
+        score += 0.5
+
+    aspect = w / h if h else 0.0
+    lo, hi = BUTTON_ASPECT_RANGE
+    if lo <= aspect <= hi:
+        score += 1.0
+    elif 1.0 <= aspect < lo:
+        score += (aspect - 1.0) / (lo - 1.0)
+    return score
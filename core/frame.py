@@ -0,0 +1,110 @@
+import time
+from functools import cached_property
+
+import cv2
+import numpy as np
+
+
+class Frame:
+    """
+    One captured image of a region, shared by every detector in a scan.
+    Wraps the raw BGRA capture buffer without copying and derives the BGR, HSV and
+    gray planes lazily; each plane is computed at most once per frame.
+    Frames built from an RGB array (tests, saved screenshots) work the same way.
+    """
+
+    def __init__(self, bgra=None, rgb=None, region=None, timestamp=None):
+        if bgra is None and rgb is None:
+            raise ValueError("Frame needs either a BGRA or an RGB buffer")
+        self._bgra = bgra
+        self._rgb = rgb
+        self.region = region
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self._scaled_hsv = {}
+
+    @classmethod
+    def from_rgb(cls, rgb, region=None):
+        return cls(rgb=np.asarray(rgb), region=region)
+
+    @property
+    def raw(self):
+        """The buffer the frame was built from (BGRA from the screen, RGB otherwise)."""
+        return self._bgra if self._bgra is not None else self._rgb
+
+    @property
+    def shape(self):
+        return self.raw.shape[:2] + (3,)
+
+    @property
+    def height(self):
+        return self.raw.shape[0]
+
+    @property
+    def width(self):
+        return self.raw.shape[1]
+
+    @property
+    def rgb(self):
+        """RGB view; no copy for BGRA captures."""
+        if self._rgb is not None:
+            return self._rgb
+        return self._bgra[..., 2::-1]
+
+    @cached_property
+    def bgr(self):
+        if self._bgra is not None:
+            return cv2.cvtColor(self._bgra, cv2.COLOR_BGRA2BGR)
+        return cv2.cvtColor(self._rgb, cv2.COLOR_RGB2BGR)
+
+    @cached_property
+    def hsv(self):
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV)
+
+    def scaled_hsv(self, scale):
+        """HSV plane of the frame downscaled by `scale` (area interpolation), cached per scale."""
+        if scale >= 1.0:
+            return self.hsv
+        hsv = self._scaled_hsv.get(scale)
+        if hsv is None:
+            # Halve step by step: OpenCV's 2x area reduction is much faster than arbitrary factors
+            small, current = self.raw, 1.0
+            while current * 0.5 >= scale and min(small.shape[:2]) >= 2:
+                small = cv2.resize(small, (small.shape[1] // 2, small.shape[0] // 2), interpolation=cv2.INTER_AREA)
+                current *= 0.5
+            if current != scale:
+                size = (max(1, int(self.width * scale)), max(1, int(self.height * scale)))
+                small = cv2.resize(small, size, interpolation=cv2.INTER_AREA)
+            if self._bgra is not None:
+                hsv = cv2.cvtColor(cv2.cvtColor(small, cv2.COLOR_BGRA2BGR), cv2.COLOR_BGR2HSV)
+            else:
+                hsv = cv2.cvtColor(small, cv2.COLOR_RGB2HSV)
+            self._scaled_hsv[scale] = hsv
+        return hsv
+
+    def hsv_roi(self, rect):
+        """HSV of the (x, y, w, h) window only, without converting the whole frame."""
+        x, y, w, h = rect
+        if "hsv" in self.__dict__:
+            return self.hsv[y:y + h, x:x + w]
+        window = np.ascontiguousarray(self.raw[y:y + h, x:x + w])
+        if self._bgra is not None:
+            return cv2.cvtColor(cv2.cvtColor(window, cv2.COLOR_BGRA2BGR), cv2.COLOR_BGR2HSV)
+        return cv2.cvtColor(window, cv2.COLOR_RGB2HSV)
+
+    @cached_property
+    def gray(self):
+        if self._bgra is not None:
+            return cv2.cvtColor(self._bgra, cv2.COLOR_BGRA2GRAY)
+        return cv2.cvtColor(self._rgb, cv2.COLOR_RGB2GRAY)
+
+    def __array__(self, dtype=None, copy=None):
+        # Lets legacy callers keep doing np.array(screenshot) and get RGB pixels
+        rgb = np.array(self.rgb)
+        return rgb.astype(dtype) if dtype is not None else rgb
+
+
+def as_frame(image, region=None):
+    """Wraps an RGB array or PIL image in a Frame; Frames are returned unchanged."""
+    if isinstance(image, Frame):
+        return image
+    return Frame.from_rgb(np.asarray(image), region=region)
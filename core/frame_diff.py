@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class DirtyMap:
+    """Grid of tiles that changed between two frames of the same region."""
+
+    def __init__(self, tiles, tile_size, shape):
+        self.tiles = tiles
+        self.tile_size = tile_size
+        self.shape = shape
+
+    @classmethod
+    def all_dirty(cls, shape, tile_size):
+        rows = -(-shape[0] // tile_size)
+        cols = -(-shape[1] // tile_size)
+        return cls(np.ones((rows, cols), dtype=bool), tile_size, shape)
+
+    def any(self):
+        return bool(self.tiles.any())
+
+    def ratio(self):
+        return float(self.tiles.mean()) if self.tiles.size else 0.0
+
+    def intersects(self, rect):
+        """True if any dirty tile overlaps the (x, y, w, h) rect in frame coordinates."""
+        x, y, w, h = rect
+        t = self.tile_size
+        c0, r0 = max(0, int(x) // t), max(0, int(y) // t)
+        c1, r1 = (int(x + w) - 1) // t + 1, (int(y + h) - 1) // t + 1
+        return bool(self.tiles[r0:r1, c0:c1].any())
+
+    def bounding_box(self):
+        """(x, y, w, h) covering all dirty tiles, or None if nothing changed."""
+        rows = np.flatnonzero(self.tiles.any(axis=1))
+        cols = np.flatnonzero(self.tiles.any(axis=0))
+        if rows.size == 0:
+            return None
+        t = self.tile_size
+        x0, y0 = cols[0] * t, rows[0] * t
+        x1 = min(self.shape[1], (cols[-1] + 1) * t)
+        y1 = min(self.shape[0], (rows[-1] + 1) * t)
+        return (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+
+class FrameDiffer:
+    """
+    Reports which tiles changed between two frames of the same region; the caller keeps the
+    reference frame. Screen captures are pixel-exact, so any differing pixel marks its tile dirty.
+    """
+
+    def __init__(self, tile_size=32):
+        self.tile_size = tile_size
+
+    def diff(self, previous, frame):
+        """DirtyMap of `frame` against `previous` (all dirty if None or of another size)."""
+        frame = np.asarray(frame)
+        if frame.ndim < 2:
+            return None
+
+        t = self.tile_size
+        if previous is None or previous.shape != frame.shape:
+            return DirtyMap.all_dirty(frame.shape, t)
+
+        if frame.ndim == 3 and frame.shape[2] == 4 and frame.flags.c_contiguous and previous.flags.c_contiguous:
+            # Compare whole BGRA pixels as single 32-bit words
+            changed = previous.view(np.uint32)[..., 0] != frame.view(np.uint32)[..., 0]
+        else:
+            changed = previous != frame
+        if changed.ndim == 3:
+            changed = changed.any(axis=2)
+
+        row_starts = np.arange(0, frame.shape[0], t)
+        col_starts = np.arange(0, frame.shape[1], t)
+        tiles = np.logical_or.reduceat(changed, row_starts, axis=0)
+        tiles = np.logical_or.reduceat(tiles, col_starts, axis=1)
+        return DirtyMap(tiles, t, frame.shape)
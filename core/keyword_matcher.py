@@ -0,0 +1,355 @@
+import itertools
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process
+except ImportError:
+    _rf_fuzz = _rf_process = None
+
+# Keywords matched as plain substrings of the text rather than fuzzily
+SYMBOL_KEYWORDS = ('+', '-')
+MAX_MATCHERS = 16
+MAX_CACHED_TEXTS = 4096
+
+_versions = itertools.count(1)
+
+
+class _SubstringAutomaton:
+    """Aho-Corasick automaton: every pattern occurring in a text, found in one pass over the text."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for idx, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    self.goto[state][ch] = nxt
+                state = nxt
+            self.out[state] += (idx,)
+
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def find(self, text):
+        """Indices of the patterns that occur in `text`."""
+        found = set()
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class KeywordMatcher:
+    """
+    CLICK and TYPE keyword lists compiled for matching OCR text.
+    Scores are the same as scoring every keyword one by one with `scorer` (thefuzz.fuzz),
+    but exact hits come from a hash lookup, substring hits from one automaton pass, and the
+    fuzzy scores of many texts from one rapidfuzz cdist call over length-bucketed keywords.
+
+    A hit is (keyword, 'CLICK' | 'TYPE', weight, floor): its score is conf * weight (conf itself
+    if weight is None), raised to at least conf * floor when floor is set.
+    Decisions are memoized across scans by (text, version); every compiled matcher gets a new version.
+    """
+
+    def __init__(self, click_keywords, type_keywords, aliases=None, scorer=None):
+        self.click = list(click_keywords)
+        self.type = list(type_keywords)
+        self.aliases = dict(aliases or {})
+        self.scorer = scorer
+        self.version = next(_versions)
+        # thefuzz >= 0.20 scores with rapidfuzz and rounds; only then can cdist stand in for it
+        self.batched = (_rf_process is not None and scorer is not None
+                        and getattr(scorer, '_partial_ratio', None) is _rf_fuzz.partial_ratio
+                        and getattr(scorer, '_ratio', None) is _rf_fuzz.ratio)
+
+        self.click_lower = [k.lower() for k in self.click]
+        self.type_lower = [k.lower() for k in self.type]
+        self._exact_click = {}
+        for i, k in enumerate(self.click_lower):
+            self._exact_click.setdefault(k, []).append(i)
+        self._exact_type = {}
+        for i, k in enumerate(self.type_lower):
+            self._exact_type.setdefault(k, []).append(i)
+
+        # Symbols are looked up as typed, contains-hits by their lowercase form
+        self._symbols = [i for i, k in enumerate(self.click) if k in SYMBOL_KEYWORDS]
+        self._automaton = _SubstringAutomaton(self.click_lower)
+
+        # Fuzzy candidates sorted by length: a text of length n only scores the prefix up to n + 3
+        fuzzy = sorted((len(k), i) for i, k in enumerate(self.click_lower) if len(k) >= 2)
+        self._fuzzy_lengths = [n for n, _ in fuzzy]
+        self._fuzzy_index = [i for _, i in fuzzy]
+        self._fuzzy_lower = [self.click_lower[i] for i in self._fuzzy_index]
+        # Only scores known to be pure functions of the text are memoized (test doubles are not)
+        self.memoize = self.batched or scorer is None
+
+    def match(self, text_lower):
+        """(alias or None, hits) for one lowercased OCR text."""
+        result = _memo.get((text_lower, self.version)) if self.memoize else None
+        if result is None:
+            result = self.match_many([text_lower])[0]
+        return result
+
+    def match_many(self, texts_lower):
+        """match() for many texts, scoring the fuzzy candidates of all of them in one call."""
+        results = [None] * len(texts_lower)
+        pending = OrderedDict()
+        for pos, t in enumerate(texts_lower):
+            cached = _memo.get((t, self.version)) if self.memoize else None
+            if cached is not None:
+                results[pos] = cached
+            else:
+                pending.setdefault(t, []).append(pos)
+        if not pending:
+            return results
+
+        resolved = []
+        for t in pending:
+            alias = self.aliases.get(t)
+            resolved.append((alias, alias.lower() if alias is not None else t))
+
+        partial, full = self._click_scores([t for _, t in resolved])
+        type_scores = self._type_scores([t for _, t in resolved])
+
+        for row, (t, positions) in enumerate(pending.items()):
+            alias, text = resolved[row]
+            hits = self._click_hits(text, partial[row], full[row]) + self._type_hits(text, type_scores[row])
+            result = (alias, hits)
+            if self.memoize:
+                _memo.put((t, self.version), result)
+            for pos in positions:
+                results[pos] = result
+        return results
+
+    def _candidates(self, text):
+        """Indices into the length-sorted fuzzy keywords that may match `text` at all."""
+        if self.scorer is None or len(text) < 2:
+            return 0
+        return bisect_right(self._fuzzy_lengths, len(text) + 3)
+
+    def _click_scores(self, texts):
+        """Per text, {click index: partial ratio} and {click index: ratio} of the fuzzy candidates."""
+        partial = [{} for _ in texts]
+        full = [{} for _ in texts]
+        if self.scorer is None or not self._fuzzy_index:
+            return partial, full
+
+        if not self.batched:
+            for row, t in enumerate(texts):
+                for j in range(self._candidates(t)):
+                    k = self._fuzzy_lower[j]
+                    partial[row][self._fuzzy_index[j]] = self.scorer.partial_ratio(t, k)
+                    full[row][self._fuzzy_index[j]] = self.scorer.ratio(t, k)
+            return partial, full
+
+        # One cdist call per length bucket; scores below the cutoff can never reach 98 once rounded
+        buckets = {}
+        for row, t in enumerate(texts):
+            n = self._candidates(t)
+            if n:
+                buckets.setdefault(n, []).append(row)
+        for n, rows in buckets.items():
+            scores = _rf_process.cdist([texts[r] for r in rows], self._fuzzy_lower[:n],
+                                       scorer=_rf_fuzz.partial_ratio, score_cutoff=97, dtype=np.float64)
+            for row, j in zip(*np.nonzero(scores)):
+                r, i = rows[row], self._fuzzy_index[j]
+                partial[r][i] = int(round(scores[row, j]))
+                full[r][i] = int(round(_rf_fuzz.ratio(texts[r], self._fuzzy_lower[j])))
+        return partial, full
+
+    def _type_scores(self, texts):
+        """Per text, {type index: ratio} for the type keywords that can score above 90."""
+        scores = [{} for _ in texts]
+        if self.scorer is None or not self.type:
+            return scores
+        if not self.batched:
+            for row, t in enumerate(texts):
+                for i, k in enumerate(self.type_lower):
+                    scores[row][i] = self.scorer.ratio(t, k)
+            return scores
+        matrix = _rf_process.cdist(texts, self.type_lower, scorer=_rf_fuzz.ratio,
+                                   score_cutoff=90, dtype=np.float64)
+        for row, i in zip(*np.nonzero(matrix)):
+            scores[row][int(i)] = int(round(matrix[row, i]))
+        return scores
+
+    def _click_hits(self, text, partial, full):
+        contained = self._automaton.find(text)
+        candidates = set(self._exact_click.get(text, ()))
+        candidates.update(i for i in self._symbols if i in contained)
+        candidates.update(partial)
+        if self.scorer is None:
+            candidates.update(i for i in contained if len(self.click_lower[i]) > 3)
+
+        hits = []
+        for i in sorted(candidates):
+            k, k_lower = self.click[i], self.click_lower[i]
+            if text == k_lower:
+                hits.append((k, 'CLICK', 1.0, None))
+            elif k in SYMBOL_KEYWORDS and k in text:
+                hits.append((k, 'CLICK', 1.0, None))
+            elif self.scorer is not None and len(text) >= 2 and len(k_lower) >= 2:
+                # Substring protection: "and" shouldn't match "expand"
+                if len(k_lower) > len(text) + 3:
+                    continue
+                p_ratio = partial.get(i, 0)
+                if p_ratio >= 98:
+                    hits.append((k, 'CLICK', full[i] / 100.0, 0.9 if p_ratio == 100 else None))
+            elif i in contained and len(k_lower) > 3:
+                hits.append((k, 'CLICK', 0.8, None))
+        return hits
+
+    def _type_hits(self, text, scores):
+        if self.scorer is not None:
+            matched = sorted(i for i, ratio in scores.items() if ratio > 90)
+        else:
+            matched = self._exact_type.get(text, [])
+        return [(self.type[i], 'TYPE', None, None) for i in matched]
+
+
+class AnchorMatcher:
+    """
+    ANCHOR_KEYWORDS compiled for deciding which OCR texts are proximity anchors.
+    A text is an anchor if it equals an anchor keyword, or with a scorer if
+    scorer.partial_ratio(anchor, text) >= 90 (both longer than one character), or without
+    one if it contains an anchor keyword longer than two characters. With thefuzz backed by
+    rapidfuzz, all texts are scored against all anchors in one cdist call.
+    Decisions are cached per text on the matcher, so they go with it when anchors change.
+    """
+
+    def __init__(self, anchors, scorer=None):
+        self.anchors = list(anchors)
+        self.scorer = scorer
+        self.version = next(_versions)
+        self.batched = (_rf_process is not None and scorer is not None
+                        and getattr(scorer, '_partial_ratio', None) is _rf_fuzz.partial_ratio)
+        self.memoize = self.batched or scorer is None
+        self._decided = {}
+        self.anchors_lower = [a.lower() for a in self.anchors]
+        self._exact = set(self.anchors_lower)
+        self._fuzzy = [a for a in self.anchors_lower if len(a) > 1]
+        self._contained = _SubstringAutomaton([a if len(a) > 2 else '' for a in self.anchors_lower])
+
+    def is_anchor(self, text_lower):
+        return self.match_many([text_lower])[0]
+
+    def match_many(self, texts_lower):
+        """One bool per lowercased text: whether it is an anchor."""
+        decided = self._decided if self.memoize else {}
+        pending = [t for t in dict.fromkeys(texts_lower) if t not in decided]
+        if pending:
+            if len(decided) + len(pending) > MAX_CACHED_TEXTS:
+                decided.clear()
+            decided.update(zip(pending, self._decide(pending)))
+        return [decided[t] for t in texts_lower]
+
+    def _decide(self, texts):
+        if self.scorer is None:
+            return [t in self._exact or bool(self._contained.find(t)) for t in texts]
+        if not self.batched:
+            return [t in self._exact or (len(t) > 1 and any(
+                self.scorer.partial_ratio(a, t) >= 90 for a in self._fuzzy)) for t in texts]
+
+        decided = [t in self._exact for t in texts]
+        rows = [i for i, t in enumerate(texts) if not decided[i] and len(t) > 1]
+        if rows and self._fuzzy:
+            # thefuzz rounds, so a score of 89.5 already counts as 90
+            scores = _rf_process.cdist(self._fuzzy, [texts[i] for i in rows], scorer=_rf_fuzz.partial_ratio,
+                                       score_cutoff=89.5, dtype=np.float64)
+            for i, hit in zip(rows, (scores >= 89.5).any(axis=0).tolist()):
+                decided[i] = hit
+        return decided
+
+
+class _DecisionMemo:
+    """Bounded LRU of match decisions keyed by (lowercased text, matcher version)."""
+
+    def __init__(self, max_entries=MAX_CACHED_TEXTS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_memo = _DecisionMemo()
+_matchers = OrderedDict()
+_matchers_lock = threading.Lock()
+
+
+def invalidate_keyword_matchers(*_):
+    """Drops every compiled matcher and memoized decision (keywords or aliases changed)."""
+    with _matchers_lock:
+        _matchers.clear()
+    _memo.clear()
+
+
+def _get_matcher(key, scorer, compile_matcher):
+    matcher = _matchers.get(key)
+    if matcher is not None and matcher.scorer is scorer:
+        return matcher
+    with _matchers_lock:
+        matcher = _matchers.pop(key, None)
+        if matcher is None or matcher.scorer is not scorer:
+            matcher = compile_matcher()
+        _matchers[key] = matcher
+        while len(_matchers) > MAX_MATCHERS:
+            _matchers.popitem(last=False)
+        return matcher
+
+
+def get_keyword_matcher(click_keywords, type_keywords, aliases=None, scorer=None):
+    """Returns the matcher compiled for these keyword lists, aliases and scorer, compiling it on first use."""
+    key = (tuple(click_keywords), tuple(type_keywords),
+           tuple(aliases.items()) if aliases else (), id(scorer))
+    return _get_matcher(key, scorer, lambda: KeywordMatcher(click_keywords, type_keywords, aliases, scorer))
+
+
+def get_anchor_matcher(anchors, scorer=None):
+    """Returns the matcher compiled for these anchor keywords and scorer, compiling it on first use."""
+    key = ('anchors', tuple(anchors), id(scorer))
+    return _get_matcher(key, scorer, lambda: AnchorMatcher(anchors, scorer))
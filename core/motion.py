@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class _RegionModel:
+    """Running state for one region: the last downscaled frame and the per-pixel change history."""
+
+    def __init__(self, small, timestamp):
+        self.previous = small
+        # Bit 7 is the latest frame-to-frame change, bit 6 the one before, and so on
+        self.history = np.zeros(small.shape, dtype=np.uint8)
+        self.scratch = np.empty(small.shape, dtype=np.uint8)
+        self.timestamp = timestamp
+
+
+class MotionDetector:
+    """
+    Streaming motion detector.
+    Each region keeps a half-resolution copy of its last frame and, per pixel, a ring buffer
+    of the last 8 frame-to-frame changes packed into one byte. A pixel only counts as moving
+    once it changed in `persistence` consecutive frames, so a one-off repaint is ignored while
+    a spinner keeps being reported. Updating is a few in-place uint8 operations on the
+    downscaled frame and never waits for a second capture.
+    """
+
+    def __init__(self, scale=0.5, persistence=2, diff_threshold=25, max_age=2.0, max_regions=8):
+        self.scale = scale
+        self.persistence = persistence
+        self.diff_threshold = diff_threshold
+        self.max_age = max_age
+        self.max_regions = max_regions
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def history_threshold(self):
+        # A history byte is at least this value exactly when its top `persistence` bits are set
+        n = min(8, max(1, int(self.persistence)))
+        return (0xFF << (8 - n)) & 0xFF
+
+    def _downscale(self, gray):
+        if self.scale >= 1.0:
+            return gray
+        h, w = gray.shape[:2]
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+    def update(self, key, gray, timestamp):
+        """
+        Feeds the gray frame of region `key` into its model.
+        Returns the boolean mask (at model resolution) of pixels in persistent motion,
+        or None while the model has nothing to compare against yet.
+        """
+        small = self._downscale(gray)
+        with self._lock:
+            model = self._models.pop(key, None)
+            if (model is None or model.previous.shape != small.shape
+                    or timestamp - model.timestamp > self.max_age):
+                # New region, resized window or a gap too long to tell animation from other changes
+                self._models[key] = _RegionModel(small, timestamp)
+                self._evict()
+                return None
+            self._models[key] = model
+            self._evict()
+
+        diff = np.maximum(small, model.previous) - np.minimum(small, model.previous)
+        changed = diff > self.diff_threshold
+        np.right_shift(model.history, 1, out=model.history)
+        np.multiply(changed.view(np.uint8), np.uint8(0x80), out=model.scratch)
+        np.bitwise_or(model.history, model.scratch, out=model.history)
+        model.previous = small
+        model.timestamp = timestamp
+        return model.history >= self.history_threshold
+
+    def boxes(self, mask):
+        """Bounding boxes (x, y, w, h) of the motion blobs in `mask`, in full-resolution pixels."""
+        if mask is None or not mask.any():
+            return []
+        kernel = np.ones((3, 3), np.uint8)
+        dilated = cv2.dilate(mask.astype(np.uint8) * 255, kernel, iterations=2)
+        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        inv = 1.0 / self.scale if self.scale < 1.0 else 1.0
+        result = []
+        for cnt in contours:
+            x, y, w, h = cv2.boundingRect(cnt)
+            result.append((int(x * inv), int(y * inv), int(round(w * inv)), int(round(h * inv))))
+        return result
+
+    def reset(self, key=None):
+        """Forgets the model of `key` (all regions if None)."""
+        with self._lock:
+            if key is None:
+                self._models.clear()
+            else:
+                self._models.pop(key, None)
+
+    def _evict(self):
+        while len(self._models) > self.max_regions:
+            self._models.popitem(last=False)
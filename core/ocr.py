@@ -3,10 +3,26 @@ import numpy as np
 import pyautogui
 import pytesseract
 import os
-from PIL import Image
 from contextlib import suppress
 import concurrent.futures
+import threading
+from collections import OrderedDict
 from core.config_manager import config_manager, get_resource_path
+from core.ocr_engine import get_ocr_backend
+from core.ocr_batch import pack_mosaics, split_mosaic_data
+from core.ocr_cache import get_ocr_cache, cached_image_to_data
+from core.ocr_tiles import TILE_OVERLAP, TILE_SIZE, merge_tile_data, plan_tiles
+from core.preprocess import preprocess_crop as _preprocess_crop, joined_text as _joined_text, read_crop, unscale_data
+from core.ocr_executor import get_process_executor
+from core.frame_diff import FrameDiffer
+from core.motion import MotionDetector
+from core.color_classifier import get_color_classifier, propose_regions
+from core.mask_integral import MaskIntegral
+from core.keyword_matcher import get_anchor_matcher, get_keyword_matcher, invalidate_keyword_matchers
+from core.templates import LocationMemory, SearchImage, get_template, match_templates
+from core.spatial_index import SpatialIndex
+from core.text_likelihood import keyword_threshold, text_likelihood
+from core.contour_priority import HitHistory, contour_priority
 from utils.logger import logger
 import pygetwindow as gw
 
@@ -29,6 +45,27 @@ OCR_ALIASES = {
     "expand [": "Expand",
     "expand{": "Expand",
 }
+# Settings that change what process_text_match decides for a given text
+KEYWORD_CONFIG_KEYS = ("CLICK_KEYWORDS", "TYPE_KEYWORDS", "OCR_ALIASES")
+_ocr_aliases = None
+
+def get_ocr_aliases():
+    """OCR_ALIASES extended with the user's OCR_ALIASES setting (misread text -> keyword)."""
+    global _ocr_aliases
+    if _ocr_aliases is None:
+        aliases = dict(OCR_ALIASES)
+        extra = config_manager.get("OCR_ALIASES", {})
+        if isinstance(extra, dict):
+            aliases.update({str(k).lower(): str(v) for k, v in extra.items()})
+        _ocr_aliases = aliases
+    return _ocr_aliases
+
+def _on_keyword_config_change(key, value):
+    global _ocr_aliases
+    _ocr_aliases = None
+    invalidate_keyword_matchers()
+
+config_manager.add_listener(_on_keyword_config_change, KEYWORD_CONFIG_KEYS)
 
 # Try importing thefuzz, handle if not installed (though it should be)
 try:
@@ -46,28 +83,20 @@ else:
 
 
 
-import mss
-
+from core.capture import capture_service
+from core.frame import Frame, as_frame
 from core.exceptions import OCRError
 
 # ...
 
 def capture_screen(region=None):
-    """Captures the screen or a specific region (x, y, w, h)."""
+    """
+    Captures the screen or a specific region (x, y, w, h).
+    Returns a Frame wrapping the captured BGRA buffer; derived planes are computed on demand.
+    """
     try:
-        with mss.mss() as sct:
-            if region:
-                x, y, w, h = region
-                monitor = {"top": int(y), "left": int(x), "width": int(w), "height": int(h)}
-                sct_img = sct.grab(monitor)
-            else:
-                # Grab primary monitor if no region specified
-                monitor = sct.monitors[1]
-                sct_img = sct.grab(monitor)
-            
-            # Convert to PIL Image (RGB)
-            img = Image.frombytes("RGB", sct_img.size, sct_img.bgra, "raw", "BGRX")
-            return img
+        bgra = capture_service.grab(region)
+        return Frame(bgra=bgra, region=region)
     except Exception as e:
         logger.error(f"Screen capture failed: {e}")
         # Critical error if we can't see screen
@@ -75,64 +104,60 @@ def capture_screen(region=None):
 
 # ...
 
+def get_color_labels(screenshot, scale=1.0):
+    """
+    Labels every pixel with the color profiles it falls in, in a single pass.
+    Accepts a Frame (its HSV plane is reused) or an RGB image; `scale` < 1 labels a downscaled copy.
+    Returns ColorLabels, or None if the color filter is disabled or no profile is configured.
+    """
+    if not config_manager.get("ENABLE_COLOR_FILTER", True):
+        return None
+
+    try:
+        classifier = get_color_classifier(config_manager.get("BUTTON_COLOR_PROFILES", []))
+        if not classifier.names:
+            return None
+        return classifier.classify(as_frame(screenshot).scaled_hsv(scale), scale=scale)
+    except Exception as e:
+        logger.error(f"Color mask generation failed: {e}")
+        return None
+
 def get_color_masks(screenshot):
     """
     Detects regions based on configured color profiles.
+    Accepts a Frame (its HSV plane is reused) or an RGB image.
     Returns a dictionary of mask arrays keyed by profile name.
     """
-    if not config_manager.get("ENABLE_COLOR_FILTER", True):
+    labels = get_color_labels(screenshot)
+    if labels is None:
         return None
-    
+
     try:
-        img_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-        hsv = cv2.cvtColor(img_cv, cv2.COLOR_BGR2HSV)
-        
-        profiles = config_manager.get("BUTTON_COLOR_PROFILES", [])
-        if not profiles:
-            return None
-            
         masks = {}
         kernel = np.ones((5, 5), np.uint8)
-        
-        # Flexibility for formats
-        if isinstance(profiles, list):
-            for p in profiles:
-                try:
-                    name = p.get("name", "unknown")
-                    lower = np.array(p.get("lower", p.get("low", [0, 0, 0])))
-                    upper = np.array(p.get("upper", p.get("high", [180, 255, 255])))
-                    mask = cv2.inRange(hsv, lower, upper)
-                    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-                    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel) # Added this line back from original
-                    masks[name] = mask
-                except Exception as e:
-                    logger.warning(f"Skipping malformed profile {p}: {e}")
-        elif isinstance(profiles, dict):
-            for name, p in profiles.items():
-                try:
-                    lower = np.array(p.get("low", p.get("lower", [0, 0, 0])))
-                    upper = np.array(p.get("high", p.get("upper", [180, 255, 255])))
-                    mask = cv2.inRange(hsv, lower, upper)
-                    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-                    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel) # Added this line back from original
-                    masks[name] = mask
-                except Exception as e:
-                    logger.warning(f"Skipping malformed profile {name}: {e}")
-        
+        for name in labels.names:
+            mask = cv2.morphologyEx(labels.mask(name), cv2.MORPH_CLOSE, kernel)
+            masks[name] = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
         return masks if masks else None
     except Exception as e:
         logger.error(f"Color mask generation failed: {e}")
         return None
 
 
-def is_on_colored_background(box, combined_mask, region_offset=(0, 0)):
+def is_on_colored_background(box, combined_mask, region_offset=(0, 0), threshold=None):
     """
     Checks if a text bounding box overlaps with detected colored regions.
+    `combined_mask` may be a mask array or a MaskIntegral (see colored_background_filter for many boxes).
     """
     if combined_mask is None:
         return True
     
     try:
+        if threshold is None:
+            threshold = config_manager.get("COLOR_OVERLAP_THRESHOLD", 0.5)
+        if isinstance(combined_mask, MaskIntegral):
+            return bool(combined_mask.ratios([box], region_offset)[0] >= threshold)
+
         x, y, w, h = box
         offset_x, offset_y = region_offset
         mask_x = x - offset_x
@@ -147,12 +172,24 @@ def is_on_colored_background(box, combined_mask, region_offset=(0, 0)):
         
         colored_pixels = np.count_nonzero(roi)
         overlap_ratio = colored_pixels / total_pixels
-        threshold = config_manager.get("COLOR_OVERLAP_THRESHOLD", 0.5)
         return overlap_ratio >= threshold
     except Exception as e:
         logger.error(f"Error checking colored background: {e}")
         return False
 
+def colored_background_filter(boxes, mask, region_offset=(0, 0), threshold=None):
+    """
+    Batch form of is_on_colored_background: a boolean array, one entry per (x, y, w, h) box.
+    `mask` is a mask array or a MaskIntegral; the summed-area table makes each box O(1).
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    if mask is None:
+        return np.ones(len(boxes), dtype=bool)
+    if threshold is None:
+        threshold = config_manager.get("COLOR_OVERLAP_THRESHOLD", 0.5)
+    integral = mask if isinstance(mask, MaskIntegral) else MaskIntegral(mask)
+    return integral.ratios(boxes, region_offset) >= threshold
+
 def get_target_region():
     """
     Returns the (x, y, w, h) region of the target window.
@@ -212,10 +249,299 @@ def is_box_in_app_window(box, app_bounds):
     
     return (ax <= center_x <= ax + aw) and (ay <= center_y <= ay + ah)
 
-def scan_for_keywords(target_keywords_click, target_keywords_type, override_region=None, debug_segments=False):
+def _pad_box(rect, shape, pad=5):
+    """Pads a contour rect slightly for better OCR, clipped to the image bounds."""
+    x, y, w, h = rect
+    x_pad = max(0, x - pad)
+    y_pad = max(0, y - pad)
+    w_pad = min(shape[1] - x_pad, w + pad * 2)
+    h_pad = min(shape[0] - y_pad, h + pad * 2)
+    return x_pad, y_pad, w_pad, h_pad
+
+def _eligible_keywords(keywords, profile, restrictions):
+    """
+    Keywords that may appear on a region whose dominant color is `profile`.
+    `restrictions` maps lowercased keywords to their KEYWORD_COLOR_PROFILES; unlisted keywords go anywhere.
+    """
+    if profile is None:
+        return list(keywords)
+    return [k for k in keywords if k.lower() not in restrictions or profile in restrictions[k.lower()]]
+
+def _collect_region_results(data, idx, rect, crop_origin, offset, target_keywords_click, target_keywords_type, app_bounds):
+    """
+    Converts the OCR result of one contour, with word boxes relative to its padded crop, into
+    seen segments and keyword matches. The whole region text is matched first, then each
+    confident word on its own.
+    """
+    local_segments = []
+    local_matches = []
+    if not data:
+        return local_segments, local_matches
+
+    x, y, w, h = rect
+    x_pad, y_pad = crop_origin
+    offset_x, offset_y = offset
+
+    full_region_text = _joined_text(data)
+    # Score the region text and all its words in one batch; process_text_match reuses the results
+    get_keyword_matcher(target_keywords_click, target_keywords_type, get_ocr_aliases(), fuzz).match_many(
+        [full_region_text.lower()] + [t.strip().lower() for t in data['text'] if t.strip()])
+    if full_region_text:
+        logger.debug(f"Contour {idx} Text: '{full_region_text}' at ({x}, {y})")
+        full_abs_box = (offset_x + x, offset_y + y, w, h)
+        local_segments.append((full_region_text, full_abs_box, 100))
+        # Check keyword to color profile logic
+        process_text_match(full_region_text, full_region_text.lower(), 100, full_abs_box, 
+                           target_keywords_click, target_keywords_type, local_matches, app_bounds)
+
+    # Also check individual words from data
+    n_boxes = len(data['text'])
+    for i in range(n_boxes):
+        text = data['text'][i].strip()
+        conf = int(data['conf'][i])
+        
+        if not text or conf < config_manager.get("OCR_CONFIDENCE_THRESHOLD", 60):
+            continue
+        
+        text_lower = text.lower()
+        abs_x = offset_x + x_pad + data['left'][i]
+        abs_y = offset_y + y_pad + data['top'][i]
+        abs_w = data['width'][i]
+        abs_h = data['height'][i]
+
+        abs_box = (abs_x, abs_y, abs_w, abs_h)
+        local_segments.append((text, abs_box, conf))
+        
+        # Prevent duplicates if it matched full region
+        is_dup = any(m['box'] == abs_box and m['keyword'].lower() in text_lower for m in local_matches)
+        if not is_dup:
+            process_text_match(text, text_lower, conf, abs_box, target_keywords_click, target_keywords_type, local_matches, app_bounds)
+                
+    return local_segments, local_matches
+
+def _ocr_regions_mosaic(regions, gray, ocr_backend):
+    """
+    Batches all contour crops of a scan into mosaic images and OCRs each mosaic once.
+    Returns {contour_idx: data_dict} with word boxes relative to each padded crop.
+    """
+    cache = get_ocr_cache()
+    results = {}
+    crops = []
+    cache_keys = {}
+    scales = {}
+    for idx, rect in regions:
+        x_pad, y_pad, w_pad, h_pad = _pad_box(rect, gray.shape)
+        try:
+            upscaled, scales[idx] = _preprocess_crop(gray[y_pad:y_pad+h_pad, x_pad:x_pad+w_pad])
+        except Exception as e:
+            logger.error(f"Preprocessing failed on region {idx}: {e}")
+            continue
+
+        if cache is not None:
+            cache_keys[idx] = cache.make_key(upscaled, 11, ocr_backend.cache_tag)
+            cached = cache.get(cache_keys[idx])
+            if cached is not None:
+                results[idx] = unscale_data(cached, scales[idx])
+                continue
+        crops.append((idx, upscaled))
+
+    mosaics = pack_mosaics(crops)
+    for n, (mosaic, cells) in enumerate(mosaics):
+        try:
+            # Sparse text mode: find every word regardless of layout
+            data = ocr_backend.image_to_data(mosaic, psm=11)
+        except Exception as e:
+            logger.error(f"OCR Failed on mosaic: {e}")
+            continue
+
+        if config_manager.get("DEBUG_MODE", False):
+            cv2.imwrite(f"mosaic_{n}.png", mosaic)
+
+        per_cell = split_mosaic_data(data, cells)
+        for idx, cell_data in per_cell.items():
+            if cache is not None:
+                cache.put(cache_keys[idx], cell_data)
+            results[idx] = unscale_data(cell_data, scales[idx])
+    logger.debug(f"Mosaic OCR: {len(crops)} crops in {len(mosaics)} engine call(s)")
+    return results
+
+def _ocr_full_frame(frame, ocr_backend):
+    """
+    OCRs the whole frame. Frames larger than OCR_TILE_SIZE are split into overlapping tiles cut
+    between text lines, read in parallel, and merged into one data dict in frame coordinates.
+    """
+    tile_size = config_manager.get("OCR_TILE_SIZE", TILE_SIZE)
+    if not tile_size or max(frame.shape[:2]) <= tile_size:
+        return ocr_backend.image_to_data(frame.rgb)
+
+    tiles = plan_tiles(frame.gray, tile_size, config_manager.get("OCR_TILE_OVERLAP", TILE_OVERLAP))
+    rgb = frame.rgb
+
+    def read_tile(tile):
+        image = np.ascontiguousarray(rgb[tile.y:tile.y + tile.h, tile.x:tile.x + tile.w])
+        return tile.key, cached_image_to_data(ocr_backend, image)
+
+    results = {}
+    max_workers = config_manager.get("SCAN_PARALLELISM", 4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(read_tile, tile) for tile in tiles]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                key, data = future.result()
+                results[key] = data
+            except Exception as e:
+                logger.error(f"OCR Failed on tile: {e}")
+    if not results:
+        raise OCRError("OCR failed on every tile")
+    logger.debug(f"Full-frame OCR: {len(tiles)} tile(s), {len(results)} read")
+    return merge_tile_data(results, tiles, frame.shape)
+
+class _ScanState:
+    """
+    Results of the previous scan of one region, reused for areas that did not change.
+    `frame` is the capture they were read from: the next scan with the same keywords diffs
+    against it, so scans with other keywords or failed scans never move the reference. It is
+    held without copying: every grab is a fresh buffer and frames are never written to.
+    """
+
+    def __init__(self, frame=None):
+        self.frame = frame
+        self.contour_results = {}
+        self.template_matches = []
+        self.matches = []
+        self.segments = []
+        # False when OCR stopped at the first good match: the matches are not the whole frame's
+        self.complete = True
+
+class ContourStats:
+    """How the contours of the last scan were handled (OCR'd, reused, skipped or cancelled), plus running totals."""
+    FIELDS = ("ocr", "reused", "skipped_color", "skipped_no_text", "cancelled")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.last = dict.fromkeys(self.FIELDS, 0)
+        self.total = dict.fromkeys(self.FIELDS, 0)
+
+    def record(self, counts):
+        with self._lock:
+            self.last = dict(counts)
+            for field in self.FIELDS:
+                self.total[field] += counts.get(field, 0)
+
+    def stats(self):
+        with self._lock:
+            return {"last": dict(self.last), "total": dict(self.total)}
+
+_frame_differ = FrameDiffer()
+_scan_states = OrderedDict()
+_scan_states_lock = threading.Lock()
+MAX_SCAN_STATES = 8
+_motion_detector = MotionDetector(max_regions=MAX_SCAN_STATES)
+_template_memory = LocationMemory()
+_contour_stats = ContourStats()
+_hit_history = HitHistory()
+
+def _configure_template_memory():
+    _template_memory.margin = config_manager.get("TEMPLATE_ROI_MARGIN", 16)
+    _template_memory.full_search_every = config_manager.get("TEMPLATE_FULL_SEARCH_INTERVAL", 10)
+    return _template_memory
+
+def get_template_memory_stats():
+    """ROI hit rate and estimated time saved by searching templates near their last location."""
+    return _template_memory.stats()
+
+def get_contour_stats():
+    """Contours OCR'd, reused and skipped (by color or TEXT_PREFILTER), for the last scan and in total."""
+    return _contour_stats.stats()
+
+def _match_templates(gray, offset, app_bounds, dirty=None, previous=None):
+    """
+    Matches configured TEMPLATES against the gray frame.
+    With a DirtyMap and the previous scan's template hits, hits in unchanged areas are
+    reused and matching only runs on the window around the changed tiles.
+    """
+    found_matches = []
+    template_paths = config_manager.get("TEMPLATES", [])
+    threshold = config_manager.get("TEMPLATE_MATCHING_THRESHOLD", 0.8)
+    if not template_paths:
+        return found_matches
+
+    offset_x, offset_y = offset
+    incremental = dirty is not None and previous is not None
+    search = dirty.bounding_box() if incremental else None
+    full_frame = SearchImage(gray)
+    memory = _configure_template_memory() if config_manager.get("TEMPLATE_ROI_ENABLED", True) else None
+
+    jobs, origins, kept = [], [], []
+    for t_path in template_paths:
+        abs_t_path = get_resource_path(t_path)
+        if not os.path.exists(abs_t_path):
+            logger.warning(f"Template not found: {abs_t_path}")
+            continue
+        template = get_template(abs_t_path)
+        if template is None: continue
+
+        t_h, t_w = template.height, template.width
+        name = template.name
+        haystack = full_frame
+        memory_key = (offset, gray.shape, abs_t_path)
+        origin_x, origin_y = 0, 0
+        reused = []
+        if incremental:
+            for m in previous:
+                mx, my, mw, mh = m['box']
+                if m['keyword'] == name and not dirty.intersects((mx - offset_x, my - offset_y, mw, mh)):
+                    reused.append(m)
+            found_matches.extend(reused)
+            if search is None:
+                continue
+            sx, sy, sw, sh = search
+            origin_x, origin_y = max(0, sx - t_w), max(0, sy - t_h)
+            window = gray[origin_y:min(gray.shape[0], sy + sh + t_h), origin_x:min(gray.shape[1], sx + sw + t_w)]
+            if window.shape[0] < t_h or window.shape[1] < t_w:
+                continue
+            haystack = SearchImage(window)
+            memory_key = None
+        jobs.append((haystack, template, threshold, memory_key))
+        origins.append((origin_x, origin_y))
+        kept.append(reused)
+
+    for (_, template, _, _), (origin_x, origin_y), reused, hits in zip(jobs, origins, kept, match_templates(jobs, memory)):
+        t_w, t_h = template.width, template.height
+        for x, y, score in hits:
+            abs_box = (offset_x + origin_x + x, offset_y + origin_y + y, t_w, t_h)
+            # Reused hits from unchanged tiles take precedence over new ones on top of them
+            if any(abs(m['box'][0] - abs_box[0]) < t_w and abs(m['box'][1] - abs_box[1]) < t_h for m in reused):
+                continue
+            
+            # Safety check for app window
+            if app_bounds and is_box_in_app_window(abs_box, app_bounds):
+                continue
+            
+            score *= 100
+            found_matches.append({
+                'keyword': template.name,
+                'found_text': f"Template: {template.name}",
+                'type': 'CLICK',
+                'box': abs_box,
+                'conf': score
+            })
+            logger.info(f"Found template match: {template.path} at {abs_box} (Score: {score:.1f})")
+
+    return found_matches
+
+def scan_for_keywords(target_keywords_click, target_keywords_type, override_region=None, debug_segments=False, frame=None,
+                      first_match=None):
     """
     Scans the screen (or target window) for keywords.
     Optimized: If blue filter is enabled, it scans blue regions individually for better speed.
+    Unchanged parts of the frame reuse the results of the previous scan of the same region.
+    If `frame` is given (the cycle's shared capture of `override_region`), no new capture is taken.
+    Contours are read most promising first (see contour_priority). With `first_match` (True, or a
+    predicate on a match dict), contour OCR stops at the first keyword match of at least
+    FIRST_MATCH_MIN_CONFIDENCE that the predicate accepts and the remaining crops are cancelled
+    (mosaic batches are read in one call and never stop early). It is ignored with proximity
+    clicking or debug_segments on, which need all text.
     Returns a list of dicts: {'keyword': str, 'type': 'CLICK'|'TYPE', 'box': (x, y, w, h), 'conf': float}
     """
     region = override_region if override_region else get_target_region()
@@ -224,25 +550,35 @@ def scan_for_keywords(target_keywords_click, target_keywords_type, override_regi
     if region == (0, 0, 0, 0):
         return []
 
-    screenshot = capture_screen(region=region)
-    logger.debug(f"capture_screen returned: {type(screenshot)} of size {screenshot.size if hasattr(screenshot, 'size') else 'N/A'}")
-    img_np = np.array(screenshot)
-    logger.debug(f"img_np shape: {img_np.shape}")
+    if frame is None:
+        frame = capture_screen(region=region)
+    frame = as_frame(frame, region=region)
+    logger.debug(f"Captured frame of shape {frame.shape}")
+
+    # --- Dirty-rectangle tracking ---
+    dirty = None
+    previous = None
+    state_key = (region, tuple(target_keywords_click), tuple(target_keywords_type), config_manager.revision)
+    if config_manager.get("DIRTY_RECT_ENABLED", True):
+        _frame_differ.tile_size = config_manager.get("DIRTY_TILE_SIZE", 32)
+        with _scan_states_lock:
+            previous = _scan_states.get(state_key)
+        dirty = _frame_differ.diff(previous.frame if previous is not None else None, frame.raw)
+        if dirty is None:
+            previous = None
+
+    if previous is not None and previous.complete and not dirty.any():
+        logger.debug("Frame unchanged since last scan. Reusing previous results.")
+        if debug_segments:
+            return list(previous.matches), list(previous.segments)
+        return list(previous.matches)
 
-    
     # Region offset for coordinate mapping (0,0 if full screen)
     offset_x, offset_y = (region[0], region[1]) if region else (0, 0)
     
-    # Detect regions
-    color_masks = get_color_masks(screenshot)
-    combined_mask = None
-    if color_masks:
-        for m in color_masks.values():
-            if combined_mask is None:
-                combined_mask = m
-            else:
-                combined_mask = cv2.bitwise_or(combined_mask, m)
-
+    # Detect regions: every profile is labeled in one pass, morphology runs once on the union
+    proposal_scale = config_manager.get("REGION_PROPOSAL_SCALE", 1.0)
+    color_labels = get_color_labels(frame, scale=proposal_scale)
     
     # Get app window bounds to avoid self-clicking
     app_bounds = None
@@ -256,126 +592,186 @@ def scan_for_keywords(target_keywords_click, target_keywords_type, override_regi
 
     matches = []
     all_seen_segments = [] # List of (text, box, conf)
-
-    if combined_mask is not None:
-        # Find contours of detected regions
-        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        def process_contour(cnt, idx):
-            local_segments = []
-            local_matches = []
-            x, y, w, h = cv2.boundingRect(cnt)
+    state = _ScanState(frame.raw if dirty is not None else None)
+    ocr_backend = get_ocr_backend()
+
+    if color_labels is not None:
+        # Keywords are only looked for on the button colors KEYWORD_COLOR_PROFILES allows.
+        # Proximity targets can be any text, so with proximity on every region is still read.
+        restrictions = {k.lower(): set(v) for k, v in config_manager.get("KEYWORD_COLOR_PROFILES", {}).items()}
+        keep_all_text = debug_segments or config_manager.get("PROXIMITY_CLICKING_ENABLED", False)
+        if keep_all_text:
+            # Proximity targets are found in the text around anchors: every contour must be read
+            first_match = None
+        keyword_profiles = set().union(*restrictions.values())
+        region_keywords = {}
+        priorities = {}
+        counts = dict.fromkeys(ContourStats.FIELDS, 0)
+        skipped = 0
+        prefilter = config_manager.get("TEXT_PREFILTER_ENABLED", True)
+        prefilter_threshold = config_manager.get("TEXT_PREFILTER_THRESHOLD", 0.5)
+        # Anchors may turn up on any contour; the bar each contour must clear depends on the
+        # keywords still possible on its color, so it is worked out once per profile
+        anchor_keywords = []
+        if config_manager.get("PROXIMITY_CLICKING_ENABLED", False):
+            anchor_keywords = list(config_manager.get("ANCHOR_KEYWORDS", ["El", "Bell", "bell_icon.png"]) or [])
+        thresholds = {}
+
+        # Find bounding boxes of detected regions
+        regions = []
+        for idx, (x, y, w, h) in enumerate(propose_regions(frame, color_labels, min_size=10)):
             # Skip noise or tiny regions
             if w < 10 or h < 10:
-                return local_segments, local_matches
+                continue
+            rect = (x, y, w, h)
+
+            # Reuse last scan's result for contours whose pixels did not change
+            if previous is not None and rect in previous.contour_results and \
+                    not dirty.intersects(_pad_box(rect, frame.shape)):
+                loc_segs, loc_matches = previous.contour_results[rect]
+                state.contour_results[rect] = (loc_segs, loc_matches)
+                all_seen_segments.extend(loc_segs)
+                matches.extend(loc_matches)
+                counts["reused"] += 1
+                continue
 
-            # Determine dominant color profile for this contour
-            # This is optional optimization, for now we just use the combined mask
-            
-            # Pad the region slightly for better OCR
-            pad = 5
-            x_pad = max(0, x - pad)
-            y_pad = max(0, y - pad)
-            w_pad = min(img_np.shape[1] - x_pad, w + pad * 2)
-            h_pad = min(img_np.shape[0] - y_pad, h + pad * 2)
-            
-            crop = img_np[y_pad:y_pad+h_pad, x_pad:x_pad+w_pad]
-            
-            try:
-                # --- Preprocessing for better OCR ---
-                gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
-                clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-                enhanced = clahe.apply(gray)
+            click_kw, type_kw = target_keywords_click, target_keywords_type
+            profile = None
+            if restrictions:
+                profile = color_labels.dominant_profile(rect)
+                click_kw = _eligible_keywords(target_keywords_click, profile, restrictions)
+                type_kw = _eligible_keywords(target_keywords_type, profile, restrictions)
+                if not click_kw and not type_kw and not keep_all_text:
+                    # No keyword can appear on this color: skip OCR altogether
+                    state.contour_results[rect] = ([], [])
+                    skipped += 1
+                    continue
 
-                _, thresh_inv = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-                _, thresh_std = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                
-                thresh = thresh_inv
-                if np.mean(enhanced) > 127:
-                    thresh = thresh_std
-                else:
-                    thresh = thresh_inv
-
-                upscaled = cv2.resize(thresh, (0,0), fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
-                upscaled = cv2.medianBlur(upscaled, 3)
-
-                # Smarter PSM Selection based on aspect ratio
-                aspect_ratio = w / h
-                if aspect_ratio >= 3.0:
-                    config_str = '--psm 7' # Single line
-                elif aspect_ratio >= 1.0:
-                    config_str = '--psm 8' # Single word
-                else:
-                    config_str = '--psm 10' # Single char/symbol
-                
-                data = pytesseract.image_to_data(upscaled, config=config_str, output_type=pytesseract.Output.DICT)
-                full_region_text = " ".join([t.strip() for t in data['text'] if t.strip()]).replace("|", "").strip()
-                
-                if not full_region_text and aspect_ratio >= 1.0:
-                    # Fallback to single char if it was a square-ish thing that failed
-                    data = pytesseract.image_to_data(upscaled, config='--psm 10', output_type=pytesseract.Output.DICT)
-                    full_region_text = " ".join([t.strip() for t in data['text'] if t.strip()]).replace("|", "").strip()
+            if prefilter:
+                if profile not in thresholds:
+                    thresholds[profile] = keyword_threshold([*click_kw, *type_kw, *anchor_keywords],
+                                                            prefilter_threshold)
+                x_pad, y_pad, w_pad, h_pad = _pad_box(rect, frame.shape)
+                if text_likelihood(frame.gray[y_pad:y_pad+h_pad, x_pad:x_pad+w_pad]) < thresholds[profile]:
+                    # Icons, avatars and empty panels: not worth one or two OCR calls
+                    state.contour_results[rect] = ([], [])
+                    counts["skipped_no_text"] += 1
+                    continue
+            region_keywords[idx] = (click_kw, type_kw)
+            priorities[idx] = contour_priority(rect, profile, keyword_profiles,
+                                               _hit_history.overlaps((offset_x + x, offset_y + y, w, h)))
+            regions.append((idx, rect))
+
+        # Most promising contours first: the first good match turns up sooner, and workers
+        # pick crops up in submission order
+        regions.sort(key=lambda region: priorities[region[0]], reverse=True)
+        counts["skipped_color"] = skipped
+        if skipped:
+            logger.debug(f"Skipped OCR for {skipped} region(s) whose color hosts no keyword.")
+        if counts["skipped_no_text"]:
+            logger.debug(f"Skipped OCR for {counts['skipped_no_text']} region(s) unlikely to hold text.")
+        if previous is not None:
+            logger.debug(f"Dirty tiles: {dirty.ratio():.0%}. Re-OCR {len(regions)} contour(s), reused {len(state.contour_results)}.")
+
+        def region_results(idx, rect, data):
+            x_pad, y_pad, _, _ = _pad_box(rect, frame.shape)
+            click_kw, type_kw = region_keywords[idx]
+            return _collect_region_results(data, idx, rect, (x_pad, y_pad), (offset_x, offset_y),
+                                           click_kw, type_kw, app_bounds)
+
+        min_conf = config_manager.get("FIRST_MATCH_MIN_CONFIDENCE", 80)
+
+        def is_good(match):
+            return match['conf'] >= min_conf and (first_match is True or first_match(match))
+
+        def add_region(rect, results):
+            """Stores one contour's results; True when first_match is satisfied by them."""
+            loc_segs, loc_matches = results
+            state.contour_results[rect] = (loc_segs, loc_matches)
+            all_seen_segments.extend(loc_segs)
+            matches.extend(loc_matches)
+            return bool(first_match) and any(is_good(m) for m in loc_matches)
+
+        def process_contour(idx, rect):
+            x, y, w, h = rect
+            x_pad, y_pad, w_pad, h_pad = _pad_box(rect, frame.shape)
+            crop = frame.gray[y_pad:y_pad+h_pad, x_pad:x_pad+w_pad]
+
+            data = None
+            try:
+                data, upscaled = read_crop(ocr_backend, crop, w, h)
 
                 if config_manager.get("DEBUG_MODE", False):
                     cv2.imwrite(f"crop_{idx}.png", upscaled)
-
-                if full_region_text:
-                    logger.debug(f"Contour {idx} Text: '{full_region_text}' at ({x}, {y})")
-                    full_abs_box = (offset_x + x, offset_y + y, w, h)
-                    local_segments.append((full_region_text, full_abs_box, 100))
-                    # Check keyword to color profile logic
-                    process_text_match(full_region_text, full_region_text.lower(), 100, full_abs_box, 
-                                       target_keywords_click, target_keywords_type, local_matches, app_bounds)
-
             except Exception as e:
                 logger.error(f"OCR Failed on region: {e}")
 
-            # Also check individual words from data
-            if 'data' in locals():
-                n_boxes = len(data['text'])
-                for i in range(n_boxes):
-                    text = data['text'][i].strip()
-                    conf = int(data['conf'][i])
-                    
-                    if not text or conf < config_manager.get("OCR_CONFIDENCE_THRESHOLD", 60):
-                        continue
-                    
-                    text_lower = text.lower()
-                    abs_x = offset_x + x_pad + (data['left'][i] // 3)
-                    abs_y = offset_y + y_pad + (data['top'][i] // 3)
-                    abs_w = data['width'][i] // 3
-                    abs_h = data['height'][i] // 3
-
-                    abs_box = (abs_x, abs_y, abs_w, abs_h)
-                    local_segments.append((text, abs_box, conf))
-                    
-                    # Prevent duplicates if it matched full region
-                    is_dup = any(m['box'] == abs_box and m['keyword'].lower() in text_lower for m in local_matches)
-                    if not is_dup:
-                        process_text_match(text, text_lower, conf, abs_box, target_keywords_click, target_keywords_type, local_matches, app_bounds)
-                        
-            return local_segments, local_matches
-
-        max_workers = config_manager.get("SCAN_PARALLELISM", 4)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(process_contour, cnt, idx) for idx, cnt in enumerate(contours)]
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    loc_segs, loc_matches = future.result()
-                    all_seen_segments.extend(loc_segs)
-                    matches.extend(loc_matches)
-                except Exception as e:
-                    logger.error(f"Parallel processing error: {e}")
-
+            return rect, region_results(idx, rect, data)
+
+        executor_kind = str(config_manager.get("OCR_EXECUTOR", "thread")).lower()
+        max_workers = config_manager.get("OCR_WORKERS", 0) or config_manager.get("SCAN_PARALLELISM", 4)
+        found = bool(first_match) and any(is_good(m) for m in matches)
+        if found:
+            logger.debug("First good match found among reused contours. Skipping OCR.")
+        elif config_manager.get("OCR_BATCH_MODE", "contour") == "mosaic":
+            results = _ocr_regions_mosaic(regions, frame.gray, ocr_backend)
+            for idx, rect in regions:
+                add_region(rect, region_results(idx, rect, results.get(idx)))
+        elif executor_kind == "process" and regions:
+            # Crops go to the worker processes through shared memory; results are mapped back here
+            rects = dict(regions)
+            jobs = []
+            for idx, (x, y, w, h) in regions:
+                x_pad, y_pad, w_pad, h_pad = _pad_box((x, y, w, h), frame.shape)
+                jobs.append((idx, frame.gray[y_pad:y_pad+h_pad, x_pad:x_pad+w_pad], w, h))
+            try:
+                crops = get_process_executor(max_workers).read_crops(jobs)
+                for idx, data in crops:
+                    if add_region(rects[idx], region_results(idx, rects[idx], data)):
+                        found = True
+                        crops.close()  # Cancels the crops not started yet
+                        break
+            except Exception as e:
+                logger.error(f"Process OCR error: {e}")
+        elif executor_kind == "inline":
+            for idx, rect in regions:
+                if add_region(*process_contour(idx, rect)):
+                    found = True
+                    break
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+            try:
+                futures = [executor.submit(process_contour, idx, rect) for idx, rect in regions]
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        if add_region(*future.result()):
+                            found = True
+                            break
+                    except Exception as e:
+                        logger.error(f"Parallel processing error: {e}")
+            finally:
+                # Crops already being read finish in the background; their results are dropped
+                executor.shutdown(wait=not found, cancel_futures=found)
+
+        if found:
+            state.complete = False
+            counts["cancelled"] = sum(1 for _, rect in regions if rect not in state.contour_results)
+            if counts["cancelled"]:
+                logger.debug(f"First good match found. Cancelled OCR of {counts['cancelled']} contour(s).")
+        counts["ocr"] = len(regions) - counts["cancelled"]
+        _contour_stats.record(counts)
+        _hit_history.record([m['box'] for m in matches])
     else:
         # Fallback to full screen scan if color filter disabled or failed
         logger.debug("Falling back to full screenshot OCR scan...")
         try:
-            data = pytesseract.image_to_data(screenshot, output_type=pytesseract.Output.DICT)
+            data = _ocr_full_frame(frame, ocr_backend)
         except Exception as e:
             logger.error(f"OCR Failed: {e}")
             return []
 
+        get_keyword_matcher(target_keywords_click, target_keywords_type, get_ocr_aliases(), fuzz).match_many(
+            [t.strip().lower() for t in data['text'] if t.strip()])
         n_boxes = len(data['text'])
         for i in range(n_boxes):
             text = data['text'][i].strip()
@@ -396,61 +792,26 @@ def scan_for_keywords(target_keywords_click, target_keywords_type, override_regi
 
 
     # --- Template Matching ---
-    template_paths = config_manager.get("TEMPLATES", [])
-    threshold = config_manager.get("TEMPLATE_MATCHING_THRESHOLD", 0.8)
-    
-    if template_paths:
-        for t_path in template_paths:
-            abs_t_path = get_resource_path(t_path)
-            if not os.path.exists(abs_t_path):
-                logger.warning(f"Template not found: {abs_t_path}")
-                continue
-                
-            template = cv2.imread(abs_t_path)
-            if template is None: continue
-            
-            # Match template
-            res = cv2.matchTemplate(img_np, template, cv2.TM_CCOEFF_NORMED)
-            locs = np.where(res >= threshold)
-            
-            t_h, t_w = template.shape[:2]
-            
-            # Efficiently collect best matches using non-max suppression principle
-            found_locs = []
-            for pt in zip(*locs[::-1]):
-                abs_box = (offset_x + pt[0], offset_y + pt[1], t_w, t_h)
-                
-                # Check for existing template matches in this region
-                is_dup = False
-                for fx, fy, fw, fh, fs in found_locs:
-                    if abs(fx - abs_box[0]) < t_w and abs(fy - abs_box[1]) < t_h:
-                        is_dup = True
-                        break
-                if is_dup: continue
-                
-                # Safety check for app window
-                if app_bounds and is_box_in_app_window(abs_box, app_bounds):
-                    continue
-                
-                score = float(res[pt[1], pt[0]]) * 100
-                found_locs.append((*abs_box, score))
-                
-                matches.append({
-                    'keyword': os.path.basename(t_path),
-                    'found_text': f"Template: {os.path.basename(t_path)}",
-                    'type': 'CLICK',
-                    'box': abs_box,
-                    'conf': score
-                })
-                logger.info(f"Found template match: {t_path} at {abs_box} (Score: {score:.1f})")
+    state.template_matches = _match_templates(frame.gray, (offset_x, offset_y), app_bounds, dirty,
+                                              previous.template_matches if previous is not None else None)
+    matches.extend(state.template_matches)
 
     # --- Proximity Matching ---
     if config_manager.get("PROXIMITY_CLICKING_ENABLED", False):
         _add_proximity_matches(matches, all_seen_segments)
 
+    if dirty is not None:
+        state.matches = list(matches)
+        state.segments = list(all_seen_segments)
+        with _scan_states_lock:
+            _scan_states.pop(state_key, None)
+            _scan_states[state_key] = state
+            while len(_scan_states) > MAX_SCAN_STATES:
+                _scan_states.popitem(last=False)
+
     # --- Motion Detection (Animated Targets) ---
     if config_manager.get("MOTION_DETECTION_ENABLED", True):
-        motion_matches = detect_motion(region)
+        motion_matches = detect_motion(region, frame=frame)
         matches.extend(motion_matches)
 
     if debug_segments:
@@ -458,7 +819,7 @@ def scan_for_keywords(target_keywords_click, target_keywords_type, override_regi
     return matches
 
 def _add_proximity_matches(matches, all_segments):
-    """Adds matches for text near anchor keywords/templates using optimized spatial grouping."""
+    """Adds matches for text near anchor keywords/templates, looked up in a per-frame SpatialIndex."""
     anchors_cfg = config_manager.get("ANCHOR_KEYWORDS", ["El", "Bell", "bell_icon.png"])
     max_dist = config_manager.get("PROXIMITY_MAX_DISTANCE", 300)
     direction = config_manager.get("PROXIMITY_DIRECTION", "BOTH").upper()
@@ -466,132 +827,70 @@ def _add_proximity_matches(matches, all_segments):
     if not all_segments:
         return
 
-    # 1. Identify all anchors first
-    anchor_boxes = []
-    for text, box, conf in all_segments:
-        is_anchor = False
-        text_lower = text.lower()
-        for a in anchors_cfg:
-            a_lower = a.lower()
-            if text_lower == a_lower:
-                is_anchor = True
-                break
-            if fuzz and len(text_lower) > 1 and len(a_lower) > 1:
-                if fuzz.partial_ratio(a_lower, text_lower) >= 90:
-                    is_anchor = True
-                    break
-            elif len(a_lower) > 2 and a_lower in text_lower:
-                is_anchor = True
-                break
-        
-        if is_anchor:
-            anchor_boxes.append((text, box, conf))
+    # 1. Identify all anchors first, scoring every text against every anchor keyword at once
+    anchor_matcher = get_anchor_matcher(anchors_cfg, fuzz)
+    is_anchor = anchor_matcher.match_many([text.lower() for text, _, _ in all_segments])
+    anchor_boxes = [seg for seg, anchor in zip(all_segments, is_anchor) if anchor]
 
     if not anchor_boxes:
         return
 
-    # 2. Group all segments by Y-coordinate (using a small margin for "same line")
-    # Margin is roughly the average height of a segment, or a fixed value like 15px
-    line_map = {}
-    for text, box, conf in all_segments:
-        x, y, w, h = box
-        center_y = y + h / 2
-        line_key = int(center_y // 15) # Group into 15px vertical buckets
-        for k in range(line_key - 1, line_key + 2): # Check adjacent buckets too
-            if k not in line_map: line_map[k] = []
-            line_map[k].append((text, box, conf))
+    # 2. Index the segments by line once; duplicates are looked up by (keyword, box)
+    index = SpatialIndex(all_segments)
+    seen = {(m.get('keyword'), tuple(m.get('box', ()))) for m in matches}
 
-    # 3. For each anchor, only check segments in the same or adjacent Y-buckets
+    # 3. For each anchor, only check segments on its line within reach
     for a_text, a_box, a_conf in anchor_boxes:
         logger.debug(f"Anchor found: '{a_text}' at {a_box}")
-        ax, ay, aw, ah = a_box
-        ac_y = ay + ah / 2
-        line_key = int(ac_y // 15)
-        
-        # Get candidates from relevant buckets
-        candidates = line_map.get(line_key, [])
-        
-        for t_text, t_box, t_conf in candidates:
-            tx, ty, tw, th = t_box
-            tc_y = ty + th / 2
-            
-            # Skip if same box
-            if tx == ax and ty == ay: continue
-            
-            # Double check vertical overlap (same line)
-            y_diff = abs(ac_y - tc_y)
-            if y_diff > (ah + th): continue 
-            
-            # Horizontal distance check
-            dist = -1
-            is_right = tx > (ax + aw / 2)
-            is_left = (tx + tw) < (ax + aw / 2)
-            
-            if direction == "LEFT":
-                if is_left: dist = ax - (tx + tw)
-            elif direction == "RIGHT":
-                if is_right: dist = tx - (ax + aw)
-            else: # BOTH
-                if is_right: dist = tx - (ax + aw)
-                elif is_left: dist = ax - (tx + tw)
-                else: dist = 0
-            
-            if 0 <= dist < max_dist:
-                # Avoid duplicates
-                is_dup = any(existing['box'] == t_box and existing['keyword'] == f"Proximity({a_text})" for existing in matches)
-                if is_dup: continue
-                
-                matches.append({
-                    'keyword': f"Proximity({a_text})",
-                    'found_text': t_text,
-                    'type': 'CLICK',
-                    'box': t_box,
-                    'conf': t_conf
-                })
-                logger.info(f"Proximity Match: '{t_text}' near '{a_text}' at {t_box}")
+        keyword = f"Proximity({a_text})"
+        for _, (t_text, t_box, t_conf) in index.within(a_box, max_dist, direction):
+            if (keyword, tuple(t_box)) in seen:
+                continue
+            seen.add((keyword, tuple(t_box)))
+            matches.append({
+                'keyword': keyword,
+                'found_text': t_text,
+                'type': 'CLICK',
+                'box': t_box,
+                'conf': t_conf
+            })
+            logger.info(f"Proximity Match: '{t_text}' near '{a_text}' at {t_box}")
 
-def detect_motion(region=None):
+def reset_motion_reference(region=None):
+    """
+    Forgets the motion model of `region` (all regions if None).
+    Call after the bot itself changed the screen (click, scroll) so the change is not reported as motion.
+    """
+    _motion_detector.reset(region)
+
+def detect_motion(region=None, frame=None):
     """
     Detects moving/animated elements (like a spinning 'C' icon).
-    Captures two frames closely in time and computes the absolute difference.
+    Feeds the frame into a per-region running motion model and reports blobs that kept
+    changing over the last few scans, so one-off repaints are ignored and nothing blocks.
     """
     try:
-        # Capture first frame
-        frame1 = np.array(capture_screen(region=region))
-        frame1_gray = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
-        
-        # Wait a tiny bit (enough for an animation frame to change)
-        import time
-        time.sleep(0.1)
-        
-        # Capture second frame
-        frame2 = np.array(capture_screen(region=region))
-        frame2_gray = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
-        
-        # Compute absolute difference
-        diff = cv2.absdiff(frame1_gray, frame2_gray)
-        
-        # Threshold to get significant differences
-        _, thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
-        
-        # Dilate to connect broken parts of the animation
-        kernel = np.ones((5,5), np.uint8)
-        dilated = cv2.dilate(thresh, kernel, iterations=2)
-        
-        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if frame is None:
+            frame = capture_screen(region=region)
+        frame = as_frame(frame, region=region)
+
+        _motion_detector.scale = config_manager.get("MOTION_SCALE", 0.5)
+        _motion_detector.persistence = config_manager.get("MOTION_PERSISTENCE", 2)
+        _motion_detector.diff_threshold = config_manager.get("MOTION_DIFF_THRESHOLD", 25)
+        _motion_detector.max_age = config_manager.get("MOTION_MAX_FRAME_AGE", 2.0)
+
+        mask = _motion_detector.update(region, frame.gray, frame.timestamp)
         
         motion_matches = []
         offset_x, offset_y = (region[0], region[1]) if region else (0, 0)
+        min_area = config_manager.get("MOTION_MIN_AREA", 100)
+        max_area = config_manager.get("MOTION_MAX_AREA", 5000)
         
-        for cnt in contours:
-            x, y, w, h = cv2.boundingRect(cnt)
+        for x, y, w, h in _motion_detector.boxes(mask):
             area = w * h
             
             # Filter objects: spinning C indicator is usually small/medium, square-ish
             # Avoid full screen scrolls (huge area) or tiny blinkers (small area)
-            min_area = config_manager.get("MOTION_MIN_AREA", 100)
-            max_area = config_manager.get("MOTION_MAX_AREA", 5000)
-            
             if min_area < area < max_area:
                 aspect_ratio = float(w) / h if h != 0 else 0
                 if 0.5 < aspect_ratio < 2.0: # Roughly square
@@ -611,13 +910,15 @@ def detect_motion(region=None):
         logger.error(f"Motion detection failed: {e}")
         return []
 
-def detect_scrollbars(region=None):
+def detect_scrollbars(region=None, frame=None):
     """
     Finds scrollbar thumbs using templates.
+    Uses `frame` (a capture of `region`) when given instead of capturing again.
     """
     try:
-        screenshot = capture_screen(region=region)
-        img_np = np.array(screenshot)
+        if frame is None:
+            frame = capture_screen(region=region)
+        frame = as_frame(frame, region=region)
         
         template_name = "scrollbar_thumb.png"
         abs_t_path = get_resource_path(f"templates/{template_name}")
@@ -626,29 +927,16 @@ def detect_scrollbars(region=None):
             logger.debug(f"Scrollbar template not found at {abs_t_path}. Ensure it is saved.")
             return []
             
-        template = cv2.imread(abs_t_path)
+        template = get_template(abs_t_path)
         if template is None: return []
         
-        res = cv2.matchTemplate(img_np, template, cv2.TM_CCOEFF_NORMED)
         threshold = config_manager.get("SCROLLBAR_MATCH_THRESHOLD", 0.7)
-        locs = np.where(res >= threshold)
-        
-        t_h, t_w = template.shape[:2]
         offset_x, offset_y = (region[0], region[1]) if region else (0, 0)
-        
-        scrollbars = []
-        for pt in zip(*locs[::-1]):
-            # Filter duplicates (very close matches)
-            abs_box = (offset_x + pt[0], offset_y + pt[1], t_w, t_h)
-            is_dup = False
-            for s in scrollbars:
-                if abs(s[0] - abs_box[0]) < 10 and abs(s[1] - abs_box[1]) < 10:
-                    is_dup = True
-                    break
-            if not is_dup:
-                scrollbars.append(abs_box)
-                
-        return scrollbars
+        # Hits closer than a thumb's size are already merged by the matcher
+        job = (frame.gray, template, threshold, ("scrollbars", (offset_x, offset_y), frame.gray.shape, abs_t_path))
+        memory = _configure_template_memory() if config_manager.get("TEMPLATE_ROI_ENABLED", True) else None
+        hits = match_templates([job], memory)[0]
+        return [(offset_x + x, offset_y + y, template.width, template.height) for x, y, _ in hits]
         
     except Exception as e:
         logger.error(f"Scrollbar detection failed: {e}")
@@ -660,78 +948,27 @@ def process_text_match(text, text_lower, conf, abs_box, target_keywords_click, t
     if app_bounds and is_box_in_app_window(abs_box, app_bounds):
         return matches
 
-    # Apply aliases
-    if text_lower in OCR_ALIASES:
-        logger.debug(f"Aliasing '{text}' -> '{OCR_ALIASES[text_lower]}'")
-        text = OCR_ALIASES[text_lower]
-        text_lower = text.lower()
-    
-    # Check CLICK keywords
-    for k in target_keywords_click:
-        k_lower = k.lower()
-        match_found = False
-        match_score = conf # Default score is current confidence
-        
-        # Exact match first
-        if text_lower == k_lower:
-            match_found = True
-            match_score = conf * 1.0 # Perfect match
-        elif k in ['+', '-'] and k in text_lower:
-            match_found = True
-            match_score = conf * 1.0
-        elif fuzz and len(text_lower) >= 2 and len(k_lower) >= 2:
-            # Use partial_ratio to handle things like "Expand <" matching "Expand"
-            p_ratio = fuzz.partial_ratio(text_lower, k_lower)
-            # Use full ratio to weight the confidence
-            f_ratio = fuzz.ratio(text_lower, k_lower)
-            
-            # Substring protection: if keyword is much longer than found text, skip
-            # e.g. "and" shouldn't match "expand" with high confidence
-            if len(k_lower) > len(text_lower) + 3:
-                continue
-
-            if p_ratio >= 98: 
-                match_found = True
-                # Weight confidence by how well it matches overall
-                match_score = conf * (f_ratio / 100.0)
-                # Ensure it doesn't drop too low for partial matches that are actually good
-                if p_ratio == 100:
-                    match_score = max(match_score, conf * 0.9)
-        elif k_lower in text_lower and len(k_lower) > 3:
-            if len(k_lower) > len(text_lower) + 3: continue
-            match_found = True
-            match_score = conf * 0.8 # Lower score for simple contains
-
-        if match_found:
-            matches.append({
-                'keyword': k,
-                'found_text': text,
-                'type': 'CLICK',
-                'box': abs_box,
-                'conf': match_score
-            })
+    matcher = get_keyword_matcher(target_keywords_click, target_keywords_type, get_ocr_aliases(), fuzz)
+    alias, hits = matcher.match(text_lower)
+    if alias is not None:
+        logger.debug(f"Aliasing '{text}' -> '{alias}'")
+        text = alias
+
+    for k, match_type, weight, floor in hits:
+        match_score = conf if weight is None else conf * weight
+        if floor is not None:
+            # Ensure it doesn't drop too low for partial matches that are actually good
+            match_score = max(match_score, conf * floor)
+        matches.append({
+            'keyword': k,
+            'found_text': text,
+            'type': match_type,
+            'box': abs_box,
+            'conf': match_score
+        })
+        if match_type == 'CLICK':
             logger.debug(f"Found '{k}' (text='{text}') at {abs_box} | Weighted Conf: {match_score:.1f}")
-
-    # Check TYPE keywords
-    for k in target_keywords_type:
-        k_lower = k.lower()
-        match_found = False
-        if fuzz:
-            ratio = fuzz.ratio(text_lower, k_lower)
-            if ratio > 90:
-                match_found = True
-        elif text_lower == k_lower:
-            match_found = True
-        
-        if match_found:
-            matches.append({
-                'keyword': k,
-                'found_text': text,
-                'type': 'TYPE',
-                'box': abs_box,
-                'conf': conf
-            })
+        else:
             logger.debug(f"Found '{k}' (text='{text}') at {abs_box}")
 
     return matches
-
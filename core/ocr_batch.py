@@ -0,0 +1,99 @@
+import numpy as np
+
+# Blank space left between packed crops so Tesseract never joins words from neighbouring cells.
+MOSAIC_GAP = 24
+# Tesseract refuses images above 32767 px per side; stay well below it.
+MOSAIC_MAX_SIDE = 8000
+
+
+class MosaicCell:
+    """Placement of one preprocessed crop inside a mosaic image."""
+
+    def __init__(self, key, x, y, w, h):
+        self.key = key
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+
+    def contains(self, px, py):
+        return self.x <= px < self.x + self.w and self.y <= py < self.y + self.h
+
+
+def pack_mosaics(crops, gap=MOSAIC_GAP, max_side=MOSAIC_MAX_SIDE, background=255):
+    """
+    Packs (key, image) pairs of single-channel crops into as few mosaic images as possible.
+    Uses shelf packing: crops are sorted by height and laid out left to right in rows.
+    Returns a list of (mosaic, cells).
+    """
+    if not crops:
+        return []
+
+    ordered = sorted(crops, key=lambda kc: kc[1].shape[0], reverse=True)
+    total_area = sum((img.shape[0] + gap) * (img.shape[1] + gap) for _, img in ordered)
+    widest = max(img.shape[1] for _, img in ordered) + gap * 2
+    shelf_width = min(max_side, max(widest, int(np.sqrt(total_area) * 1.2)))
+
+    # Lay out cells first, then blit into canvases of the final size
+    layouts = []
+    cells = []
+    cursor_x, cursor_y, shelf_h = gap, gap, 0
+    for key, img in ordered:
+        h, w = img.shape[:2]
+        if cursor_x + w + gap > shelf_width and cursor_x > gap:
+            cursor_x = gap
+            cursor_y += shelf_h + gap
+            shelf_h = 0
+        if cursor_y + h + gap > max_side and cells:
+            layouts.append(cells)
+            cells = []
+            cursor_x, cursor_y, shelf_h = gap, gap, 0
+        cells.append((MosaicCell(key, cursor_x, cursor_y, w, h), img))
+        cursor_x += w + gap
+        shelf_h = max(shelf_h, h)
+    layouts.append(cells)
+
+    mosaics = []
+    for cells in layouts:
+        width = max(c.x + c.w for c, _ in cells) + gap
+        height = max(c.y + c.h for c, _ in cells) + gap
+        canvas = np.full((height, width), background, dtype=np.uint8)
+        for cell, img in cells:
+            canvas[cell.y:cell.y + cell.h, cell.x:cell.x + cell.w] = img
+        mosaics.append((canvas, [c for c, _ in cells]))
+    return mosaics
+
+
+def split_mosaic_data(data, cells):
+    """
+    Distributes OCR word data from a mosaic back to the cells it came from.
+    A word belongs to the cell containing its center. Coordinates are rebased to
+    the cell origin so each result looks like OCR run on that crop alone.
+    Returns {cell.key: data_dict}.
+    """
+    per_cell = {c.key: {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []} for c in cells}
+    texts = data.get('text', [])
+
+    for i in range(len(texts)):
+        text = texts[i]
+        if not str(text).strip():
+            continue
+        left, top = data['left'][i], data['top'][i]
+        width, height = data['width'][i], data['height'][i]
+        cx, cy = left + width / 2, top + height / 2
+
+        cell = next((c for c in cells if c.contains(cx, cy)), None)
+        if cell is None:
+            continue
+
+        rel_left = max(0, left - cell.x)
+        rel_top = max(0, top - cell.y)
+        out = per_cell[cell.key]
+        out['text'].append(text)
+        out['conf'].append(data['conf'][i])
+        out['left'].append(rel_left)
+        out['top'].append(rel_top)
+        out['width'].append(min(width, cell.w - rel_left))
+        out['height'].append(min(height, cell.h - rel_top))
+
+    return per_cell
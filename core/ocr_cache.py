@@ -0,0 +1,131 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.config_manager import config_manager
+from utils.logger import logger
+
+
+def _estimate_size(data):
+    """Rough memory footprint of an OCR data dict in bytes."""
+    size = 256
+    for values in data.values():
+        size += 64 + 8 * len(values)
+        size += sum(len(v) for v in values if isinstance(v, str))
+    return size
+
+
+class OCRResultCache:
+    """
+    LRU cache of OCR word data keyed by a hash of the preprocessed crop, the PSM and the
+    backend's cache_tag.
+    Word boxes are stored relative to the crop, so a hit can be reused wherever the
+    same button appears; the caller re-offsets them to the current position.
+    Bounded by both entry count and estimated memory.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=8 * 1024 * 1024):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(image, psm, tag=""):
+        image = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(memoryview(image).cast('B'), digest_size=16).digest()
+        return (digest, image.shape, psm, tag)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, data):
+        size = _estimate_size(data)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (data, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self._bytes > self.max_bytes and len(self._entries) > 1):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def record(self, hits=0, misses=0, evictions=0):
+        """Adds lookups made in another cache, e.g. an OCR worker process's own, to the counters."""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = None
+_cache_key = None
+_cache_lock = threading.Lock()
+
+
+def get_ocr_cache():
+    """
+    Returns the shared OCR result cache, or None when OCR_CACHE_ENABLED is off.
+    The cache is rebuilt if its size limits change.
+    """
+    global _cache, _cache_key
+    if not config_manager.get("OCR_CACHE_ENABLED", True):
+        return None
+
+    max_entries = config_manager.get("OCR_CACHE_MAX_ENTRIES", 512)
+    max_mb = config_manager.get("OCR_CACHE_MAX_MB", 8)
+    key = (max_entries, max_mb)
+
+    with _cache_lock:
+        if _cache is None or _cache_key != key:
+            _cache = OCRResultCache(max_entries=max_entries, max_bytes=int(max_mb * 1024 * 1024))
+            _cache_key = key
+            logger.debug(f"OCR cache: {max_entries} entries / {max_mb} MB")
+        return _cache
+
+
+def cached_image_to_data(backend, image, psm=3):
+    """Runs backend.image_to_data() through the shared cache. Cached dicts must not be mutated."""
+    cache = get_ocr_cache()
+    if cache is None:
+        return backend.image_to_data(image, psm=psm)
+
+    key = cache.make_key(image, psm, backend.cache_tag)
+    data = cache.get(key)
+    if data is None:
+        data = backend.image_to_data(image, psm=psm)
+        cache.put(key, data)
+    return data
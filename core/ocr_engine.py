@@ -0,0 +1,216 @@
+import os
+import queue
+import threading
+from contextlib import suppress
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from core.config_manager import config_manager
+from core.ocr_vocabulary import get_ocr_vocabulary
+from utils.logger import logger
+
+# tesserocr links libtesseract directly, so a handle stays initialized between calls.
+# It is optional: without it every call goes through the tesseract subprocess.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+
+def tsv_to_dict(tsv):
+    """Parses Tesseract TSV output into the same dict layout as pytesseract's Output.DICT."""
+    result = {}
+    rows = [row.split('\t') for row in tsv.strip().split('\n')]
+    if len(rows) < 2:
+        return result
+
+    header = rows.pop(0)
+    if len(rows[-1]) < len(header):
+        rows[-1].append('')
+
+    text_idx = len(header) - 1
+    for i, head in enumerate(header):
+        column = []
+        for row in rows:
+            if len(row) <= i:
+                continue
+            if i == text_idx:
+                column.append(row[i])
+                continue
+            try:
+                column.append(int(float(row[i])))
+            except ValueError:
+                column.append(row[i])
+        result[head] = column
+    return result
+
+
+class OCRBackend:
+    """
+    Interface for OCR engines used by the scanner.
+    image_to_data() returns a dict with 'text', 'conf', 'left', 'top', 'width', 'height' lists.
+    cache_tag tells apart backends that read the same image differently (see ocr_cache).
+    """
+    name = "base"
+    cache_tag = ""
+
+    def image_to_data(self, image, psm=3):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SubprocessBackend(OCRBackend):
+    """
+    Runs the tesseract executable once per call via pytesseract.
+    An OCRVocabulary restricts recognition to the keywords.
+    """
+    name = "subprocess"
+
+    def __init__(self, vocabulary=None):
+        self.vocabulary = vocabulary
+        self.cache_tag = vocabulary.digest if vocabulary else ""
+
+    def image_to_data(self, image, psm=3):
+        config = f'--psm {psm}'
+        if self.vocabulary:
+            config += f' {self.vocabulary.tesseract_args()}'
+        return pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+
+
+class EnginePoolBackend(OCRBackend):
+    """
+    Keeps initialized Tesseract API handles alive and reuses them across scans.
+    Handles are pooled per page segmentation mode; each PSM gets at most `size`
+    handles so that every scan worker can hold one without waiting.
+    An OCRVocabulary is applied to every handle when it is initialized.
+    A handle that fails on an image is replaced and the image tried once more; only a handle
+    that cannot be started switches the backend to subprocess OCR for good.
+    """
+    name = "tesserocr"
+
+    def __init__(self, size=4, lang="eng", tessdata_path=None, vocabulary=None):
+        self.size = max(1, int(size))
+        self.lang = lang
+        self.tessdata_path = tessdata_path
+        self.vocabulary = vocabulary
+        self.cache_tag = vocabulary.digest if vocabulary else ""
+        self._pools = {}
+        self._created = {}
+        self._lock = threading.Lock()
+        self._fallback = SubprocessBackend(vocabulary)
+        self._failed = False
+
+    def _new_handle(self, psm):
+        kwargs = {"lang": self.lang, "psm": psm}
+        if self.tessdata_path:
+            kwargs["path"] = self.tessdata_path
+        if self.vocabulary:
+            kwargs["variables"] = self.vocabulary.variables()
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _take(self, psm):
+        """
+        The pool of `psm` and a slot from it: a free handle, or None for a handle still to be
+        made. Slots are handed back even when making the handle fails, so waiters always wake.
+        """
+        with self._lock:
+            pool = self._pools.setdefault(psm, queue.LifoQueue())
+            if pool.empty() and self._created.get(psm, 0) < self.size:
+                self._created[psm] = self._created.get(psm, 0) + 1
+                pool.put(None)
+        return pool, pool.get()
+
+    def image_to_data(self, image, psm=3):
+        if self._failed:
+            return self._fallback.image_to_data(image, psm=psm)
+
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+
+        pool, api = self._take(psm)
+        try:
+            for _ in range(2):
+                if api is None:
+                    try:
+                        api = self._new_handle(psm)
+                    except Exception as e:
+                        # tessdata or libtesseract is unusable: no handle will ever start
+                        logger.warning(f"Tesseract engine could not start ({e}). Falling back to subprocess OCR.")
+                        self._failed = True
+                        break
+                try:
+                    api.SetImage(image)
+                    return tsv_to_dict(f"{TSV_HEADER}\n{api.GetTSVText(0) or ''}")
+                except Exception as e:
+                    # The handle may be left in a bad state: the image gets one more try on a new one
+                    logger.debug(f"Tesseract engine failed on an image ({e}). Recreating it.")
+                    with suppress(Exception):
+                        api.End()
+                    api = None
+            else:
+                logger.warning("Tesseract engine failed twice on an image. Reading it with subprocess OCR.")
+        finally:
+            if api is not None:
+                api.Clear()
+            pool.put(api)
+        return self._fallback.image_to_data(image, psm=psm)
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                while not pool.empty():
+                    api = pool.get()
+                    if api is not None:
+                        api.End()
+            self._pools.clear()
+            self._created.clear()
+
+
+def _tessdata_path():
+    """Locates tessdata next to the configured tesseract executable, if present."""
+    tesseract_cmd = config_manager.get("TESSERACT_CMD_PATH", r'C:\Program Files\Tesseract-OCR\tesseract.exe')
+    path = os.path.join(os.path.dirname(tesseract_cmd), "tessdata")
+    return path + os.sep if os.path.isdir(path) else None
+
+
+_backend = None
+_backend_key = None
+_backend_lock = threading.Lock()
+
+
+def get_ocr_backend():
+    """
+    Returns the shared OCR backend selected by OCR_BACKEND ("auto", "tesserocr" or "subprocess").
+    The engine pool holds one engine per OCR worker (OCR_WORKERS, or SCAN_PARALLELISM when that
+    is 0) and is rebuilt if the backend choice, the worker count or the keyword vocabulary
+    (OCR_CONSTRAIN_TO_KEYWORDS) changes.
+    """
+    global _backend, _backend_key
+    choice = str(config_manager.get("OCR_BACKEND", "auto")).lower()
+    # Same worker count the scan's OCR executor runs with, so every worker gets its own engine
+    size = config_manager.get("OCR_WORKERS", 0) or config_manager.get("SCAN_PARALLELISM", 4)
+    vocabulary = get_ocr_vocabulary()
+    key = (choice, size, vocabulary.digest if vocabulary else None)
+
+    with _backend_lock:
+        if _backend is not None and _backend_key == key:
+            return _backend
+
+        if _backend is not None:
+            _backend.close()
+
+        if choice in ("auto", "tesserocr") and tesserocr is not None:
+            _backend = EnginePoolBackend(size=size, tessdata_path=_tessdata_path(), vocabulary=vocabulary)
+        else:
+            if choice == "tesserocr":
+                logger.warning("OCR_BACKEND is 'tesserocr' but tesserocr is not installed. Using subprocess OCR.")
+            _backend = SubprocessBackend(vocabulary)
+        _backend_key = key
+        logger.info(f"OCR backend: {_backend.name}")
+        return _backend
@@ -0,0 +1,149 @@
+import concurrent.futures
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.config_manager import config_manager
+from core.ocr_cache import get_ocr_cache
+from core.ocr_engine import get_ocr_backend
+from core.ocr_vocabulary import VOCABULARY_CONFIG_KEYS
+from core.preprocess import read_crop
+from utils.logger import logger
+
+# Settings worker processes read (engine, vocabulary, preprocessing, cache). Workers hold the
+# values of when they started, so the pool is restarted after any of them changes.
+WORKER_CONFIG_KEYS = ("OCR_BACKEND", "OCR_WORKERS", "SCAN_PARALLELISM", "TESSERACT_CMD_PATH",
+                      "OCR_PREPROCESS_STAGES", "OCR_CACHE_ENABLED", "OCR_CACHE_MAX_ENTRIES",
+                      "OCR_CACHE_MAX_MB") + VOCABULARY_CONFIG_KEYS
+
+# Every worker process keeps its own OCR engine for its whole life
+_worker_backend = None
+# Lookups of the worker's own OCR cache already reported to the parent process
+_reported_lookups = None
+
+
+def _cache_lookups():
+    cache = get_ocr_cache()
+    stats = cache.stats() if cache is not None else {}
+    return {name: stats.get(name, 0) for name in ("hits", "misses", "evictions")}
+
+
+def _init_worker(backend_factory):
+    global _worker_backend, _reported_lookups
+    _worker_backend = backend_factory()
+    # A forked worker starts with a copy of the parent's cache and its counts
+    _reported_lookups = _cache_lookups()
+
+
+def _new_lookups():
+    """This worker's cache lookups since it last reported them."""
+    global _reported_lookups
+    lookups = _cache_lookups()
+    new = {name: count - _reported_lookups[name] for name, count in lookups.items()}
+    _reported_lookups = lookups
+    return new
+
+
+def _read_shared_crop(name, offset, shape, w, h):
+    """Worker side of ProcessOCRExecutor: reads one crop out of the scan's shared block and OCRs it."""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        size = shape[0] * shape[1]
+        crop = np.ndarray(shape, dtype=np.uint8, buffer=block.buf[offset:offset + size]).copy()
+    finally:
+        block.close()
+    data, _ = read_crop(_worker_backend, crop, w, h)
+    return data, _new_lookups()
+
+
+class ProcessOCRExecutor:
+    """
+    OCR of contour crops in long-lived worker processes, so preprocessing and TSV parsing do
+    not contend on the GIL. Every worker builds its own engine once (`backend_factory`, the
+    configured get_ocr_backend by default) and its own OCR cache; the lookups of those caches
+    come back with every crop and are added to the parent's cache counters, so the cache
+    stats cover the workers. The crops of one call are copied into a single shared memory
+    block instead of being pickled.
+    """
+
+    def __init__(self, workers, backend_factory=get_ocr_backend):
+        self.workers = max(1, int(workers))
+        self._pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(backend_factory,))
+
+    def read_crops(self, jobs):
+        """
+        OCRs every (key, gray crop, w, h) job. Yields (key, data) as crops finish; data is None
+        for a crop that failed. Closing the generator early cancels the jobs not started yet.
+        """
+        jobs = [(key, np.ascontiguousarray(crop, dtype=np.uint8), w, h) for key, crop, w, h in jobs]
+        if not jobs:
+            return
+        block = shared_memory.SharedMemory(create=True, size=max(1, sum(crop.nbytes for _, crop, _, _ in jobs)))
+        cache = get_ocr_cache()
+        futures = {}
+        try:
+            offset = 0
+            for key, crop, w, h in jobs:
+                np.ndarray(crop.shape, dtype=np.uint8, buffer=block.buf[offset:offset + crop.nbytes])[:] = crop
+                future = self._pool.submit(_read_shared_crop, block.name, offset, crop.shape, w, h)
+                futures[future] = key
+                offset += crop.nbytes
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    data, lookups = future.result()
+                except Exception as e:
+                    logger.error(f"OCR Failed on region in worker process: {e}")
+                    data, lookups = None, None
+                if lookups and cache is not None:
+                    cache.record(**lookups)
+                yield futures[future], data
+        finally:
+            # When the caller stops early, crops not started yet must not look for the unlinked block
+            for future in futures:
+                future.cancel()
+            block.close()
+            block.unlink()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor = None
+_executor_stale = False
+_executor_lock = threading.Lock()
+
+
+def get_process_executor(workers):
+    """
+    Shared ProcessOCRExecutor with `workers` processes, restarted when the count changes, it
+    broke or one of the WORKER_CONFIG_KEYS changed.
+    """
+    global _executor, _executor_stale
+    with _executor_lock:
+        broken = _executor is not None and getattr(_executor._pool, "_broken", False)
+        if _executor is None or _executor.workers != max(1, int(workers)) or broken or _executor_stale:
+            if _executor is not None:
+                _executor.shutdown()
+            _executor = ProcessOCRExecutor(workers)
+            _executor_stale = False
+            logger.info(f"OCR worker processes: {_executor.workers}")
+        return _executor
+
+
+def invalidate_process_executor(key=None, value=None):
+    global _executor_stale
+    with _executor_lock:
+        _executor_stale = True
+
+
+def shutdown_process_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+config_manager.add_listener(invalidate_process_executor, WORKER_CONFIG_KEYS)
@@ -0,0 +1,134 @@
+import numpy as np
+
+# Tiles are about this many pixels per side before their cuts are moved into blank space
+TILE_SIZE = 1024
+# Pixels each tile reaches past its cuts, so a word crossing a seam is whole in one of the tiles
+TILE_OVERLAP = 48
+# A word within this many pixels of a tile edge that is not a frame edge may have been cut off
+EDGE_MARGIN = 2
+# Share of the smaller box two words from different tiles must overlap to be the same word
+DUPLICATE_OVERLAP = 0.5
+
+WORD_KEYS = ('text', 'conf', 'left', 'top', 'width', 'height')
+
+
+class Tile:
+    """One piece of a tiled frame: the window OCR'd (x, y, w, h) and the part of the frame it owns (core)."""
+
+    def __init__(self, key, x, y, w, h, core):
+        self.key = key
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.core = core
+
+    @property
+    def rect(self):
+        return (self.x, self.y, self.w, self.h)
+
+
+def _cuts(profile, length, tile_size, window):
+    """
+    Cut positions splitting [0, length) into about tile_size long spans. Every cut is moved to
+    the quietest line of `profile` within `window` pixels of its ideal spot, so it runs between
+    text lines (or words) rather than through them.
+    """
+    count = max(1, int(round(length / tile_size)))
+    cuts = [0]
+    for i in range(1, count):
+        ideal = i * length // count
+        lo, hi = max(cuts[-1] + 1, ideal - window), min(length - 1, ideal + window + 1)
+        if lo >= hi:
+            continue
+        segment = profile[lo:hi]
+        # Quietest line, the one closest to the ideal cut on ties
+        quiet = np.flatnonzero(segment == segment.min()) + lo
+        cuts.append(int(quiet[np.argmin(np.abs(quiet - ideal))]))
+    cuts.append(length)
+    return cuts
+
+
+def plan_tiles(gray, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """
+    Splits a grayscale frame into a grid of about tile_size tiles with cuts along blank rows and
+    columns, each tile extended by `overlap` pixels past its inner cuts.
+    Returns [Tile]; a frame no larger than one tile gives a single tile covering it.
+    """
+    height, width = gray.shape[:2]
+    if height <= tile_size and width <= tile_size:
+        return [Tile(0, 0, 0, width, height, (0, 0, width, height))]
+
+    # Text shows up as horizontal intensity changes; blank rows and columns have none
+    edges = np.abs(np.diff(gray.astype(np.int16), axis=1))
+    row_cuts = _cuts(edges.sum(axis=1), height, tile_size, overlap)
+    col_profile = np.zeros(width, dtype=np.int64)
+    col_profile[1:] = edges.sum(axis=0)
+    col_cuts = _cuts(col_profile, width, tile_size, overlap)
+
+    tiles = []
+    for y0, y1 in zip(row_cuts, row_cuts[1:]):
+        for x0, x1 in zip(col_cuts, col_cuts[1:]):
+            tx0, ty0 = max(0, x0 - overlap), max(0, y0 - overlap)
+            tx1, ty1 = min(width, x1 + overlap), min(height, y1 + overlap)
+            tiles.append(Tile(len(tiles), tx0, ty0, tx1 - tx0, ty1 - ty0, (x0, y0, x1 - x0, y1 - y0)))
+    return tiles
+
+
+def merge_tile_data(results, tiles, shape):
+    """
+    Merges per-tile OCR dicts ({tile.key: data}) into one dict in frame coordinates.
+    A word seen by two tiles is kept once: whole words win over ones touching an inner tile
+    edge (possibly cut off), then the higher confidence. Words keep their tile's order.
+    """
+    height, width = shape[:2]
+    words = []
+    for tile in tiles:
+        data = results.get(tile.key) or {}
+        for i, text in enumerate(data.get('text', [])):
+            if not str(text).strip():
+                continue
+            left, top = tile.x + data['left'][i], tile.y + data['top'][i]
+            w, h = data['width'][i], data['height'][i]
+            clipped = ((tile.x > 0 and left - tile.x < EDGE_MARGIN)
+                       or (tile.y > 0 and top - tile.y < EDGE_MARGIN)
+                       or (tile.x + tile.w < width and tile.x + tile.w - (left + w) < EDGE_MARGIN)
+                       or (tile.y + tile.h < height and tile.y + tile.h - (top + h) < EDGE_MARGIN))
+            words.append((tile.key, text, data['conf'][i], left, top, w, h, clipped))
+
+    merged = {key: [] for key in WORD_KEYS}
+    if not words:
+        return merged
+
+    # Only words inside the window of another tile as well can have been read twice
+    boxes = np.array([w[3:7] for w in words], dtype=np.float64)
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    windows = np.array([tile.rect for tile in tiles], dtype=np.float64)
+    wx0, wy0 = windows[:, 0], windows[:, 1]
+    wx1, wy1 = wx0 + windows[:, 2], wy0 + windows[:, 3]
+    seen_by = ((x0[:, None] < wx1) & (x1[:, None] > wx0) & (y0[:, None] < wy1) & (y1[:, None] > wy0)).sum(axis=1)
+    seam = np.flatnonzero(seen_by > 1).tolist()
+    dropped = set()
+    if seam:
+        x0, y0, x1, y1 = x0[seam], y0[seam], x1[seam], y1[seam]
+        inter = (np.clip(np.minimum(x1[:, None], x1) - np.maximum(x0[:, None], x0), 0, None)
+                 * np.clip(np.minimum(y1[:, None], y1) - np.maximum(y0[:, None], y0), 0, None))
+        area = np.maximum((x1 - x0) * (y1 - y0), 1)
+        keys = np.array([words[n][0] for n in seam])
+        same_word = (inter >= DUPLICATE_OVERLAP * np.minimum(area[:, None], area)) & (keys[:, None] != keys)
+
+        order = sorted(range(len(seam)), key=lambda i: (words[seam[i]][7], -float(words[seam[i]][2])))
+        kept = np.zeros(len(seam), dtype=bool)
+        for i in order:
+            if (same_word[i] & kept).any():
+                dropped.add(seam[i])
+            else:
+                kept[i] = True
+
+    for n, (_, text, conf, left, top, w, h, _) in enumerate(words):
+        if n in dropped:
+            continue
+        for key, value in zip(WORD_KEYS, (text, conf, left, top, w, h)):
+            merged[key].append(value)
+    return merged
@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+
+from core.config_manager import config_manager
+from utils.logger import logger
+
+# Settings the vocabulary is built from
+VOCABULARY_CONFIG_KEYS = ("CLICK_KEYWORDS", "TYPE_KEYWORDS", "ANCHOR_KEYWORDS", "OCR_CONSTRAIN_TO_KEYWORDS")
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "autoclicker_ocr")
+
+
+def _case_variants(word):
+    return {word, word.lower(), word.upper(), word.capitalize()}
+
+
+def _short_path(path):
+    """On Windows, the 8.3 form of an existing path, which has no spaces; other paths as they are."""
+    if os.name != "nt" or not any(c.isspace() for c in path):
+        return path
+    import ctypes
+    buffer = ctypes.create_unicode_buffer(260)
+    if ctypes.windll.kernel32.GetShortPathNameW(path, buffer, len(buffer)):
+        return buffer.value
+    return path
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class OCRVocabulary:
+    """
+    The closed set of words a scan looks for, as Tesseract settings: a character whitelist and
+    a user-words file. Keywords match case-insensitively, so every case of their letters is
+    allowed and every word is listed as written, lowercase, uppercase and capitalized.
+    The tesseract command line gets both through a config file, so no argument needs quoting:
+    pytesseract splits its config string without POSIX quote handling on Windows.
+    """
+
+    def __init__(self, keywords, directory=None):
+        words = set()
+        for keyword in keywords:
+            for word in str(keyword).split():
+                words |= _case_variants(word)
+        self.words = sorted(words)
+        self.whitelist = "".join(sorted({c for word in self.words for c in word}))
+        self.digest = hashlib.sha1("\n".join(self.words).encode("utf-8")).hexdigest()[:12]
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.user_words_path = os.path.join(self.directory, f"user-words-{self.digest}.txt")
+        self.config_path = os.path.join(self.directory, f"vocabulary-{self.digest}.cfg")
+
+    def write(self):
+        """
+        Writes the user-words and config files if they are missing and removes the ones of
+        older vocabularies. Returns the user-words path.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(self.user_words_path):
+            _write_atomic(self.user_words_path, "\n".join(self.words) + "\n")
+        if not os.path.exists(self.config_path):
+            # Values run to the end of the line, so paths with spaces are fine in here
+            _write_atomic(self.config_path, "".join(f"{name} {value}\n" for name, value in self.variables().items()))
+        current = {self.user_words_path, self.config_path}
+        for pattern in ("user-words-*.txt", "vocabulary-*.cfg"):
+            for path in glob.glob(os.path.join(self.directory, pattern)):
+                if path not in current:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass  # Still open in another instance
+        return self.user_words_path
+
+    def variables(self):
+        """Tesseract variables for an engine handle; user_words_file only takes effect at init."""
+        return {"tessedit_char_whitelist": self.whitelist, "user_words_file": self.user_words_path}
+
+    def tesseract_args(self):
+        """
+        The same settings for the tesseract command line: the written config file, a single
+        argument. Raises ValueError if its path has whitespace, which no split would keep whole.
+        """
+        path = _short_path(self.config_path)
+        if any(c.isspace() for c in path):
+            raise ValueError(f"OCR vocabulary path contains whitespace: {path}")
+        return path
+
+
+_vocabulary = None
+_vocabulary_built = False
+_vocabulary_lock = threading.Lock()
+
+
+def get_ocr_vocabulary():
+    """
+    Returns the OCRVocabulary of CLICK_KEYWORDS, TYPE_KEYWORDS and ANCHOR_KEYWORDS when
+    OCR_CONSTRAIN_TO_KEYWORDS is on, else None. It is rebuilt after any of them changes.
+    """
+    global _vocabulary, _vocabulary_built
+    with _vocabulary_lock:
+        if not _vocabulary_built:
+            _vocabulary = None
+            if config_manager.get("OCR_CONSTRAIN_TO_KEYWORDS", False):
+                keywords = []
+                for key in ("CLICK_KEYWORDS", "TYPE_KEYWORDS", "ANCHOR_KEYWORDS"):
+                    keywords.extend(config_manager.get(key, []) or [])
+                vocabulary = OCRVocabulary(keywords)
+                if vocabulary.words:
+                    try:
+                        vocabulary.write()
+                        vocabulary.tesseract_args()
+                        _vocabulary = vocabulary
+                        logger.info(f"OCR constrained to {len(vocabulary.words)} keyword form(s): "
+                                    f"whitelist '{vocabulary.whitelist}'")
+                    except (OSError, ValueError) as e:
+                        logger.error(f"Could not set up the OCR vocabulary files: {e}")
+            _vocabulary_built = True
+        return _vocabulary
+
+
+def invalidate_ocr_vocabulary(key=None, value=None):
+    global _vocabulary_built
+    with _vocabulary_lock:
+        _vocabulary_built = False
+
+
+config_manager.add_listener(invalidate_ocr_vocabulary, VOCABULARY_CONFIG_KEYS)
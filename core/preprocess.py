@@ -0,0 +1,276 @@
+import json
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from core.config_manager import config_manager
+from core.ocr_cache import cached_image_to_data
+from utils.logger import logger
+
+DEFAULT_STAGES = ["clahe", "binarize", "upscale", "median"]
+
+# Tesseract reads best at an x-height of roughly 20-30 px; smaller text loses characters,
+# larger text only costs time
+X_HEIGHT_RANGE = (20, 30)
+MIN_GLYPH_HEIGHT = 3
+
+
+def scaled_shape(shape, scale):
+    """Height and width of an image of `shape` enlarged by `scale`."""
+    if scale == 1:
+        return tuple(shape[:2])
+    return (max(1, int(round(shape[0] * scale))), max(1, int(round(shape[1] * scale))))
+
+
+class Stage:
+    """
+    One step of the crop preprocessing. scale_for() tells how much the step enlarges `img`;
+    apply() then gets that scale and `out`, an array of the scaled shape the step may write
+    into instead of allocating, or None when the result must be a new array.
+    """
+
+    def scale_for(self, img):
+        return 1.0
+
+    def apply(self, img, out, scale):
+        raise NotImplementedError
+
+
+class Clahe(Stage):
+    """Contrast-limited adaptive histogram equalization; each thread keeps its own CLAHE object."""
+
+    def __init__(self, clip_limit=2.0, tile_grid=8):
+        self.clip_limit = float(clip_limit)
+        self.tile_grid = int(tile_grid)
+        self._local = threading.local()
+
+    def _clahe(self):
+        clahe = getattr(self._local, "clahe", None)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=self.clip_limit, tileGridSize=(self.tile_grid, self.tile_grid))
+            self._local.clahe = clahe
+        return clahe
+
+    def apply(self, img, out, scale):
+        return self._clahe().apply(img, dst=out)
+
+
+class Binarize(Stage):
+    """
+    Otsu threshold to black and white. The polarity is picked from the mean brightness first,
+    so only one threshold runs: bright crops keep their polarity, dark ones are inverted.
+    """
+
+    def apply(self, img, out, scale):
+        mode = cv2.THRESH_BINARY if cv2.mean(img)[0] > 127 else cv2.THRESH_BINARY_INV
+        _, thresh = cv2.threshold(img, 0, 255, mode + cv2.THRESH_OTSU, dst=out)
+        return thresh
+
+
+def estimate_x_height(binary):
+    """
+    Estimated x-height of the text in a binarized crop (text is black after Binarize), or None
+    when it holds no text-like ink. Each run of inked columns counts as one glyph; most letters
+    are x-height tall, so the lower quartile of their heights skips capitals, ascenders and
+    touching letters. Rows that are almost all ink and runs spanning nearly the whole crop
+    height are borders or underlines, never glyphs: the crop is padded around its text.
+    """
+    ink = binary < 128
+    rows, cols = ink.shape
+    ink[np.count_nonzero(ink, axis=1) > 0.8 * cols] = False
+    inked = ink.any(axis=0)
+    if not inked.any():
+        return None
+    # First and last inked row of every column, then of every run of inked columns
+    top = np.where(inked, ink.argmax(axis=0), rows)
+    bottom = np.where(inked, rows - 1 - ink[::-1].argmax(axis=0), -1)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], inked.view(np.int8), [0]))))
+    starts = edges[::2]
+    heights = np.maximum.reduceat(bottom, starts) - np.minimum.reduceat(top, starts) + 1
+    border = min(0.9 * rows, rows - 2)
+    heights = heights[(heights >= MIN_GLYPH_HEIGHT) & (heights < border)]
+    if not heights.size:
+        return None
+    quartile = (heights.size - 1) // 4
+    return float(np.partition(heights, quartile)[quartile])
+
+
+class Upscale(Stage):
+    """
+    Enlarges the crop; Tesseract reads small UI text far better this way. With factor "auto"
+    the factor is picked per crop so that its x-height lands in `x_height`, in multiples of
+    `step` between min_factor and max_factor; `fallback` is used when no text is found. Whole
+    factors resize fastest. The estimate expects the binarized crop, so "upscale" belongs
+    after "binarize".
+    """
+
+    INTERPOLATIONS = {"cubic": "INTER_CUBIC", "linear": "INTER_LINEAR", "nearest": "INTER_NEAREST"}
+
+    def __init__(self, factor="auto", interpolation="cubic", x_height=X_HEIGHT_RANGE,
+                 step=1.0, min_factor=1.0, max_factor=4.0, fallback=3.0):
+        self.factor = factor if factor == "auto" else float(factor)
+        self.interpolation = self.INTERPOLATIONS[interpolation]
+        self.x_height = tuple(float(v) for v in x_height)
+        self.step = float(step)
+        self.min_factor = float(min_factor)
+        self.max_factor = float(max_factor)
+        self.fallback = float(fallback)
+
+    def scale_for(self, img):
+        if self.factor != "auto":
+            return self.factor
+        height = estimate_x_height(img)
+        if height is None:
+            return self.fallback
+        low, high = self.x_height
+        if height < low:
+            factor = math.ceil(low / height / self.step) * self.step
+        elif height > high:
+            factor = math.floor(high / height / self.step) * self.step
+        else:
+            factor = 1.0
+        return min(self.max_factor, max(self.min_factor, factor))
+
+    def apply(self, img, out, scale):
+        height, width = scaled_shape(img.shape, scale)
+        return cv2.resize(img, (width, height), dst=out, interpolation=getattr(cv2, self.interpolation))
+
+
+class MedianBlur(Stage):
+    """Removes the specks thresholding leaves behind."""
+
+    def __init__(self, ksize=3):
+        self.ksize = int(ksize)
+
+    def apply(self, img, out, scale):
+        return cv2.medianBlur(img, self.ksize, dst=out)
+
+
+STAGES = {"clahe": Clahe, "binarize": Binarize, "upscale": Upscale, "median": MedianBlur}
+
+
+def parse_stages(specs):
+    """
+    Builds stages from OCR_PREPROCESS_STAGES entries: a stage name, or a dict with the name
+    under "stage" and its parameters. Unknown or malformed stages are skipped with a warning.
+    """
+    stages = []
+    for spec in specs:
+        try:
+            if isinstance(spec, str):
+                name, params = spec, {}
+            else:
+                params = dict(spec)
+                name = params.pop("stage")
+            stages.append(STAGES[name.lower()](**params))
+        except Exception as e:
+            logger.warning(f"Skipping preprocessing stage {spec!r}: {e}")
+    return stages
+
+
+class PreprocessPipeline:
+    """
+    Runs a crop through its stages in order and returns the result with the factor it was
+    enlarged by. With reuse=True every stage writes into a scratch buffer kept per thread and
+    stage, so a scan allocates nothing per contour; the result is then only valid until the
+    same thread runs the pipeline again.
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self._local = threading.local()
+
+    def _scratch(self, index, shape):
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = [np.empty(0, dtype=np.uint8) for _ in self.stages]
+        size = shape[0] * shape[1]
+        if buffers[index].size < size:
+            # Grow with headroom so slightly larger crops do not reallocate again
+            buffers[index] = np.empty(size + size // 2, dtype=np.uint8)
+        return buffers[index][:size].reshape(shape)
+
+    def run(self, gray, reuse=False):
+        img = gray
+        total = 1.0
+        for index, stage in enumerate(self.stages):
+            scale = stage.scale_for(img)
+            out = self._scratch(index, scaled_shape(img.shape, scale)) if reuse else None
+            img = stage.apply(img, out, scale)
+            total *= scale
+        return img, total
+
+
+_pipeline = None
+_pipeline_key = None
+_pipeline_lock = threading.Lock()
+
+
+def get_preprocess_pipeline():
+    """Returns the pipeline built from OCR_PREPROCESS_STAGES; it is only rebuilt when they change."""
+    global _pipeline, _pipeline_key
+    specs = config_manager.get("OCR_PREPROCESS_STAGES", DEFAULT_STAGES)
+    try:
+        key = json.dumps(specs, sort_keys=True)
+    except (TypeError, ValueError):
+        key = repr(specs)
+
+    with _pipeline_lock:
+        if _pipeline is None or _pipeline_key != key:
+            _pipeline = PreprocessPipeline(parse_stages(specs))
+            _pipeline_key = key
+            logger.debug(f"Preprocessing pipeline: {[type(s).__name__ for s in _pipeline.stages]}")
+        return _pipeline
+
+
+def preprocess_crop(gray, reuse=False):
+    """
+    Turns a grayscale crop into an upscaled, binarized image ready for OCR.
+    Returns (image, scale); see PreprocessPipeline.run.
+    """
+    return get_preprocess_pipeline().run(gray, reuse=reuse)
+
+
+def unscale_data(data, scale):
+    """Maps the word boxes of an OCR result on a preprocessed crop back to crop pixels."""
+    if not data or scale == 1:
+        return data
+    mapped = dict(data)
+    for key in ("left", "top", "width", "height"):
+        if key in data:
+            mapped[key] = [int(v / scale) for v in data[key]]
+    return mapped
+
+
+def psm_for_box(w, h):
+    """Smarter PSM Selection based on aspect ratio."""
+    aspect_ratio = w / h
+    if aspect_ratio >= 3.0:
+        return 7 # Single line
+    elif aspect_ratio >= 1.0:
+        return 8 # Single word
+    return 10 # Single char/symbol
+
+
+def joined_text(data):
+    """Joins all recognized words of an OCR result into one string."""
+    if not data:
+        return ""
+    return " ".join([t.strip() for t in data['text'] if t.strip()]).replace("|", "").strip()
+
+
+def read_crop(backend, crop, w, h):
+    """
+    OCRs the padded gray crop of a w x h contour: preprocesses it, reads it with the PSM that fits
+    the box and retries square-ish boxes as a single character. Returns (data, preprocessed image)
+    with the word boxes in crop pixels; the image lives in this thread's scratch buffers until
+    its next read_crop.
+    """
+    upscaled, scale = preprocess_crop(crop, reuse=True)
+    data = cached_image_to_data(backend, upscaled, psm=psm_for_box(w, h))
+    if not joined_text(data) and w / h >= 1.0:
+        # Fallback to single char if it was a square-ish thing that failed
+        data = cached_image_to_data(backend, upscaled, psm=10)
+    return unscale_data(data, scale), upscaled
@@ -0,0 +1,100 @@
+# Segments whose vertical centers fall in the same or adjacent bands of this height share a line
+LINE_HEIGHT = 15
+CELL_WIDTH = 64
+
+
+def horizontal_distance(anchor, box, direction="BOTH"):
+    """
+    Gap in pixels between the (x, y, w, h) `anchor` and `box` on the side(s) allowed by
+    `direction` ("LEFT", "RIGHT" or "BOTH"), or None if `box` is not on such a side.
+    With BOTH, a box straddling the anchor's center is at distance 0; a box that starts
+    right of the center but overlaps the anchor gets a negative gap.
+    """
+    ax, _, aw, _ = anchor
+    tx, _, tw, _ = box
+    center = ax + aw / 2
+    is_right = tx > center
+    is_left = (tx + tw) < center
+    if direction == "LEFT":
+        return ax - (tx + tw) if is_left else None
+    if direction == "RIGHT":
+        return tx - (ax + aw) if is_right else None
+    if is_right:
+        return tx - (ax + aw)
+    if is_left:
+        return ax - (tx + tw)
+    return 0
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the boxes of one frame's segments, for "what is on this line near that
+    box" queries. Rows are LINE_HEIGHT bands of the box centers, columns CELL_WIDTH strips that
+    every box is entered in for its whole width. `items` are (text, box, conf) segments unless
+    `key` says where their (x, y, w, h) box is.
+    """
+
+    def __init__(self, items, key=None, line_height=LINE_HEIGHT, cell_width=CELL_WIDTH):
+        self.items = list(items)
+        self.line_height = line_height
+        self.cell_width = cell_width
+        self._boxes = [key(item) if key else item[1] for item in self.items]
+        self._cells = {}
+        for i, (x, y, w, h) in enumerate(self._boxes):
+            row = self._row(y, h)
+            for col in range(self._col(x), self._col(x + w) + 1):
+                self._cells.setdefault((row, col), []).append(i)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _row(self, y, h):
+        return int((y + h / 2) // self.line_height)
+
+    def _col(self, x):
+        return int(x // self.cell_width)
+
+    def within(self, anchor, max_distance, direction="BOTH"):
+        """
+        (distance, item) for every item on the anchor's line whose horizontal_distance() is in
+        [0, max_distance), in insertion order. Items at the anchor's own position are skipped.
+        """
+        if max_distance <= 0:
+            return []
+        ax, ay, aw, ah = anchor
+        if direction == "LEFT":
+            x0, x1 = ax - max_distance, ax + aw / 2
+        elif direction == "RIGHT":
+            x0, x1 = ax + aw / 2, ax + aw + max_distance
+        else:
+            x0, x1 = ax - max_distance, ax + aw + max_distance
+
+        row = self._row(ay, ah)
+        candidates = set()
+        for r in (row - 1, row, row + 1):
+            for col in range(self._col(x0), self._col(x1) + 1):
+                candidates.update(self._cells.get((r, col), ()))
+
+        center_y = ay + ah / 2
+        found = []
+        for i in sorted(candidates):
+            tx, ty, tw, th = box = self._boxes[i]
+            if tx == ax and ty == ay:
+                continue
+            if abs(center_y - (ty + th / 2)) > ah + th:
+                continue
+            dist = horizontal_distance(anchor, box, direction)
+            if dist is not None and 0 <= dist < max_distance:
+                found.append((dist, self.items[i]))
+        return found
+
+    def nearest(self, anchor, k=1, max_distance=None, direction="BOTH"):
+        """The `k` (distance, item) of within() closest to the anchor, closest first; any distance if None."""
+        if max_distance is None:
+            xs = [anchor[0], anchor[0] + anchor[2]]
+            for x, _, w, _ in self._boxes:
+                xs += (x, x + w)
+            max_distance = max(xs) - min(xs) + 1
+        found = self.within(anchor, max_distance, direction)
+        found.sort(key=lambda hit: hit[0])
+        return found[:k]
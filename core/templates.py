@@ -0,0 +1,320 @@
+import concurrent.futures
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from core.config_manager import config_manager
+from utils.logger import logger
+
+# Matching runs on the half-resolution Gaussian pyramid level first when the template stays
+# at least MIN_PYRAMID_SIDE pixels there
+MIN_PYRAMID_SIDE = 8
+# Coarse scores of a true match drop when it is not aligned to the haystack's pixel pairs
+# (down to ~0.7 for an exact match of fine text), so candidates get this much slack
+COARSE_MARGIN = 0.3
+# Full-resolution pixels searched around each coarse candidate when confirming it
+CONFIRM_PAD = 3
+# With more candidates than this, one full-resolution pass is cheaper than confirming them one by one
+MAX_CONFIRMATIONS = 512
+
+
+def _downscale(gray):
+    # pyrDown blurs before decimating, which keeps coarse scores far less sensitive to the
+    # half-pixel phase of a match than area averaging
+    return cv2.pyrDown(gray)
+
+
+class Template:
+    """A template image, loaded once: grayscale plus its coarse pyramid level (None if too small)."""
+
+    def __init__(self, path, gray, mtime=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.gray = gray
+        self.mtime = mtime
+        self.height, self.width = gray.shape[:2]
+        if min(self.height, self.width) // 2 >= MIN_PYRAMID_SIDE:
+            self.small = _downscale(gray)
+        else:
+            self.small = None
+
+
+class SearchImage:
+    """Grayscale haystack with its coarse pyramid level computed on first use and shared by all templates."""
+
+    def __init__(self, gray):
+        self.gray = gray
+        self._small = None
+        self._lock = threading.Lock()
+
+    @property
+    def small(self):
+        if self._small is None:
+            with self._lock:
+                if self._small is None:
+                    self._small = _downscale(self.gray)
+        return self._small
+
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def get_template(path):
+    """
+    Template loaded from the absolute `path`, or None if it is missing or unreadable.
+    Templates are cached and only read again when the file's mtime changes.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        with _templates_lock:
+            _templates.pop(path, None)
+        return None
+    template = _templates.get(path)
+    if template is not None and template.mtime == mtime:
+        return template
+
+    gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        logger.warning(f"Could not read template: {path}")
+        return None
+    template = Template(path, gray, mtime)
+    with _templates_lock:
+        _templates[path] = template
+    logger.debug(f"Loaded template {path} ({template.width}x{template.height})")
+    return template
+
+
+def clear_template_cache():
+    with _templates_lock:
+        _templates.clear()
+
+
+def non_max_suppression(xs, ys, scores, width, height):
+    """
+    Indices of the hits to keep, best score first: a hit is dropped when a better one lies
+    within one template size of it (|dx| < width and |dy| < height).
+    """
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    xs, ys = np.asarray(xs)[order], np.asarray(ys)[order]
+    alive = np.ones(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if not alive[i]:
+            continue
+        keep.append(order[i])
+        # Everything after i scores lower; drop the ones that overlap it
+        rest = slice(i + 1, None)
+        alive[rest] &= (np.abs(xs[rest] - xs[i]) >= width) | (np.abs(ys[rest] - ys[i]) >= height)
+    return keep
+
+
+# Above this many scores over the threshold, they are first thinned to local maxima with one dilate
+MAX_RAW_PEAKS = 64
+
+
+def _peaks(res, threshold, width, height):
+    """(x, y, score) of the non-max-suppressed scores of `res` at or above `threshold`."""
+    above = res >= threshold
+    ys, xs = np.nonzero(above)
+    if len(xs) > MAX_RAW_PEAKS:
+        # A score survives NMS only if it is the maximum of its (2w-1) x (2h-1) neighbourhood
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2 * width - 1, 2 * height - 1))
+        ys, xs = np.nonzero(above & (res >= cv2.dilate(res, kernel)))
+    if len(xs) == 0:
+        return []
+    scores = res[ys, xs]
+    if len(xs) > MAX_RAW_PEAKS:
+        # Plateaus (flat templates on flat backgrounds) tie everywhere: keep the best of each
+        # template-sized cell, since all others in a cell are within NMS distance of it
+        order = np.argsort(-scores, kind='stable')
+        cells = (ys[order] // height) * (res.shape[1] // width + 1) + xs[order] // width
+        _, first = np.unique(cells, return_index=True)
+        ys, xs, scores = ys[order[first]], xs[order[first]], scores[order[first]]
+    return [(int(xs[i]), int(ys[i]), float(scores[i])) for i in non_max_suppression(xs, ys, scores, width, height)]
+
+
+def match_template(haystack, template, threshold):
+    """
+    Hits (x, y, score) of `template` in `haystack` (a SearchImage or gray array) with a
+    TM_CCOEFF_NORMED score of at least `threshold`, one per object.
+    Large enough templates are located on the coarse pyramid level and confirmed at full resolution.
+    """
+    if not isinstance(haystack, SearchImage):
+        haystack = SearchImage(haystack)
+    gray = haystack.gray
+    h, w = gray.shape[:2]
+    if h < template.height or w < template.width:
+        return []
+
+    small = haystack.small if template.small is not None else None
+    if small is None or small.shape[0] < template.small.shape[0] or small.shape[1] < template.small.shape[1]:
+        res = cv2.matchTemplate(gray, template.gray, cv2.TM_CCOEFF_NORMED)
+        return _peaks(res, threshold, template.width, template.height)
+
+    # Coarse candidates only suppress their close neighbours: a wrong candidate that outscores
+    # the true one nearby must not hide it before the full-resolution check
+    coarse = cv2.matchTemplate(small, template.small, cv2.TM_CCOEFF_NORMED)
+    ts_h, ts_w = template.small.shape[:2]
+    candidates = _peaks(coarse, threshold - COARSE_MARGIN, max(1, ts_w // 2), max(1, ts_h // 2))
+    if len(candidates) > MAX_CONFIRMATIONS:
+        res = cv2.matchTemplate(gray, template.gray, cv2.TM_CCOEFF_NORMED)
+        return _peaks(res, threshold, template.width, template.height)
+
+    hits = []
+    for cx, cy, _ in candidates:
+        fx, fy = cx * 2, cy * 2
+        x0, y0 = max(0, fx - CONFIRM_PAD), max(0, fy - CONFIRM_PAD)
+        x1 = min(w, fx + template.width + CONFIRM_PAD)
+        y1 = min(h, fy + template.height + CONFIRM_PAD)
+        if x1 - x0 < template.width or y1 - y0 < template.height:
+            continue
+        res = cv2.matchTemplate(gray[y0:y1, x0:x1], template.gray, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (bx, by) = cv2.minMaxLoc(res)
+        if score >= threshold:
+            hits.append((x0 + bx, y0 + by, float(score)))
+    if len(hits) < 2:
+        return hits
+    xs, ys, scores = zip(*hits)
+    return [hits[i] for i in non_max_suppression(xs, ys, scores, template.width, template.height)]
+
+
+class _Remembered:
+    """Where a template was found in one search area, and how many cycles ago the last full search ran."""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.cycles = 0
+
+
+class LocationMemory:
+    """
+    Remembers where each template was last found and searches small windows around those
+    spots first. The whole haystack is searched when nothing is remembered, when any remembered
+    hit is not found again, and every `full_search_every` cycles (new instances elsewhere are
+    only picked up then).
+    """
+
+    def __init__(self, margin=16, full_search_every=10, max_entries=64):
+        self.margin = margin
+        self.full_search_every = full_search_every
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._full_seconds = {}
+        self._lock = threading.Lock()
+        self.roi_hits = 0
+        self.roi_misses = 0
+        self.full_searches = 0
+        self.time_saved = 0.0
+
+    def match(self, key, haystack, template, threshold):
+        """match_template() for the search area `key` (e.g. region and template path), using the memory."""
+        if not isinstance(haystack, SearchImage):
+            haystack = SearchImage(haystack)
+        with self._lock:
+            entry = self._entries.get(key)
+            due = entry is None or not entry.hits or entry.cycles + 1 >= self.full_search_every
+
+        if not due:
+            start = time.perf_counter()
+            hits = self._match_windows(haystack.gray, template, threshold, entry.hits)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if hits is not None:
+                    entry.hits = hits
+                    entry.cycles += 1
+                    self.roi_hits += 1
+                    self.time_saved += max(0.0, self._full_seconds.get(key, 0.0) - elapsed)
+                    return hits
+                self.roi_misses += 1
+
+        start = time.perf_counter()
+        hits = match_template(haystack, template, threshold)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            previous = self._full_seconds.get(key)
+            self._full_seconds[key] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            self.full_searches += 1
+            self._entries.pop(key, None)
+            self._entries[key] = _Remembered(hits)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._full_seconds.pop(old_key, None)
+        return hits
+
+    def _match_windows(self, gray, template, threshold, remembered):
+        """Hits near every remembered spot, or None as soon as one of them is gone."""
+        h, w = gray.shape[:2]
+        m = self.margin
+        hits = []
+        for x, y, _ in remembered:
+            x0, y0 = max(0, x - m), max(0, y - m)
+            x1, y1 = min(w, x + template.width + m), min(h, y + template.height + m)
+            found = match_template(gray[y0:y1, x0:x1], template, threshold)
+            if not found:
+                return None
+            bx, by, score = max(found, key=lambda hit: hit[2])
+            hits.append((x0 + bx, y0 + by, score))
+        if len(hits) > 1:
+            xs, ys, scores = zip(*hits)
+            hits = [hits[i] for i in non_max_suppression(xs, ys, scores, template.width, template.height)]
+        return hits
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._full_seconds.clear()
+
+    def stats(self):
+        with self._lock:
+            searches = self.roi_hits + self.roi_misses + self.full_searches
+            return {
+                "roi_hits": self.roi_hits,
+                "roi_misses": self.roi_misses,
+                "full_searches": self.full_searches,
+                "hit_rate": self.roi_hits / searches if searches else 0.0,
+                "time_saved_ms": self.time_saved * 1000,
+            }
+
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Shared worker pool for matching several templates at once (OpenCV releases the GIL)."""
+    global _pool, _pool_workers
+    workers = max(1, int(config_manager.get("SCAN_PARALLELISM", 4)))
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="templates")
+            _pool_workers = workers
+        return _pool
+
+
+def match_templates(jobs, memory=None):
+    """
+    Runs match_template for every (haystack, template, threshold[, memory key]) job, in parallel
+    when there are several. Jobs with a key go through `memory` (a LocationMemory).
+    Returns the hit lists in job order; a failing job yields no hits.
+    """
+    def run(job):
+        try:
+            if memory is not None and len(job) > 3 and job[3] is not None:
+                return memory.match(job[3], *job[:3])
+            return match_template(*job[:3])
+        except Exception as e:
+            logger.error(f"Template matching failed for {job[1].path}: {e}")
+            return []
+
+    if len(jobs) < 2:
+        return [run(job) for job in jobs]
+    return list(_get_pool().map(run, jobs))
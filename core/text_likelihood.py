@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+# Crops flatter than this hold nothing to read
+MIN_CONTRAST = 8
+# Keywords this short, or without letters and digits, are a glyph or two: they cross too few
+# strokes per row to score like a word ("OK" or "El" land near 0.4, "-" near 0.1), so contours
+# that may show one are held to lower bars
+SHORT_KEYWORD_LENGTH = 2
+SHORT_KEYWORD_THRESHOLD = 0.3
+SYMBOL_KEYWORD_THRESHOLD = 0.05
+
+
+def _order_statistic(values, q):
+    """The value at quantile q of a small array, without np.percentile's overhead."""
+    k = int(q * (values.size - 1))
+    return float(np.partition(values, k)[k])
+
+
+def text_likelihood(gray):
+    """
+    Cheap 0-1 estimate of how likely a padded contour crop holds text, so icons, avatars and
+    empty panels can skip OCR. The crop is split into ink and background with Otsu, ink being
+    the minority class, and only rows holding ink are looked at, so large panels with a line
+    of text still count. Three cues are weighed:
+
+    - strokes crossed per row: a line of text crosses many, an icon a few (half the score)
+    - stroke width relative to the inked height: glyph strokes are thin, shapes are solid
+    - fill: text leaves most of its band empty
+    """
+    if gray.size == 0:
+        return 0.0
+    lo, hi, _, _ = cv2.minMaxLoc(gray)
+    if hi - lo < MIN_CONTRAST:
+        return 0.0
+
+    threshold, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    ink = gray > threshold
+    if np.count_nonzero(ink) * 2 > ink.size:
+        ink = ~ink
+    band = ink[ink.any(axis=1)]
+    if band.size == 0:
+        return 0.0
+
+    edges = np.diff(band.view(np.int8), axis=1, prepend=0, append=0)
+    crossings = np.count_nonzero(edges == 1, axis=1)
+    flat = edges.ravel()
+    runs = np.flatnonzero(flat == -1) - np.flatnonzero(flat == 1)
+    stroke = _order_statistic(runs, 0.5) / band.shape[0]
+    fill = np.count_nonzero(band) / band.size
+
+    crossing_cue = np.clip((_order_statistic(crossings, 0.75) - 1) / 4, 0, 1)
+    stroke_cue = np.clip(1 - (stroke - 0.1) / 0.3, 0, 1)
+    fill_cue = np.clip(1 - (fill - 0.25) / 0.3, 0, 1)
+    return float(0.5 * crossing_cue + 0.25 * stroke_cue + 0.25 * fill_cue)
+
+
+def keyword_threshold(keywords, threshold):
+    """
+    The text_likelihood a contour that may show one of `keywords` must reach to be read:
+    `threshold` for words, at most SHORT_KEYWORD_THRESHOLD if a short keyword is possible and
+    SYMBOL_KEYWORD_THRESHOLD if a symbol is, which still skips flat and solid crops.
+    """
+    for keyword in keywords:
+        word = "".join(str(keyword).split())
+        if not any(c.isalnum() for c in word):
+            threshold = min(threshold, SYMBOL_KEYWORD_THRESHOLD)
+        elif len(word) <= SHORT_KEYWORD_LENGTH:
+            threshold = min(threshold, SHORT_KEYWORD_THRESHOLD)
+    return threshold
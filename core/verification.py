@@ -23,11 +23,13 @@ def verify_action(expected_keyword, original_box, timeout=1.0):
     
     while time.time() - start_time < timeout:
         try:
-            # Targeted scan only in the sub-region where the button was
+            # Targeted scan only in the sub-region where the button was.
+            # OCR stops as soon as the button is seen at its original spot.
             matches = scan_for_keywords(
                 config_manager.get("CLICK_KEYWORDS", []), 
                 config_manager.get("TYPE_KEYWORDS", []),
-                override_region=target_region
+                override_region=target_region,
+                first_match=lambda m: m['keyword'] == expected_keyword and boxes_overlap(original_box, m['box'])
             )
             
             # Check for overlap with original_box in the new matches
@@ -16,7 +16,7 @@ def dump_all_segments():
     
     region = get_target_region()
     screenshot = capture_screen(region=region)
-    data = pytesseract.image_to_data(screenshot, output_type=pytesseract.Output.DICT)
+    data = pytesseract.image_to_data(screenshot.rgb, output_type=pytesseract.Output.DICT)
     
     all_segments = []
     for i in range(len(data['text'])):
@@ -1,6 +1,7 @@
 import customtkinter as ctk
 import tkinter as tk
 import threading
+import multiprocessing
 import logging
 import time
 import pyautogui
@@ -224,7 +225,7 @@ class App(ctk.CTk):
         # --- Stats Section ---
         self.stats_frame = ctk.CTkFrame(dash)
         self.stats_frame.grid(row=1, column=0, padx=10, pady=5, sticky="ew")
-        self.stats_frame.grid_columnconfigure((0,1,2,3), weight=1)
+        self.stats_frame.grid_columnconfigure((0,1,2,3,4), weight=1)
         
         self.scan_count_lbl = ctk.CTkLabel(self.stats_frame, text="Scans: 0", font=ctk.CTkFont(size=11))
         self.scan_count_lbl.grid(row=0, column=0, pady=5)
@@ -237,6 +238,9 @@ class App(ctk.CTk):
 
         self.speed_lbl = ctk.CTkLabel(self.stats_frame, text="Avg: 0.0s", font=ctk.CTkFont(size=11))
         self.speed_lbl.grid(row=0, column=3, pady=5)
+
+        self.cache_lbl = ctk.CTkLabel(self.stats_frame, text="OCR Cache: 0%", font=ctk.CTkFont(size=11))
+        self.cache_lbl.grid(row=0, column=4, pady=5)
         
         # --- Quick Prompts (Using Scrollable Frame) ---
         qp_frame = ctk.CTkScrollableFrame(dash, label_text="Quick Prompts", height=150)
@@ -468,6 +472,9 @@ class App(ctk.CTk):
                 self.match_count_lbl.configure(text=f"Matches: {s.get('matches', 0)}")
                 self.click_count_lbl.configure(text=f"Clicks: {s.get('clicks', 0)}")
                 self.speed_lbl.configure(text=f"Avg: {s.get('avg_speed', 0.0):.2f}s")
+                hits, misses = s.get('ocr_cache_hits', 0), s.get('ocr_cache_misses', 0)
+                hit_rate = 100 * hits / (hits + misses) if hits + misses else 0
+                self.cache_lbl.configure(text=f"OCR Cache: {hit_rate:.0f}% ({hits} saved)")
         except:
             pass
         self.update_stats_id = self.after(1000, self.update_stats_ui)
@@ -859,6 +866,8 @@ class App(ctk.CTk):
         threading.Thread(target=_run_test, daemon=True).start()
 
 if __name__ == "__main__":
+    # OCR_EXECUTOR "process" starts worker processes from the frozen executable
+    multiprocessing.freeze_support()
     app = App()
     app.start_stats_timer()
     app.mainloop()
@@ -3,7 +3,9 @@ import sys
 import pyautogui
 import threading
 from core.config_manager import config_manager
-from core.ocr import scan_for_keywords, get_target_region
+from core.ocr import scan_for_keywords, get_target_region, capture_screen, reset_motion_reference, get_template_memory_stats, get_contour_stats
+from core.ocr_cache import get_ocr_cache
+from core.capture import capture_service
 from core.actions import perform_click, perform_type, perform_shortcut, scroll_all_scrollbars
 from core.verification import verify_action
 from utils.logger import logger, log_action
@@ -18,7 +20,17 @@ stats = {
     "matches": 0,
     "clicks": 0,
     "avg_speed": 0.0,
-    "total_scan_time": 0.0
+    "total_scan_time": 0.0,
+    "ocr_cache_hits": 0,
+    "ocr_cache_misses": 0,
+    "ocr_cache_evictions": 0,
+    "capture_avg_ms": 0.0,
+    "capture_last_ms": 0.0,
+    "template_roi_hit_rate": 0.0,
+    "template_time_saved_ms": 0.0,
+    "contours_ocr": 0,
+    "contours_skipped_no_text": 0,
+    "contours_cancelled": 0
 }
 
 def self_test():
@@ -79,14 +91,25 @@ def main():
                         last_shortcut_time = time.time()
                         time.sleep(1.0) # Wait for UI to settle
 
+                # One capture per cycle, shared by the scrollbar, keyword and motion detectors
+                region = get_target_region()
+                if region == (0, 0, 0, 0):
+                    logger.debug("Target window not found. Waiting...")
+                    time.sleep(config_manager.get("SCAN_INTERVAL", 0.5))
+                    continue
+                frame = capture_screen(region=region)
+
                 # 1. Scroll All Scrollbars (Periodic)
                 if config_manager.get("AUTO_SCROLL_ENABLED", True):
                     SCROLL_INTERVAL = config_manager.get("SCROLL_INTERVAL", 5.0)
                     if current_time - last_scroll_time > SCROLL_INTERVAL:
                         logger.debug("Checking for scrollbars...")
-                        if scroll_all_scrollbars():
+                        if scroll_all_scrollbars(region=region, frame=frame):
                             last_scroll_time = time.time()
                             time.sleep(0.5) # Wait for UI to settle after scrolling
+                            # The content moved, so the shared frame is stale
+                            reset_motion_reference(region)
+                            frame = capture_screen(region=region)
                         else:
                             last_scroll_time = time.time()
 
@@ -95,11 +118,31 @@ def main():
                 logger.debug("Scanning screen...")
                 
                 # Multi-window support (could be added here, currently sticking to existing behavior but adding dedup)
-                matches = scan_for_keywords(config_manager.get("CLICK_KEYWORDS", []), config_manager.get("TYPE_KEYWORDS", []))
+                # Only one target is clicked per cycle unless CLICK_ALL_MATCHES: stop OCR at the first good one
+                # (the scan reads everything anyway when proximity clicking is on)
+                matches = scan_for_keywords(config_manager.get("CLICK_KEYWORDS", []), config_manager.get("TYPE_KEYWORDS", []),
+                                            override_region=region, frame=frame,
+                                            first_match=not config_manager.get("CLICK_ALL_MATCHES", True))
                 
                 # Update Stats
                 stats["scans"] += 1
                 stats["matches"] += len(matches)
+                ocr_cache = get_ocr_cache()
+                if ocr_cache is not None:
+                    cache_stats = ocr_cache.stats()
+                    stats["ocr_cache_hits"] = cache_stats["hits"]
+                    stats["ocr_cache_misses"] = cache_stats["misses"]
+                    stats["ocr_cache_evictions"] = cache_stats["evictions"]
+                capture_stats = capture_service.stats()
+                stats["capture_avg_ms"] = capture_stats["avg_ms"]
+                stats["capture_last_ms"] = capture_stats["last_ms"]
+                template_stats = get_template_memory_stats()
+                stats["template_roi_hit_rate"] = template_stats["hit_rate"]
+                stats["template_time_saved_ms"] = template_stats["time_saved_ms"]
+                contour_stats = get_contour_stats()["total"]
+                stats["contours_ocr"] = contour_stats["ocr"]
+                stats["contours_skipped_no_text"] = contour_stats["skipped_no_text"]
+                stats["contours_cancelled"] = contour_stats["cancelled"]
                 
                 if not matches:
                     logger.debug("No target keywords detected. Waiting...")
@@ -122,6 +165,7 @@ def main():
                 
                 # Deduplication map for THIS cycle
                 already_clicked_this_cycle = set()
+                acted_this_cycle = False
                 
                 for target in targets_to_process:
                     if stop_event.is_set(): break
@@ -174,6 +218,7 @@ def main():
                     elif action_type == 'TYPE':
                         success = perform_type(keyword, box)
                     
+                    acted_this_cycle = True
                     if not success:
                         logger.error("Action execution failed (False returned).")
                         continue
@@ -205,6 +250,10 @@ def main():
                         retry_map[retry_key] = {'count': current_retries + 1, 'time': current_time}
                     
                     time.sleep(config_manager.get("ACTION_DELAY", 0.1))
+
+                # Our own clicks changed the screen; don't report them as motion next cycle
+                if acted_this_cycle:
+                    reset_motion_reference(region)
                 
                 # Scan summary
                 duration = time.time() - scan_start_time
@@ -0,0 +1,36 @@
+"""
+Stand-ins for the heavy external deps of core.ocr. Importing this module installs them in
+sys.modules, so core.ocr imports in headless environments whichever test module loads first.
+"""
+import sys
+from unittest.mock import MagicMock
+
+_mss_mock = MagicMock()
+_cv2_mock = MagicMock()
+_pytesseract_mock = MagicMock()
+_gw_mock = MagicMock()
+_fuzz_mock = MagicMock()
+_pyautogui_mock = MagicMock()
+_pil_mock = MagicMock()
+_pyscreeze_mock = MagicMock()
+
+# Important: fuzzy matching functions must return integers for comparisons like >= 98
+_fuzz_mock.partial_ratio.return_value = 0
+_fuzz_mock.ratio.return_value = 0
+
+for _mod_name, _mock_obj in [
+    ('mss', _mss_mock),
+    ('cv2', _cv2_mock),
+    ('pytesseract', _pytesseract_mock),
+    ('pygetwindow', _gw_mock),
+    ('pyautogui', _pyautogui_mock),
+    ('PIL', _pil_mock),
+    ('pyscreeze', _pyscreeze_mock),
+]:
+    sys.modules.setdefault(_mod_name, _mock_obj)
+
+# Patch thefuzz.fuzz used inside ocr.py
+_thefuzz_mock = MagicMock()
+_thefuzz_mock.fuzz = _fuzz_mock
+sys.modules.setdefault('thefuzz', _thefuzz_mock)
+sys.modules.setdefault('thefuzz.fuzz', _fuzz_mock)
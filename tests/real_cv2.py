@@ -0,0 +1,21 @@
+import importlib
+import sys
+
+_cv2 = None
+
+
+def load_real_cv2():
+    """
+    The installed OpenCV, even after test_ocr.py put a MagicMock in sys.modules['cv2'] for the
+    modules it imports. Tests patch it into the module under test, so the real calls run.
+    Call it from tests, not at import time: collection must not replace test_ocr.py's mock.
+    """
+    global _cv2
+    if _cv2 is None:
+        placeholder = sys.modules.pop('cv2', None)
+        try:
+            _cv2 = importlib.import_module('cv2')
+        finally:
+            if placeholder is not None:
+                sys.modules['cv2'] = placeholder
+    return _cv2
@@ -0,0 +1,128 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.real_cv2 import load_real_cv2
+
+PROFILES = [
+    {"name": "blue", "lower": [90, 40, 40], "upper": [140, 255, 255]},
+    {"name": "red1", "lower": [0, 50, 50], "upper": [10, 255, 255]},
+    {"name": "neutral", "lower": [0, 0, 40], "upper": [180, 50, 200]},
+]
+
+
+def _in_range(hsv, lower, upper):
+    return load_real_cv2().inRange(hsv, np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8)) > 0
+
+
+class TestColorClassifier(unittest.TestCase):
+    """Tests for ColorClassifier labeling and profile parsing."""
+
+    def setUp(self):
+        from core.color_classifier import ColorClassifier, parse_profiles
+        self.ColorClassifier = ColorClassifier
+        self.parse_profiles = parse_profiles
+        rng = np.random.default_rng(7)
+        self.hsv = np.dstack([
+            rng.integers(0, 180, (40, 60)),
+            rng.integers(0, 256, (40, 60)),
+            rng.integers(0, 256, (40, 60)),
+        ]).astype(np.uint8)
+
+    def test_labels_match_in_range_for_every_profile(self):
+        profiles = self.parse_profiles(PROFILES)
+        classifier = self.ColorClassifier(profiles)
+        with patch('core.color_classifier.cv2', load_real_cv2()):
+            labels = classifier.classify(self.hsv)
+            for name, lower, upper in profiles:
+                expected = _in_range(self.hsv, lower, upper)
+                np.testing.assert_array_equal(labels.mask(name) > 0, expected, err_msg=name)
+
+    def test_more_than_eight_profiles_use_extra_planes(self):
+        profiles = [(f"p{i}", [i * 15, 0, 0], [i * 15 + 14, 255, 255]) for i in range(12)]
+        classifier = self.ColorClassifier(profiles)
+        self.assertEqual(len(classifier.tables), 2)
+        with patch('core.color_classifier.cv2', load_real_cv2()):
+            labels = classifier.classify(self.hsv)
+            np.testing.assert_array_equal(labels.mask("p11") > 0, _in_range(self.hsv, [165, 0, 0], [179, 255, 255]))
+
+    def test_parse_accepts_dict_format_and_skips_malformed(self):
+        parsed = self.parse_profiles({"green": {"low": [40, 50, 50], "high": [80, 255, 255]}})
+        self.assertEqual(parsed, [("green", [40, 50, 50], [80, 255, 255])])
+        with patch('core.color_classifier.logger'):
+            self.assertEqual(self.parse_profiles([{"name": "bad", "lower": [1, 2]}]), [])
+        self.assertIsNone(self.ColorClassifier([]).classify(self.hsv))
+
+
+class TestColorLabels(unittest.TestCase):
+    """Morphology on the combined mask shrinks with the label resolution."""
+
+    def _combined(self, scale):
+        from core.color_classifier import ColorLabels
+        labels = ColorLabels([np.zeros((8, 8), dtype=np.uint8)], ["blue"], scale=scale)
+        cv2 = load_real_cv2()
+        with patch('core.color_classifier.cv2', cv2), \
+                patch.object(cv2, 'morphologyEx', wraps=cv2.morphologyEx) as morphology:
+            labels.combined()
+            labels.combined()
+            return [call.args[2].shape for call in morphology.call_args_list]
+
+    def test_kernel_follows_scale(self):
+        self.assertEqual(self._combined(1.0), [(5, 5), (5, 5)])
+        self.assertEqual(self._combined(0.5), [(3, 3), (3, 3)])
+        self.assertEqual(self._combined(0.25), [])
+
+
+class TestProfileCounts(unittest.TestCase):
+    """Tests for ColorLabels.profile_counts() and dominant_profile()."""
+
+    def setUp(self):
+        from core.color_classifier import ColorLabels
+        plane = np.zeros((10, 20), dtype=np.uint8)
+        plane[:, :12] = 0b001   # blue
+        plane[:, 12:] = 0b100   # neutral
+        plane[0, 0] = 0b101     # blue and neutral
+        self.labels = ColorLabels([plane], ["blue", "red1", "neutral"])
+
+    def test_counts_every_profile_in_rect(self):
+        counts = self.labels.profile_counts((0, 0, 20, 10))
+        self.assertEqual(counts, {"blue": 120, "red1": 0, "neutral": 81})
+        self.assertEqual(self.labels.dominant_profile((10, 0, 10, 10)), "neutral")
+
+    def test_rect_is_mapped_to_label_scale(self):
+        from core.color_classifier import ColorLabels
+        half = ColorLabels(self.labels.planes, self.labels.names, scale=0.5)
+        self.assertEqual(half.profile_counts((0, 0, 8, 4))["blue"], 8)
+
+    def test_uncolored_rect_has_no_dominant_profile(self):
+        from core.color_classifier import ColorLabels
+        labels = ColorLabels([np.zeros((4, 4), dtype=np.uint8)], ["blue"])
+        self.assertIsNone(labels.dominant_profile((0, 0, 4, 4)))
+
+
+class TestGetColorClassifier(unittest.TestCase):
+    def setUp(self):
+        from core import color_classifier
+        self.module = color_classifier
+        color_classifier._classifier = None
+        color_classifier._classifier_key = None
+
+    def tearDown(self):
+        self.module._classifier = None
+        self.module._classifier_key = None
+
+    def test_compiled_once_per_profile_set(self):
+        first = self.module.get_color_classifier(PROFILES)
+        self.assertIs(self.module.get_color_classifier([dict(p) for p in PROFILES]), first)
+        changed = self.module.get_color_classifier(PROFILES[:1])
+        self.assertIsNot(changed, first)
+        self.assertEqual(changed.names, ["blue"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -201,6 +201,28 @@ class TestConfigManager(unittest.TestCase):
         self.assertEqual(data['SCAN_INTERVAL'], 3.14)
         self.assertEqual(cm.get('SCAN_INTERVAL'), 3.14)
 
+    def test_set_notifies_listeners_of_their_keys(self):
+        """set() calls listeners registered for the key (or for every key) after saving."""
+        with patch('core.config_manager.get_resource_path', return_value='/nonexistent'):
+            cm = ConfigManager()
+        keyword_calls, all_calls = [], []
+        cm.add_listener(lambda k, v: keyword_calls.append((k, v)), keys=("CLICK_KEYWORDS",))
+        cm.add_listener(lambda k, v: all_calls.append(k))
+        cm.set('CLICK_KEYWORDS', ['Run'])
+        cm.set('SCAN_INTERVAL', 2.0)
+        self.assertEqual(keyword_calls, [('CLICK_KEYWORDS', ['Run'])])
+        self.assertEqual(all_calls, ['CLICK_KEYWORDS', 'SCAN_INTERVAL'])
+
+    def test_failing_listener_does_not_break_set(self):
+        with patch('core.config_manager.get_resource_path', return_value='/nonexistent'):
+            cm = ConfigManager()
+        calls = []
+        cm.add_listener(MagicMock(side_effect=RuntimeError("boom")))
+        cm.add_listener(lambda k, v: calls.append(k))
+        cm.set('SCAN_INTERVAL', 2.0)
+        self.assertEqual(cm.get('SCAN_INTERVAL'), 2.0)
+        self.assertEqual(calls, ['SCAN_INTERVAL'])
+
     def test_save_config_handles_permission_error_gracefully(self):
         """save_config() logs error but does NOT raise when file write fails."""
         with patch('core.config_manager.get_resource_path', return_value='/nonexistent'):
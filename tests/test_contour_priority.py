@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.contour_priority import HitHistory, contour_priority
+
+
+class TestContourPriority(unittest.TestCase):
+
+    def test_button_shape_beats_icons_and_panels(self):
+        label = contour_priority((0, 0, 90, 20))
+        icon = contour_priority((0, 0, 24, 24))
+        panel = contour_priority((0, 0, 400, 400))
+        self.assertEqual(label, 2.0)
+        self.assertGreater(label, icon)
+        self.assertGreater(icon, panel)
+        self.assertEqual(contour_priority((0, 0, 10, 0)), 0.0)
+
+    def test_keyword_color_and_recent_hit(self):
+        rect = (0, 0, 24, 24)
+        plain = contour_priority(rect, 'red1', {'blue'})
+        self.assertEqual(contour_priority(rect, 'blue', {'blue'}), plain + 2.0)
+        self.assertEqual(contour_priority(rect, None, {'blue'}), plain)
+        # A recent hit outranks any shape and color
+        self.assertGreater(contour_priority(rect, recent_hit=True), contour_priority((0, 0, 90, 20), 'blue', {'blue'}))
+
+
+class TestHitHistory(unittest.TestCase):
+
+    def test_overlaps_recent_hits(self):
+        history = HitHistory(max_hits=2)
+        self.assertFalse(history.overlaps((0, 0, 10, 10)))
+        history.record([(100, 100, 20, 10)])
+        self.assertTrue(history.overlaps((90, 95, 20, 10)))
+        self.assertFalse(history.overlaps((120, 100, 5, 5)))
+
+    def test_oldest_hits_are_forgotten(self):
+        history = HitHistory(max_hits=2)
+        history.record([(0, 0, 10, 10), (50, 0, 10, 10)])
+        # Seen again: refreshed instead of stored twice
+        history.record([(0, 0, 10, 10)])
+        history.record([(100, 0, 10, 10)])
+        self.assertTrue(history.overlaps((0, 0, 10, 10)))
+        self.assertFalse(history.overlaps((50, 0, 10, 10)))
+        history.clear()
+        self.assertFalse(history.overlaps((0, 0, 10, 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
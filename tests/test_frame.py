@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.real_cv2 import load_real_cv2
+
+
+class TestFrame(unittest.TestCase):
+    """Tests for the lazily derived planes of Frame."""
+
+    def setUp(self):
+        from core.frame import Frame
+        self.Frame = Frame
+        self.bgra = np.arange(2 * 3 * 4, dtype=np.uint8).reshape(2, 3, 4)
+        self.cv2 = load_real_cv2()
+        self.cv2_patcher = patch('core.frame.cv2', self.cv2)
+        self.cv2_patcher.start()
+
+    def tearDown(self):
+        self.cv2_patcher.stop()
+
+    def test_rgb_is_a_view_of_bgra(self):
+        frame = self.Frame(bgra=self.bgra)
+        rgb = frame.rgb
+        self.assertTrue(np.shares_memory(rgb, self.bgra))
+        np.testing.assert_array_equal(rgb[0, 0], [2, 1, 0])
+        self.assertEqual(frame.shape, (2, 3, 3))
+
+    def test_planes_are_computed_once(self):
+        with patch.object(self.cv2, 'cvtColor', wraps=self.cv2.cvtColor) as cvt_color:
+            frame = self.Frame(bgra=self.bgra)
+            for _ in range(3):
+                frame.hsv
+                frame.gray
+                frame.bgr
+        # bgr, hsv (from bgr) and gray: three conversions in total
+        self.assertEqual(cvt_color.call_count, 3)
+
+    def test_rgb_source_frames(self):
+        from core.frame import as_frame
+        rgb = np.zeros((4, 5, 3), dtype=np.uint8)
+        frame = as_frame(rgb)
+        self.assertIs(frame.rgb, frame.raw)
+        self.assertIs(as_frame(frame), frame)
+        np.testing.assert_array_equal(np.array(frame), rgb)
+
+    def test_scaled_hsv_halves_step_by_step_and_caches(self):
+        with patch.object(self.cv2, 'resize', wraps=self.cv2.resize) as resize:
+            frame = self.Frame(bgra=np.zeros((80, 120, 4), dtype=np.uint8))
+            quarter = frame.scaled_hsv(0.25)
+            frame.scaled_hsv(0.25)
+            self.assertEqual([c.args[1] for c in resize.call_args_list], [(60, 40), (30, 20)])
+            self.assertEqual(quarter.shape, (20, 30, 3))
+
+            resize.reset_mock()
+            frame.scaled_hsv(0.3)
+            self.assertEqual([c.args[1] for c in resize.call_args_list], [(60, 40), (36, 24)])
+
+    def test_hsv_roi_reuses_full_plane_when_available(self):
+        rgb = np.arange(6 * 8 * 3, dtype=np.uint8).reshape(6, 8, 3)
+        with patch.object(self.cv2, 'cvtColor', wraps=self.cv2.cvtColor) as cvt_color:
+            frame = self.Frame(rgb=rgb)
+            hsv = frame.hsv
+            conversions = cvt_color.call_count
+            roi = frame.hsv_roi((2, 1, 3, 4))
+            np.testing.assert_array_equal(roi, hsv[1:5, 2:5])
+            self.assertEqual(cvt_color.call_count, conversions)
+
+    def test_requires_a_buffer(self):
+        with self.assertRaises(ValueError):
+            self.Frame()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Headless stand-ins for the deps core.ocr imports
+import tests.ocr_mocks
+from core.frame_diff import FrameDiffer, DirtyMap
+
+
+class TestFrameDiffer(unittest.TestCase):
+    """Tests for FrameDiffer.diff() and DirtyMap queries."""
+
+    def test_first_frame_is_all_dirty(self):
+        differ = FrameDiffer(tile_size=16)
+        dirty = differ.diff(None, np.zeros((40, 50, 3), dtype=np.uint8))
+        self.assertTrue(dirty.tiles.all())
+        self.assertEqual(dirty.tiles.shape, (3, 4))
+
+    def test_identical_frame_is_clean(self):
+        differ = FrameDiffer(tile_size=16)
+        frame = np.random.randint(0, 255, (40, 50, 3), dtype=np.uint8)
+        dirty = differ.diff(frame, frame.copy())
+        self.assertFalse(dirty.any())
+        self.assertIsNone(dirty.bounding_box())
+
+    def test_single_pixel_change_marks_one_tile(self):
+        differ = FrameDiffer(tile_size=16)
+        frame = np.zeros((40, 50, 3), dtype=np.uint8)
+        changed = frame.copy()
+        changed[35, 49, 1] = 7  # last (partial) tile row and column
+        dirty = differ.diff(frame, changed)
+        self.assertEqual(int(dirty.tiles.sum()), 1)
+        self.assertTrue(dirty.tiles[2, 3])
+        self.assertEqual(dirty.bounding_box(), (48, 32, 2, 8))
+        self.assertTrue(dirty.intersects((40, 30, 10, 10)))
+        self.assertFalse(dirty.intersects((0, 0, 30, 30)))
+
+    def test_bgra_frames_compare_whole_pixels(self):
+        differ = FrameDiffer(tile_size=8)
+        frame = np.zeros((16, 16, 4), dtype=np.uint8)
+        changed = frame.copy()
+        changed[9, 2, 3] = 1  # alpha byte only
+        dirty = differ.diff(frame, changed)
+        self.assertEqual(dirty.tiles.tolist(), [[False, False], [True, False]])
+
+    def test_size_change_is_all_dirty(self):
+        differ = FrameDiffer(tile_size=16)
+        dirty = differ.diff(np.zeros((40, 50, 3), dtype=np.uint8), np.zeros((41, 50, 3), dtype=np.uint8))
+        self.assertTrue(dirty.tiles.all())
+
+    def test_flat_input_has_no_map(self):
+        self.assertIsNone(FrameDiffer().diff(None, np.zeros(5, dtype=np.uint8)))
+
+
+class TestScanReusesCleanFrame(unittest.TestCase):
+    """scan_for_keywords() skips OCR entirely when the frame did not change."""
+
+    def setUp(self):
+        self.log_patcher = patch('core.ocr.logger')
+        self.log_patcher.start()
+
+    def tearDown(self):
+        self.log_patcher.stop()
+
+    @patch('core.ocr.detect_motion', return_value=[])
+    @patch('core.ocr.get_ocr_backend')
+    @patch('core.ocr.get_color_labels', return_value=None)
+    @patch('core.ocr.capture_screen')
+    @patch('core.ocr.config_manager')
+    def test_idle_frame_reuses_matches(self, mock_cfg, mock_cs, mock_gcm, mock_backend, mock_motion):
+        from core.ocr import scan_for_keywords
+        mock_cfg.get.side_effect = lambda k, d=None: None if k == "APP_TITLE" else d
+        frame = np.zeros((60, 80, 3), dtype=np.uint8)
+        mock_cs.side_effect = lambda region=None: frame.copy()
+        mock_backend.return_value.image_to_data.return_value = {
+            'text': ['Accept'], 'conf': [90], 'left': [5], 'top': [5], 'width': [30], 'height': [12]
+        }
+
+        region = (11, 22, 80, 60)
+        first = scan_for_keywords(['Accept'], [], override_region=region)
+        second = scan_for_keywords(['Accept'], [], override_region=region)
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, first)
+        mock_backend.return_value.image_to_data.assert_called_once()
+
+        frame[0, 0] = 255
+        scan_for_keywords(['Accept'], [], override_region=region)
+        self.assertEqual(mock_backend.return_value.image_to_data.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,237 @@
+import unittest
+import unittest.mock
+from types import SimpleNamespace
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from rapidfuzz import fuzz as rf_fuzz
+
+from core.keyword_matcher import (AnchorMatcher, KeywordMatcher, _SubstringAutomaton, _DecisionMemo,
+                                  get_anchor_matcher, get_keyword_matcher, invalidate_keyword_matchers)
+
+ALIASES = {"conten": "Confirm", "expand <": "Expand"}
+CLICK = ['Accept', 'Allow', 'Run', 'Expand', '+', '-', 'Continue', 'Confirm', 'ok', 'Accept All', 'a']
+TYPE = ['proceed', 'y', 'Yes please']
+ANCHORS = ['El', 'Bell', 'bell_icon.png', 'x', 'Notifications']
+
+
+def _thefuzz_like():
+    """Scorer with thefuzz's API and definitions (rounded rapidfuzz scores)."""
+    return SimpleNamespace(
+        _ratio=rf_fuzz.ratio, _partial_ratio=rf_fuzz.partial_ratio,
+        ratio=lambda a, b: int(round(rf_fuzz.ratio(a, b))),
+        partial_ratio=lambda a, b: int(round(rf_fuzz.partial_ratio(a, b))),
+    )
+
+
+def _reference(text_lower, click, types, scorer):
+    """Keyword loop the matcher replaces, returning (keyword, type, score) for conf 100."""
+    conf = 100
+    if text_lower in ALIASES:
+        text_lower = ALIASES[text_lower].lower()
+    out = []
+    for k in click:
+        k_lower = k.lower()
+        if text_lower == k_lower:
+            out.append((k, 'CLICK', conf * 1.0))
+        elif k in ['+', '-'] and k in text_lower:
+            out.append((k, 'CLICK', conf * 1.0))
+        elif scorer and len(text_lower) >= 2 and len(k_lower) >= 2:
+            p_ratio = scorer.partial_ratio(text_lower, k_lower)
+            f_ratio = scorer.ratio(text_lower, k_lower)
+            if len(k_lower) > len(text_lower) + 3:
+                continue
+            if p_ratio >= 98:
+                score = conf * (f_ratio / 100.0)
+                if p_ratio == 100:
+                    score = max(score, conf * 0.9)
+                out.append((k, 'CLICK', score))
+        elif k_lower in text_lower and len(k_lower) > 3:
+            out.append((k, 'CLICK', conf * 0.8))
+    for k in types:
+        if (scorer.ratio(text_lower, k.lower()) > 90) if scorer else text_lower == k.lower():
+            out.append((k, 'TYPE', conf))
+    return out
+
+
+def _scored(result):
+    conf = 100
+    out = []
+    for k, match_type, weight, floor in result[1]:
+        score = conf if weight is None else conf * weight
+        if floor is not None:
+            score = max(score, conf * floor)
+        out.append((k, match_type, score))
+    return out
+
+
+def _corpus():
+    rng = random.Random(5)
+    alphabet = 'acelnoprstwxy+- <'
+    words = list(ALIASES)
+    for k in CLICK + TYPE:
+        for _ in range(20):
+            chars = list(k.lower())
+            op = rng.random()
+            if op < 0.3:
+                chars[rng.randrange(len(chars))] = rng.choice(alphabet)
+            elif op < 0.6:
+                chars.insert(rng.randrange(len(chars) + 1), rng.choice(alphabet))
+            elif op < 0.8:
+                chars = list('click ') + chars + list(' now')
+            words.append(''.join(chars))
+    words += [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 15))) for _ in range(300)]
+    return words
+
+
+class TestSubstringAutomaton(unittest.TestCase):
+
+    def test_finds_overlapping_and_nested_patterns(self):
+        patterns = ['he', 'she', 'his', 'hers', 'e', '']
+        automaton = _SubstringAutomaton(patterns)
+        for text in ['ushers', 'this', 'xyz', 'hhe', '']:
+            expected = {i for i, p in enumerate(patterns) if p and p in text}
+            self.assertEqual(automaton.find(text), expected, text)
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_batched_scores_match_keyword_loop(self):
+        scorer = _thefuzz_like()
+        matcher = KeywordMatcher(CLICK, TYPE, ALIASES, scorer)
+        self.assertTrue(matcher.batched)
+        words = _corpus()
+        results = matcher.match_many(words)
+        for word, result in zip(words, results):
+            self.assertEqual(_scored(result), _reference(word, CLICK, TYPE, scorer), word)
+
+    def test_without_scorer_matches_keyword_loop(self):
+        matcher = KeywordMatcher(CLICK, TYPE, ALIASES, None)
+        for word in _corpus():
+            self.assertEqual(_scored(matcher.match(word)), _reference(word, CLICK, TYPE, None), word)
+
+    def test_other_scorers_are_called_per_pair(self):
+        calls = []
+        scorer = SimpleNamespace(ratio=lambda a, b: calls.append((a, b)) or 0,
+                                 partial_ratio=lambda a, b: 100 if b == 'accept' else 0)
+        matcher = KeywordMatcher(['Accept', 'VeryLongKeyword'], [], None, scorer)
+        self.assertFalse(matcher.batched)
+        alias, hits = matcher.match('acc')
+        self.assertIsNone(alias)
+        # Long keyword is never scored; the short one keeps the 0.9 floor of a full partial match
+        self.assertEqual(hits, [('Accept', 'CLICK', 0.0, 0.9)])
+        self.assertEqual(calls, [('acc', 'accept')])
+
+    def test_alias_is_reported(self):
+        matcher = KeywordMatcher(['Expand'], [], ALIASES, None)
+        self.assertEqual(matcher.match('expand <'), ('Expand', [('Expand', 'CLICK', 1.0, None)]))
+
+    def test_duplicate_keywords_match_twice(self):
+        matcher = KeywordMatcher(['Run', 'run'], [], None, None)
+        self.assertEqual([h[0] for h in matcher.match('run')[1]], ['Run', 'run'])
+
+
+def _reference_anchor(text_lower, anchors, scorer):
+    """Anchor loop the AnchorMatcher replaces."""
+    for a in anchors:
+        a_lower = a.lower()
+        if text_lower == a_lower:
+            return True
+        if scorer and len(text_lower) > 1 and len(a_lower) > 1:
+            if scorer.partial_ratio(a_lower, text_lower) >= 90:
+                return True
+        elif len(a_lower) > 2 and a_lower in text_lower:
+            return True
+    return False
+
+
+class TestAnchorMatcher(unittest.TestCase):
+
+    def setUp(self):
+        invalidate_keyword_matchers()
+
+    def _words(self):
+        return _corpus() + ['bell', 'bel', 'the bell icon', 'el', 'e', 'x', 'notifcations', 'bell_icon.pn']
+
+    def test_batched_decisions_match_anchor_loop(self):
+        scorer = _thefuzz_like()
+        matcher = AnchorMatcher(ANCHORS, scorer)
+        self.assertTrue(matcher.batched)
+        words = self._words()
+        for word, decided in zip(words, matcher.match_many(words)):
+            self.assertEqual(decided, _reference_anchor(word, ANCHORS, scorer), word)
+
+    def test_without_scorer_matches_anchor_loop(self):
+        matcher = AnchorMatcher(ANCHORS, None)
+        for word in self._words():
+            self.assertEqual(matcher.is_anchor(word), _reference_anchor(word, ANCHORS, None), word)
+
+    def test_other_scorers_are_called_per_pair(self):
+        scorer = unittest.mock.MagicMock()
+        scorer.partial_ratio.side_effect = lambda a, t: 95 if a == 'bell' else 0
+        matcher = AnchorMatcher(['Bell', 'El'], scorer)
+        self.assertFalse(matcher.batched)
+        self.assertEqual(matcher.match_many(['ring', 'x', 'el']), [True, False, True])
+
+    def test_repeat_text_is_not_rescored(self):
+        scorer = _thefuzz_like()
+        matcher = get_anchor_matcher(ANCHORS, scorer)
+        self.assertEqual(matcher.match_many(['bel', 'nothing here']), [True, False])
+        self.assertIs(get_anchor_matcher(list(ANCHORS), scorer), matcher)
+        with unittest.mock.patch('core.keyword_matcher._rf_process') as mock_process:
+            self.assertEqual(matcher.match_many(['nothing here', 'bel']), [False, True])
+            mock_process.cdist.assert_not_called()
+
+
+class TestDecisionMemo(unittest.TestCase):
+
+    def setUp(self):
+        invalidate_keyword_matchers()
+
+    def tearDown(self):
+        invalidate_keyword_matchers()
+
+    def test_repeat_text_is_not_rescored(self):
+        scorer = _thefuzz_like()
+        matcher = get_keyword_matcher(CLICK, TYPE, ALIASES, scorer)
+        first = matcher.match('accept')
+        # Another matcher object with the same version would see the same memo entry
+        with unittest.mock.patch('core.keyword_matcher._rf_process') as mock_process:
+            self.assertIs(get_keyword_matcher(CLICK, TYPE, ALIASES, scorer).match('accept'), first)
+            mock_process.cdist.assert_not_called()
+
+    def test_recompiled_matcher_does_not_see_old_decisions(self):
+        scorer = _thefuzz_like()
+        old = get_keyword_matcher(['Accept'], [], None, scorer)
+        self.assertEqual(len(old.match('accept')[1]), 1)
+        invalidate_keyword_matchers()
+        new = get_keyword_matcher(['Accept'], [], None, scorer)
+        self.assertNotEqual(new.version, old.version)
+        self.assertIsNot(new, old)
+
+    def test_memo_is_bounded_lru(self):
+        memo = _DecisionMemo(max_entries=2)
+        memo.put(('a', 1), 'A')
+        memo.put(('b', 1), 'B')
+        memo.get(('a', 1))
+        memo.put(('c', 1), 'C')
+        self.assertIsNone(memo.get(('b', 1)))
+        self.assertEqual(memo.get(('a', 1)), 'A')
+        self.assertEqual(len(memo), 2)
+
+
+class TestGetKeywordMatcher(unittest.TestCase):
+
+    def test_compiled_once_per_keyword_lists(self):
+        first = get_keyword_matcher(['Accept'], ['y'], ALIASES, None)
+        self.assertIs(get_keyword_matcher(['Accept'], ['y'], dict(ALIASES), None), first)
+        self.assertIsNot(get_keyword_matcher(['Accept', 'Run'], ['y'], ALIASES, None), first)
+        self.assertIsNot(get_keyword_matcher(['Accept'], ['y'], {}, None), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.real_cv2 import load_real_cv2
+
+
+class TestMaskIntegral(unittest.TestCase):
+    """Tests for MaskIntegral box counts and overlap ratios."""
+
+    def setUp(self):
+        self.cv2_patcher = patch('core.mask_integral.cv2', load_real_cv2())
+        self.cv2_patcher.start()
+        from core.mask_integral import MaskIntegral
+        self.MaskIntegral = MaskIntegral
+        rng = np.random.default_rng(3)
+        self.mask = np.where(rng.random((40, 60)) > 0.6, 255, 0).astype(np.uint8)
+
+    def tearDown(self):
+        self.cv2_patcher.stop()
+
+    def test_counts_match_count_nonzero(self):
+        integral = self.MaskIntegral(self.mask)
+        boxes = np.array([[0, 0, 60, 40], [5, 7, 13, 9], [59, 39, 1, 1], [20, 10, 0, 5]])
+        expected = [np.count_nonzero(self.mask[y:y + h, x:x + w]) for x, y, w, h in boxes]
+        self.assertEqual(integral.counts(boxes).tolist(), expected)
+
+    def test_ratios_with_offset(self):
+        integral = self.MaskIntegral(self.mask)
+        ratios = integral.ratios([(105, 207, 10, 8)], offset=(100, 200))
+        self.assertAlmostEqual(ratios[0], np.count_nonzero(self.mask[7:15, 5:15]) / 80)
+
+    def test_invalid_boxes_have_zero_ratio(self):
+        integral = self.MaskIntegral(np.full((20, 20), 255, dtype=np.uint8))
+        boxes = [(-1, 0, 5, 5), (0, 0, 21, 5), (3, 3, 0, 4), (0, 0, 20, 20)]
+        self.assertEqual(integral.ratios(boxes).tolist(), [0.0, 0.0, 0.0, 1.0])
+
+    def test_empty_batch(self):
+        integral = self.MaskIntegral(self.mask)
+        self.assertEqual(integral.ratios(np.empty((0, 4))).shape, (0,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.real_cv2 import load_real_cv2
+
+
+class TestMotionDetector(unittest.TestCase):
+    """Tests for the running motion model of MotionDetector.update()."""
+
+    def setUp(self):
+        from core.motion import MotionDetector
+        # Full resolution keeps the model free of any cv2 resize
+        self.detector = MotionDetector(scale=1.0, persistence=2, max_age=2.0)
+        self.still = np.zeros((20, 20), dtype=np.uint8)
+        self.spinner = [self.still.copy(), self.still.copy()]
+        self.spinner[0][2:6, 2:6] = 200
+        self.spinner[1][2:6, 2:6] = 0
+        self.spinner[1][2:6, 6:10] = 200
+
+    def test_first_frame_has_no_reference(self):
+        self.assertIsNone(self.detector.update('r', self.still, 0.0))
+
+    def test_one_off_repaint_is_ignored(self):
+        repainted = self.still.copy()
+        repainted[10:15, 10:15] = 255
+        self.detector.update('r', self.still, 0.0)
+        self.assertFalse(self.detector.update('r', repainted, 0.5).any())
+        self.assertFalse(self.detector.update('r', repainted, 1.0).any())
+
+    def test_persistent_motion_is_reported(self):
+        self.detector.update('r', self.still, 0.0)
+        first = self.detector.update('r', self.spinner[0], 0.5)
+        second = self.detector.update('r', self.spinner[1], 1.0)
+        self.assertFalse(first.any())
+        self.assertTrue(second[2:6, 2:6].all())
+        self.assertFalse(second[12:, 12:].any())
+
+    def test_gap_and_shape_change_restart_the_model(self):
+        self.detector.update('r', self.still, 0.0)
+        self.assertIsNone(self.detector.update('r', self.spinner[0], 5.0))
+        self.assertIsNone(self.detector.update('r', np.zeros((10, 10), dtype=np.uint8), 5.5))
+
+    def test_reset_and_region_limit(self):
+        from core.motion import MotionDetector
+        detector = MotionDetector(scale=1.0, max_regions=2)
+        for key in ('a', 'b', 'c'):
+            detector.update(key, self.still, 0.0)
+        self.assertIsNone(detector.update('a', self.still, 0.1))
+        detector.reset('c')
+        self.assertIsNone(detector.update('c', self.still, 0.1))
+
+    def test_half_resolution_boxes_are_scaled_back(self):
+        from core.motion import MotionDetector
+        detector = MotionDetector(scale=0.5)
+        mask = np.zeros((20, 20), dtype=bool)
+        mask[4:10, 3:8] = True
+        with patch('core.motion.cv2', load_real_cv2()):
+            boxes = detector.boxes(mask)
+        # The blob grows by 2 px per side when dilated, then doubles back to full resolution
+        self.assertEqual(boxes, [(2, 4, 18, 20)])
+        self.assertEqual(detector.boxes(np.zeros((10, 10), dtype=bool)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
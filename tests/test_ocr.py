@@ -9,38 +9,11 @@ import numpy as np
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from core.exceptions import OCRError
+from tests.real_cv2 import load_real_cv2
 
-# We patch the heavy external deps at the module level before importing core.ocr
+# The heavy external deps are patched at the module level before importing core.ocr
 # so the import itself doesn't fail in headless environments.
-_mss_mock = MagicMock()
-_cv2_mock = MagicMock()
-_pytesseract_mock = MagicMock()
-_gw_mock = MagicMock()
-_fuzz_mock = MagicMock()
-_pyautogui_mock = MagicMock()
-_pil_mock = MagicMock()
-_pyscreeze_mock = MagicMock()
-
-# Important: fuzzy matching functions must return integers for comparisons like >= 98
-_fuzz_mock.partial_ratio.return_value = 0
-_fuzz_mock.ratio.return_value = 0
-
-for _mod_name, _mock_obj in [
-    ('mss', _mss_mock),
-    ('cv2', _cv2_mock),
-    ('pytesseract', _pytesseract_mock),
-    ('pygetwindow', _gw_mock),
-    ('pyautogui', _pyautogui_mock),
-    ('PIL', _pil_mock),
-    ('pyscreeze', _pyscreeze_mock),
-]:
-    sys.modules.setdefault(_mod_name, _mock_obj)
-
-# Patch thefuzz.fuzz used inside ocr.py
-_thefuzz_mock = MagicMock()
-_thefuzz_mock.fuzz = _fuzz_mock
-sys.modules.setdefault('thefuzz', _thefuzz_mock)
-sys.modules.setdefault('thefuzz.fuzz', _fuzz_mock)
+import tests.ocr_mocks
 
 
 # ---------------------------------------------------------------------------
@@ -53,52 +26,54 @@ class TestCaptureScreen(unittest.TestCase):
     def setUp(self):
         self.log_patcher = patch('core.ocr.logger')
         self.log_patcher.start()
+        # Each test gets fresh per-thread mss sessions
+        from core.capture import capture_service
+        capture_service.close()
 
     def tearDown(self):
         self.log_patcher.stop()
+        from core.capture import capture_service
+        capture_service.close()
 
-    @patch('core.ocr.mss')
+    @patch('core.capture.mss')
     def test_capture_screen_success_full(self, mock_mss):
-        """capture_screen() returns a PIL Image on success (full screen)."""
-        from PIL import Image
+        """capture_screen() returns a Frame over the BGRA grab (full screen)."""
         from core.ocr import capture_screen
 
-        # Build a mock sct_img
+        # Build a mock sct_img: 2x3 pixels, BGRA
+        bgra = np.arange(2 * 3 * 4, dtype=np.uint8).reshape(2, 3, 4)
         mock_sct_img = MagicMock()
-        mock_sct_img.size = (10, 10)
-        # bgra bytes: 10*10*4 bytes
-        mock_sct_img.bgra = bytes([0] * 400)
+        mock_sct_img.width, mock_sct_img.height = 3, 2
+        mock_sct_img.raw = bytearray(bgra.tobytes())
 
         mock_sct = MagicMock()
-        mock_sct.monitors = [None, {'top': 0, 'left': 0, 'width': 10, 'height': 10}]
+        mock_sct.monitors = [None, {'top': 0, 'left': 0, 'width': 3, 'height': 2}]
         mock_sct.grab.return_value = mock_sct_img
+        mock_mss.mss.return_value = mock_sct
 
-        mock_mss.mss.return_value.__enter__.return_value = mock_sct
-
-        with patch('core.ocr.Image') as mock_image:
-            fake_pil = MagicMock()
-            mock_image.frombytes.return_value = fake_pil
-            result = capture_screen()
+        from core.frame import Frame
+        result = capture_screen()
 
-        self.assertEqual(result, fake_pil)
+        self.assertIsInstance(result, Frame)
+        self.assertEqual(result.shape, (2, 3, 3))
+        np.testing.assert_array_equal(result.raw, bgra)
+        np.testing.assert_array_equal(result.rgb, bgra[..., 2::-1])
+        mock_sct.grab.assert_called_once_with(mock_sct.monitors[1])
 
-    @patch('core.ocr.mss')
+    @patch('core.capture.mss')
     def test_capture_screen_with_region(self, mock_mss):
         """capture_screen() passes correct monitor dict when region provided."""
         from core.ocr import capture_screen
 
         mock_sct_img = MagicMock()
-        mock_sct_img.size = (100, 50)
-        mock_sct_img.bgra = bytes([0] * (100 * 50 * 4))
+        mock_sct_img.width, mock_sct_img.height = 100, 50
+        mock_sct_img.raw = bytearray(100 * 50 * 4)
 
         mock_sct = MagicMock()
         mock_sct.grab.return_value = mock_sct_img
+        mock_mss.mss.return_value = mock_sct
 
-        mock_mss.mss.return_value.__enter__.return_value = mock_sct
-
-        with patch('core.ocr.Image') as mock_image:
-            mock_image.frombytes.return_value = MagicMock()
-            capture_screen(region=(50, 60, 100, 50))
+        capture_screen(region=(50, 60, 100, 50))
 
         called_with = mock_sct.grab.call_args[0][0]
         self.assertEqual(called_with['left'], 50)
@@ -106,14 +81,30 @@ class TestCaptureScreen(unittest.TestCase):
         self.assertEqual(called_with['width'], 100)
         self.assertEqual(called_with['height'], 50)
 
-    @patch('core.ocr.mss')
+    @patch('core.capture.mss')
+    def test_capture_session_is_reused(self, mock_mss):
+        """Repeated captures on one thread reuse a single mss session."""
+        from core.ocr import capture_screen
+
+        mock_sct_img = MagicMock()
+        mock_sct_img.width, mock_sct_img.height = 4, 4
+        mock_sct_img.raw = bytearray(4 * 4 * 4)
+        mock_mss.mss.return_value.grab.return_value = mock_sct_img
+
+        for _ in range(3):
+            capture_screen(region=(0, 0, 4, 4))
+
+        mock_mss.mss.assert_called_once()
+        self.assertEqual(mock_mss.mss.return_value.grab.call_count, 3)
+
+    @patch('core.capture.mss')
     def test_capture_screen_failure_raises_ocr_error(self, mock_mss):
         """capture_screen() wraps mss exceptions into OCRError."""
         from core.ocr import capture_screen
 
         mock_sct = MagicMock()
         mock_sct.grab.side_effect = Exception("MSS Error")
-        mock_mss.mss.return_value.__enter__.return_value = mock_sct
+        mock_mss.mss.return_value = mock_sct
 
         with self.assertRaises(OCRError):
             capture_screen()
@@ -257,6 +248,31 @@ class TestIsOnColoredBackground(unittest.TestCase):
             result = is_on_colored_background((0, 0, 10, 10), mask)
         self.assertFalse(result)
 
+    def test_explicit_threshold_skips_config(self):
+        from core.ocr import is_on_colored_background
+        mask = np.zeros((100, 100), dtype=np.uint8)
+        mask[:, :5] = 255
+        with patch('core.ocr.config_manager') as mock_cfg:
+            self.assertTrue(is_on_colored_background((0, 0, 10, 10), mask, threshold=0.5))
+            self.assertFalse(is_on_colored_background((0, 0, 10, 10), mask, threshold=0.6))
+        mock_cfg.get.assert_not_called()
+
+    def test_batch_filter_matches_single_box_checks(self):
+        """colored_background_filter() agrees with is_on_colored_background() box by box."""
+        from core.ocr import colored_background_filter, is_on_colored_background
+        mask = np.zeros((50, 80), dtype=np.uint8)
+        mask[10:30, 20:60] = 255
+        boxes = [(20, 10, 40, 20), (15, 10, 10, 10), (0, 0, 10, 10), (70, 40, 20, 20), (30, 15, 0, 3)]
+        with patch('core.mask_integral.cv2', load_real_cv2()):
+            result = colored_background_filter(boxes, mask, threshold=0.5)
+        expected = [is_on_colored_background(b, mask, threshold=0.5) for b in boxes]
+        self.assertEqual(result.tolist(), expected)
+        self.assertEqual(expected, [True, True, False, False, False])
+
+    def test_batch_filter_without_mask_keeps_everything(self):
+        from core.ocr import colored_background_filter
+        self.assertEqual(colored_background_filter([(0, 0, 5, 5), (1, 1, 2, 2)], None).tolist(), [True, True])
+
 
 # ---------------------------------------------------------------------------
 # TestIsBoxInAppWindow
@@ -553,6 +569,22 @@ class TestOCRAliases(unittest.TestCase):
         self.assertIn('acce', OCR_ALIASES)
         self.assertEqual(OCR_ALIASES['acce'], 'Accept')
 
+    def test_configured_aliases_extend_builtins(self):
+        """OCR_ALIASES from config are merged in and re-read after a change."""
+        import core.ocr as ocr
+        with patch('core.ocr.config_manager') as mock_cfg, patch('core.ocr.invalidate_keyword_matchers') as mock_inv:
+            mock_cfg.get.side_effect = lambda k, d=None: {'Acept': 'Accept'} if k == 'OCR_ALIASES' else d
+            ocr._on_keyword_config_change('OCR_ALIASES', {'Acept': 'Accept'})
+            aliases = ocr.get_ocr_aliases()
+            self.assertEqual(aliases['acept'], 'Accept')
+            self.assertEqual(aliases['alow'], 'Allow')
+            mock_inv.assert_called_once()
+            mock_cfg.get.side_effect = lambda k, d=None: d
+            self.assertIs(ocr.get_ocr_aliases(), aliases)
+            ocr._on_keyword_config_change('OCR_ALIASES', {})
+            self.assertNotIn('acept', ocr.get_ocr_aliases())
+        ocr._on_keyword_config_change('OCR_ALIASES', {})
+
 
 # ---------------------------------------------------------------------------
 # TestScanForKeywords
@@ -567,9 +599,9 @@ class TestScanForKeywords(unittest.TestCase):
         self.log_patcher.stop()
 
     @patch('core.ocr.capture_screen')
-    @patch('core.ocr.get_color_masks')
+    @patch('core.ocr.get_color_labels')
     @patch('core.ocr.config_manager')
-    @patch('core.ocr.pytesseract')
+    @patch('core.ocr_engine.pytesseract')
     @patch('core.ocr.get_target_region')
     def test_scan_full_screen_fallback(self, mock_gtr, mock_pyt, mock_cm, mock_gcm, mock_cs):
         mock_gtr.return_value = (0, 0, 100, 100)
@@ -598,32 +630,101 @@ class TestScanForKeywords(unittest.TestCase):
         mock_pyt.image_to_data.assert_called_once()
 
 
+    @patch('core.ocr.detect_motion', return_value=[])
+    @patch('core.ocr.cached_image_to_data', side_effect=lambda backend, image: backend.image_to_data(image))
+    @patch('core.ocr.get_color_labels', return_value=None)
+    @patch('core.ocr.config_manager')
+    @patch('core.ocr.get_ocr_backend')
+    def test_scan_full_screen_fallback_is_tiled(self, mock_backend, mock_cm, mock_gcm, mock_cached, mock_motion):
+        settings = {"OCR_TILE_SIZE": 128, "OCR_TILE_OVERLAP": 16, "APP_TITLE": None, "DIRTY_RECT_ENABLED": False}
+        mock_cm.get.side_effect = lambda k, d=None: settings.get(k, d)
+        mock_backend.return_value.image_to_data.return_value = {
+            'text': ['Accept'], 'conf': [90], 'left': [20], 'top': [20], 'width': [40], 'height': [12]
+        }
+        from core.frame import Frame
+        from core.ocr_tiles import plan_tiles
+        frame = Frame(rgb=np.zeros((300, 500, 3), dtype=np.uint8))
+        gray = np.zeros((300, 500), dtype=np.uint8)
+
+        from core.ocr import scan_for_keywords
+        with patch('core.frame.cv2') as frame_cv2:
+            frame_cv2.cvtColor.return_value = gray
+            matches = scan_for_keywords(['Accept'], [], override_region=(0, 0, 500, 300), frame=frame)
+
+        tiles = plan_tiles(gray, 128, 16)
+        self.assertGreater(len(tiles), 1)
+        self.assertEqual(mock_backend.return_value.image_to_data.call_count, len(tiles))
+        self.assertEqual(sorted(m['box'] for m in matches),
+                         sorted((t.x + 20, t.y + 20, 40, 12) for t in tiles))
+
+    @patch('core.ocr.detect_motion', return_value=[])
+    @patch('core.ocr.get_process_executor')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 40, 20), (10, 60, 40, 20)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_scan_process_executor(self, mock_cm, mock_labels, mock_propose, mock_executor, mock_motion):
+        settings = {"OCR_EXECUTOR": "process", "OCR_WORKERS": 3, "APP_TITLE": None, "TEMPLATES": [],
+                    "TEXT_PREFILTER_ENABLED": False}
+        mock_cm.get.side_effect = lambda k, d=None: settings.get(k, d)
+        word = {'text': ['Accept'], 'conf': [95], 'left': [0], 'top': [0], 'width': [30], 'height': [15]}
+        jobs = []
+
+        def read_crops(submitted):
+            jobs.extend(submitted)
+            return [(idx, word) for idx, _, _, _ in reversed(submitted)]
+        mock_executor.return_value.read_crops.side_effect = read_crops
+
+        from core.frame import Frame
+        from core.ocr import scan_for_keywords
+        frame = Frame(rgb=np.zeros((100, 100, 3), dtype=np.uint8))
+        with patch('core.frame.cv2') as frame_cv2:
+            frame_cv2.cvtColor.return_value = np.zeros((100, 100), dtype=np.uint8)
+            matches = scan_for_keywords(['Accept'], [], override_region=(0, 0, 100, 100), frame=frame)
+
+        mock_executor.assert_called_once_with(3)
+        self.assertEqual([(crop.shape, w, h) for _, crop, w, h in jobs], [((30, 50), 40, 20)] * 2)
+        # Both regions are matched, at their own position
+        self.assertEqual({m['box'][1] for m in matches if m['keyword'] == 'Accept'} & {10, 60}, {10, 60})
+
+    @patch('core.ocr.detect_motion', return_value=[])
     @patch('core.ocr.capture_screen')
-    @patch('core.ocr.get_color_masks')
+    @patch('core.ocr.get_color_labels', return_value=None)
     @patch('core.ocr.config_manager')
-    @patch('core.ocr.pytesseract')
-    @patch('core.ocr.cv2')
+    @patch('core.ocr.get_ocr_backend')
+    def test_scan_uses_shared_frame(self, mock_backend, mock_cm, mock_gcm, mock_cs, mock_motion):
+        mock_cm.get.side_effect = lambda k, d=None: None if k == "APP_TITLE" else d
+        mock_backend.return_value.image_to_data.return_value = {
+            'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []
+        }
+        from core.frame import Frame
+        frame = Frame(rgb=np.zeros((30, 40, 3), dtype=np.uint8))
+
+        from core.ocr import scan_for_keywords
+        scan_for_keywords(['Hello'], [], override_region=(7, 8, 40, 30), frame=frame)
+
+        mock_cs.assert_not_called()
+        self.assertIs(mock_motion.call_args.kwargs['frame'], frame)
+
+    @patch('core.ocr.capture_screen')
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    @patch('core.ocr_engine.pytesseract')
     @patch('core.ocr.get_target_region')
-    def test_scan_with_color_masks(self, mock_gtr, mock_cv2, mock_pyt, mock_cm, mock_gcm, mock_cs):
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 50, 50)])
+    def test_scan_with_color_masks(self, mock_propose, mock_gtr, mock_pyt, mock_cm, mock_gcm, mock_cs):
         mock_gtr.return_value = (0, 0, 800, 600)
         # Prevent app tracking MagicMocks
-        mock_cm.get.side_effect = lambda k, d=None: None if k == "APP_TITLE" else d
+        mock_cm.get.side_effect = lambda k, d=None: {"APP_TITLE": None, "TEXT_PREFILTER_ENABLED": False}.get(k, d)
 
         # Fake a color mask
         fake_mask = np.zeros((100, 100), dtype=np.uint8)
-        mock_gcm.return_value = {'BLUE': fake_mask}
-        
-        from PIL import Image
-        mock_cs.return_value = Image.fromarray(np.zeros((100, 100, 3), dtype=np.uint8))
-        
-        mock_cv2.bitwise_or.return_value = fake_mask
-        # Create a tiny contour and a large contour
-        mock_cv2.findContours.return_value = ([np.array([[[0,0]], [[20,0]], [[20,20]], [[0,20]]])], None)
-        mock_cv2.boundingRect.return_value = (10, 10, 50, 50)
-        
-        # Prevent unpacking errors in the preprocessing pipeline
-        mock_cv2.threshold.return_value = (0.0, np.zeros((50, 50), dtype=np.uint8))
-        
+        mock_gcm.return_value.combined.return_value = fake_mask
+        mock_gcm.return_value.scale = 1.0
+
+        screenshot = np.zeros((100, 100, 3), dtype=np.uint8)
+        screenshot[15:55, 15:55] = 200
+        mock_cs.return_value = screenshot
+
         # Mock pytesseract calls inside contour loop
         mock_pyt.image_to_data.return_value = {
             'text': ['Accept'],
@@ -633,13 +734,417 @@ class TestScanForKeywords(unittest.TestCase):
             'width': [40],
             'height': [15]
         }
-        
+
         from core.ocr import scan_for_keywords
-        matches = scan_for_keywords(['Accept'], [])
-        
+        # The crop goes through the real frame conversion and preprocessing
+        cv2 = load_real_cv2()
+        with patch('core.frame.cv2', cv2), patch('core.preprocess.cv2', cv2):
+            matches = scan_for_keywords(['Accept'], [])
+
         # If the contour processing ran, it should find 'Accept'
         self.assertTrue(len(matches) > 0)
         self.assertEqual(matches[0]['keyword'], 'Accept')
+        mock_pyt.image_to_data.assert_called()
+
+
+# ---------------------------------------------------------------------------
+# TestKeywordColorProfiles
+# ---------------------------------------------------------------------------
+
+class TestKeywordColorProfiles(unittest.TestCase):
+    """KEYWORD_COLOR_PROFILES limits which keywords are looked for on each region."""
+
+    def setUp(self):
+        self.log_patcher = patch('core.ocr.logger')
+        self.log_patcher.start()
+        from core import ocr
+        with ocr._scan_states_lock:
+            ocr._scan_states.clear()
+
+    def tearDown(self):
+        self.log_patcher.stop()
+
+    def test_eligible_keywords(self):
+        from core.ocr import _eligible_keywords
+        restrictions = {'accept': {'blue', 'green'}, 'expand': {'neutral'}}
+        keywords = ['Accept', 'Expand', 'Allow']
+        self.assertEqual(_eligible_keywords(keywords, 'blue', restrictions), ['Accept', 'Allow'])
+        self.assertEqual(_eligible_keywords(keywords, 'neutral', restrictions), ['Expand', 'Allow'])
+        self.assertEqual(_eligible_keywords(keywords, None, restrictions), keywords)
+
+    def _scan(self, mock_cm, mock_labels, mock_ocr, proximity, prefilter=False, keywords=('Accept', 'Expand'),
+              restrictions=None):
+        config = {
+            'KEYWORD_COLOR_PROFILES': restrictions or {'Accept': ['blue'], 'Expand': ['neutral']},
+            'PROXIMITY_CLICKING_ENABLED': proximity,
+            'ANCHOR_KEYWORDS': ['Bell'],
+            'APP_TITLE': None,
+            'MOTION_DETECTION_ENABLED': False,
+            'TEMPLATES': [],
+            'TEXT_PREFILTER_ENABLED': prefilter,
+        }
+        mock_cm.get.side_effect = lambda k, d=None: config.get(k, d)
+        profiles = {(10, 10, 40, 20): 'blue', (10, 60, 40, 20): 'red1'}
+        mock_labels.return_value.dominant_profile.side_effect = lambda rect: profiles[rect]
+        mock_ocr.return_value = {'text': ['Accept'], 'conf': [95], 'left': [0], 'top': [0],
+                                 'width': [30], 'height': [15]}
+
+        from core.ocr import scan_for_keywords
+        from core.frame import Frame
+        frame = Frame(rgb=np.zeros((100, 100, 3), dtype=np.uint8))
+        return scan_for_keywords(list(keywords), [], override_region=(0, 0, 100, 100), frame=frame)
+
+    @patch('core.preprocess.preprocess_crop', side_effect=lambda crop, reuse=False: (np.zeros((30, 30), dtype=np.uint8), 3.0))
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 40, 20), (10, 60, 40, 20)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_regions_without_eligible_keywords_are_not_ocrd(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        matches = self._scan(mock_cm, mock_labels, mock_ocr, proximity=False)
+        self.assertEqual(mock_ocr.call_count, 1)
+        accept_ys = [m['box'][1] for m in matches if m['keyword'] == 'Accept']
+        self.assertTrue(accept_ys)
+        self.assertTrue(all(y < 40 for y in accept_ys))
+
+    @patch('core.preprocess.preprocess_crop', side_effect=lambda crop, reuse=False: (np.zeros((30, 30), dtype=np.uint8), 3.0))
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 40, 20), (10, 60, 40, 20)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_proximity_still_reads_every_region(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        matches = self._scan(mock_cm, mock_labels, mock_ocr, proximity=True)
+        self.assertEqual(mock_ocr.call_count, 2)
+        # 'Accept' is still only matched on the blue region
+        accept_ys = [m['box'][1] for m in matches if m['keyword'] == 'Accept']
+        self.assertTrue(accept_ys)
+        self.assertTrue(all(y < 40 for y in accept_ys))
+
+    @patch('core.ocr.text_likelihood', side_effect=[0.9, 0.1])
+    @patch('core.preprocess.preprocess_crop', side_effect=lambda crop, reuse=False: (np.zeros((30, 30), dtype=np.uint8), 3.0))
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 40, 20), (10, 60, 40, 20)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_text_prefilter_skips_unlikely_regions(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre, mock_likelihood):
+        from core.ocr import get_contour_stats
+        total_before = get_contour_stats()["total"]["skipped_no_text"]
+        matches = self._scan(mock_cm, mock_labels, mock_ocr, proximity=True, prefilter=True)
+
+        self.assertEqual(mock_likelihood.call_count, 2)
+        self.assertEqual(mock_ocr.call_count, 1)
+        self.assertTrue(matches)
+        self.assertTrue(all(m['box'][1] < 40 for m in matches))
+        stats = get_contour_stats()
+        self.assertEqual((stats["last"]["ocr"], stats["last"]["skipped_no_text"]), (1, 1))
+        self.assertEqual(stats["total"]["skipped_no_text"], total_before + 1)
+
+    @patch('core.ocr.text_likelihood', return_value=0.1)
+    @patch('core.preprocess.preprocess_crop', side_effect=lambda crop, reuse=False: (np.zeros((30, 30), dtype=np.uint8), 3.0))
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 40, 20), (10, 60, 40, 20)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_short_keywords_lower_the_bar_where_they_are_possible(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre, mock_likelihood):
+        # "+" scores like an icon; it may only be on red, so only the blue region is skipped
+        from core.ocr import get_contour_stats
+        self._scan(mock_cm, mock_labels, mock_ocr, proximity=False, prefilter=True, keywords=('Accept', '+'),
+                   restrictions={'Accept': ['blue'], '+': ['red1']})
+        self.assertEqual(mock_likelihood.call_count, 2)
+        self.assertEqual(mock_ocr.call_count, 1)
+        self.assertEqual(get_contour_stats()["last"]["skipped_no_text"], 1)
+
+
+# ---------------------------------------------------------------------------
+# TestTextPrefilter
+# ---------------------------------------------------------------------------
+
+class TestTextPrefilter(unittest.TestCase):
+    """The text prefilter runs with the default keywords, short ones like "OK" included."""
+
+    def setUp(self):
+        self.log_patcher = patch('core.ocr.logger')
+        self.log_patcher.start()
+        self.cv2_patcher = patch('core.text_likelihood.cv2', load_real_cv2())
+        self.cv2_patcher.start()
+        from core import ocr
+        with ocr._scan_states_lock:
+            ocr._scan_states.clear()
+
+    def tearDown(self):
+        self.cv2_patcher.stop()
+        self.log_patcher.stop()
+
+    @patch('core.preprocess.preprocess_crop', side_effect=lambda crop, reuse=False: (np.zeros((30, 30), dtype=np.uint8), 3.0))
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 60, 30), (10, 60, 60, 30)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_default_keywords_skip_icons_and_read_short_words(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        from core.config_manager import ConfigManager
+        from core.frame import Frame
+        from core.ocr import get_contour_stats, scan_for_keywords
+        config = dict(ConfigManager.DEFAULT_CONFIG, APP_TITLE=None, TEMPLATES=[], MOTION_DETECTION_ENABLED=False,
+                      OCR_EXECUTOR="thread")
+        mock_cm.get.side_effect = lambda k, d=None: config.get(k, d)
+        mock_labels.return_value.dominant_profile.return_value = 'blue'
+        mock_ocr.return_value = {'text': ['OK'], 'conf': [95], 'left': [0], 'top': [0], 'width': [30], 'height': [15]}
+
+        cv2 = load_real_cv2()
+        gray = np.full((100, 100), 40, dtype=np.uint8)
+        # A solid square icon on the first region, an "OK" button on the second
+        gray[15:35, 30:50] = 220
+        gray[60:90, 10:70] = 230
+        cv2.putText(gray, "OK", (28, 82), cv2.FONT_HERSHEY_SIMPLEX, 0.5, 30, 1, cv2.LINE_AA)
+        frame = Frame(rgb=np.zeros((100, 100, 3), dtype=np.uint8))
+        frame.gray = gray
+
+        matches = scan_for_keywords(list(config["CLICK_KEYWORDS"]), [], override_region=(0, 0, 100, 100), frame=frame)
+
+        self.assertEqual(mock_ocr.call_count, 1)
+        self.assertEqual(get_contour_stats()["last"]["skipped_no_text"], 1)
+        self.assertTrue(matches)
+        self.assertTrue(all(m['box'][1] > 40 for m in matches))
+
+
+# ---------------------------------------------------------------------------
+# TestScanStateReuse
+# ---------------------------------------------------------------------------
+
+class TestScanStateReuse(unittest.TestCase):
+    """Unchanged-frame reuse only diffs against the frame the reused results came from."""
+
+    def setUp(self):
+        self.log_patcher = patch('core.ocr.logger')
+        self.log_patcher.start()
+        from core import ocr
+        with ocr._scan_states_lock:
+            ocr._scan_states.clear()
+
+    def tearDown(self):
+        self.log_patcher.stop()
+
+    def _frame(self, button):
+        from core.frame import Frame
+        rgb = np.zeros((100, 100, 3), dtype=np.uint8)
+        if button:
+            rgb[10:30, 10:50] = 200
+        frame = Frame(rgb=rgb)
+        frame.gray = rgb[..., 0].copy()  # pre-fill the cached plane
+        return frame
+
+    @patch('core.preprocess.preprocess_crop', side_effect=lambda crop, reuse=False: (crop, 1.0))
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 40, 20)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_other_keyword_scans_do_not_move_the_reference(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        config = {'APP_TITLE': None, 'MOTION_DETECTION_ENABLED': False, 'TEMPLATES': [],
+                  'TEXT_PREFILTER_ENABLED': False, 'OCR_EXECUTOR': 'inline'}
+        mock_cm.get.side_effect = lambda k, d=None: config.get(k, d)
+        accept = {'text': ['Accept'], 'conf': [95], 'left': [5], 'top': [5], 'width': [30], 'height': [10]}
+        empty = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+        mock_ocr.side_effect = lambda backend, image, psm=3: accept if image.max() else empty
+
+        from core.ocr import scan_for_keywords
+        region = (0, 0, 100, 100)
+        self.assertTrue(scan_for_keywords(['Accept'], [], override_region=region, frame=self._frame(True)))
+        # The button went away; a scan for other keywords sees that frame first
+        gone = self._frame(False)
+        scan_for_keywords(['+'], [], override_region=region, frame=gone)
+        calls = mock_ocr.call_count
+
+        matches = scan_for_keywords(['Accept'], [], override_region=region, frame=gone)
+        self.assertEqual(matches, [])
+        self.assertGreater(mock_ocr.call_count, calls)
+
+        # Same frame again: now nothing changed since the 'Accept' scan and nothing is read
+        calls = mock_ocr.call_count
+        self.assertEqual(scan_for_keywords(['Accept'], [], override_region=region, frame=gone), [])
+        self.assertEqual(mock_ocr.call_count, calls)
+
+    @patch('core.preprocess.preprocess_crop', side_effect=lambda crop, reuse=False: (crop, 1.0))
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=[(10, 10, 40, 20)])
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_reference_frame_is_not_copied(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        config = {'APP_TITLE': None, 'MOTION_DETECTION_ENABLED': False, 'TEMPLATES': [],
+                  'TEXT_PREFILTER_ENABLED': False, 'OCR_EXECUTOR': 'inline'}
+        mock_cm.get.side_effect = lambda k, d=None: config.get(k, d)
+        mock_ocr.return_value = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+
+        from core import ocr
+        frame = self._frame(True)
+        ocr.scan_for_keywords(['Accept'], [], override_region=(0, 0, 100, 100), frame=frame)
+        with ocr._scan_states_lock:
+            (state,) = ocr._scan_states.values()
+        self.assertIs(state.frame, frame.raw)
+
+
+# ---------------------------------------------------------------------------
+# TestContourOrderAndFirstMatch
+# ---------------------------------------------------------------------------
+
+class TestContourOrderAndFirstMatch(unittest.TestCase):
+    """Contours are read most promising first; first_match stops OCR at a good match."""
+
+    REGIONS = [(10, 10, 30, 30), (10, 60, 80, 20), (50, 10, 40, 30)]
+
+    def setUp(self):
+        self.log_patcher = patch('core.ocr.logger')
+        self.log_patcher.start()
+        from core import ocr
+        with ocr._scan_states_lock:
+            ocr._scan_states.clear()
+        ocr._hit_history.clear()
+        self.crop_widths = []
+
+    def tearDown(self):
+        self.log_patcher.stop()
+        from core import ocr
+        ocr._hit_history.clear()
+
+    def _frame(self):
+        from core.frame import Frame
+        frame = Frame(rgb=np.zeros((100, 100, 3), dtype=np.uint8))
+        frame.gray = np.zeros((100, 100), dtype=np.uint8)  # pre-fill the cached plane
+        return frame
+
+    def _record_crop(self, crop, reuse=False):
+        self.crop_widths.append(crop.shape[1])
+        return np.zeros((30, 30), dtype=np.uint8), 1.0
+
+    def _scan(self, mock_cm, mock_ocr, first_match=None, frame=None, **overrides):
+        config = {
+            'APP_TITLE': None,
+            'MOTION_DETECTION_ENABLED': False,
+            'TEMPLATES': [],
+            'TEXT_PREFILTER_ENABLED': False,
+            'OCR_EXECUTOR': 'inline',
+            **overrides,
+        }
+        mock_cm.get.side_effect = lambda k, d=None: config.get(k, d)
+        mock_ocr.return_value = {'text': ['Accept'], 'conf': [95], 'left': [2], 'top': [2],
+                                 'width': [20], 'height': [10]}
+
+        from core.ocr import scan_for_keywords
+        from core.frame import Frame
+        frame = frame or self._frame()
+        return scan_for_keywords(['Accept'], [], override_region=(0, 0, 100, 100), frame=frame,
+                                 first_match=first_match)
+
+    @patch('core.preprocess.preprocess_crop')
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=REGIONS)
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_button_shaped_and_recent_hit_contours_first(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        from core import ocr
+        mock_pre.side_effect = self._record_crop
+        self._scan(mock_cm, mock_ocr)
+        # The wide label first, the square icon-like contour last
+        self.assertEqual(self.crop_widths, sorted(self.crop_widths, reverse=True))
+
+        with ocr._scan_states_lock:
+            ocr._scan_states.clear()
+        ocr._hit_history.clear()
+        ocr._hit_history.record([(12, 12, 10, 10)])
+        self.crop_widths.clear()
+        self._scan(mock_cm, mock_ocr)
+        self.assertEqual(self.crop_widths[0], min(self.crop_widths))
+
+    @patch('core.preprocess.preprocess_crop')
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=REGIONS)
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_first_match_cancels_remaining_contours(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        from core.ocr import get_contour_stats
+        mock_pre.side_effect = self._record_crop
+        frame = self._frame()
+
+        matches = self._scan(mock_cm, mock_ocr, first_match=True, frame=frame)
+        self.assertEqual(mock_ocr.call_count, 1)
+        self.assertEqual({m['keyword'] for m in matches}, {'Accept'})
+        first_read = matches
+        self.assertEqual(get_contour_stats()["last"]["cancelled"], 2)
+
+        # Unchanged frame: the partial result answers another first-match scan without OCR...
+        matches = self._scan(mock_cm, mock_ocr, first_match=True, frame=frame)
+        self.assertEqual(mock_ocr.call_count, 1)
+        self.assertEqual(matches, first_read)
+        # ...but a full scan still reads the contours that were cancelled
+        matches = self._scan(mock_cm, mock_ocr, frame=frame)
+        self.assertEqual(mock_ocr.call_count, 3)
+        self.assertEqual(len(matches), 3 * len(first_read))
+
+    @patch('core.preprocess.preprocess_crop')
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=REGIONS)
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_first_match_predicate_and_confidence_bar(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        mock_pre.side_effect = self._record_crop
+        # Only a match on the right-hand contour, the second one read, is wanted
+        matches = self._scan(mock_cm, mock_ocr, first_match=lambda m: m['box'][0] >= 50)
+        self.assertEqual(mock_ocr.call_count, 2)
+        self.assertTrue(any(m['box'][0] >= 50 for m in matches))
+
+        from core import ocr
+        with ocr._scan_states_lock:
+            ocr._scan_states.clear()
+        mock_ocr.reset_mock()
+        # Matches below FIRST_MATCH_MIN_CONFIDENCE do not stop the scan
+        self._scan(mock_cm, mock_ocr, first_match=True, FIRST_MATCH_MIN_CONFIDENCE=101)
+        self.assertEqual(mock_ocr.call_count, 3)
+
+    @patch('core.preprocess.preprocess_crop')
+    @patch('core.preprocess.cached_image_to_data')
+    @patch('core.ocr.propose_regions', return_value=REGIONS)
+    @patch('core.ocr.get_color_labels')
+    @patch('core.ocr.config_manager')
+    def test_proximity_clicking_reads_every_contour(self, mock_cm, mock_labels, mock_propose, mock_ocr, mock_pre):
+        from core.ocr import get_contour_stats
+        mock_pre.side_effect = self._record_crop
+        self._scan(mock_cm, mock_ocr, first_match=True, PROXIMITY_CLICKING_ENABLED=True, ANCHOR_KEYWORDS=['Bell'])
+        self.assertEqual(mock_ocr.call_count, 3)
+        self.assertEqual(get_contour_stats()["last"]["cancelled"], 0)
+
+
+# ---------------------------------------------------------------------------
+# TestDetectMotion
+# ---------------------------------------------------------------------------
+
+class TestDetectMotion(unittest.TestCase):
+    def setUp(self):
+        self.log_patcher = patch('core.ocr.logger')
+        self.mock_logger = self.log_patcher.start()
+
+    def tearDown(self):
+        self.log_patcher.stop()
+
+    @patch('core.ocr.capture_screen')
+    @patch('core.ocr.config_manager')
+    @patch('core.ocr._motion_detector')
+    def test_uses_given_frame_and_filters_blobs(self, mock_detector, mock_cm, mock_cs):
+        from core.ocr import detect_motion
+        from core.frame import Frame
+        mock_cm.get.side_effect = lambda k, d=None: d
+        mock_detector.boxes.return_value = [(10, 10, 20, 20), (0, 0, 400, 400), (0, 0, 60, 5), (5, 5, 4, 4)]
+        frame = Frame(rgb=np.zeros((4, 4, 3), dtype=np.uint8), timestamp=12.5)
+        frame.gray = np.zeros((4, 4), dtype=np.uint8)  # pre-fill the cached plane
+
+        res = detect_motion((100, 200, 4, 4), frame=frame)
+
+        mock_cs.assert_not_called()
+        mock_detector.update.assert_called_once_with((100, 200, 4, 4), frame.gray, 12.5)
+        self.assertEqual([m['box'] for m in res], [(110, 210, 20, 20)])
+
+    @patch('core.ocr._motion_detector')
+    def test_reset_forwards_region(self, mock_detector):
+        from core.ocr import reset_motion_reference
+        reset_motion_reference((1, 2, 3, 4))
+        mock_detector.reset.assert_called_once_with((1, 2, 3, 4))
 
 
 # ---------------------------------------------------------------------------
@@ -656,11 +1161,13 @@ class TestDetectScrollbars(unittest.TestCase):
 
     @patch('core.ocr.capture_screen')
     @patch('core.ocr.config_manager')
-    @patch('core.ocr.cv2')
+    @patch('core.templates.cv2')
+    @patch('core.templates.os.path.getmtime', return_value=1.0)
     @patch('core.ocr.os.path.exists', return_value=True)
-    def test_detect_scrollbars_success(self, mock_exists, mock_cv2, mock_cm, mock_cs):
-        from PIL import Image
-        mock_cs.return_value = Image.fromarray(np.zeros((100, 100, 3), dtype=np.uint8))
+    def test_detect_scrollbars_success(self, mock_exists, mock_mtime, mock_cv2, mock_cm, mock_cs):
+        from core.templates import clear_template_cache
+        clear_template_cache()
+        mock_cs.return_value = np.zeros((100, 100, 3), dtype=np.uint8)
         
         mock_cm.get.side_effect = lambda k, d=None: 0.7 if k == "SCROLLBAR_MATCH_THRESHOLD" else d
         
@@ -669,7 +1176,10 @@ class TestDetectScrollbars(unittest.TestCase):
         mock_cv2.matchTemplate.return_value = np.array([[0.8]])
         
         from core.ocr import detect_scrollbars
-        res = detect_scrollbars(region=(0,0,1000,1000))
+        with patch('core.frame.cv2') as frame_cv2:
+            frame_cv2.cvtColor.return_value = np.zeros((100, 100), dtype=np.uint8)
+            res = detect_scrollbars(region=(0,0,1000,1000))
+        clear_template_cache()
         self.assertEqual(len(res), 1)
         self.assertEqual(res[0], (0, 0, 10, 20))
 
@@ -689,19 +1199,27 @@ class TestTemplateMatching(unittest.TestCase):
     @patch('core.ocr.get_target_region', return_value=(0,0,800,600))
     @patch('core.ocr.config_manager')
     @patch('core.ocr.os.path.exists', return_value=True)
+    @patch('core.templates.os.path.getmtime', return_value=1.0)
+    @patch('core.templates.cv2')
     @patch('core.ocr.cv2')
-    def test_scan_for_keywords_template_match(self, mock_cv2, mock_exists, mock_cm, mock_gtr, mock_cs):
+    def test_scan_for_keywords_template_match(self, mock_cv2, mock_tpl_cv2, mock_mtime, mock_exists, mock_cm, mock_gtr, mock_cs):
+        from core.templates import clear_template_cache
+        clear_template_cache()
         # Force config for templates
         mock_cm.get.side_effect = lambda k, d=None: ["fake.png"] if k == "TEMPLATES" else (0.8 if k == "TEMPLATE_MATCHING_THRESHOLD" else d)
         
         from PIL import Image
         mock_cs.return_value = Image.fromarray(np.zeros((100, 100, 3), dtype=np.uint8))
         mock_cv2.cvtColor.return_value = np.zeros((100, 100), dtype=np.uint8)
-        mock_cv2.imread.return_value = np.zeros((20, 20), dtype=np.uint8)
-        mock_cv2.matchTemplate.return_value = np.array([[0.1, 0.9, 0.2]]) # A hit!
+        # Small enough to skip the pyramid, so matchTemplate runs once on the whole frame
+        mock_tpl_cv2.imread.return_value = np.zeros((14, 14), dtype=np.uint8)
+        mock_tpl_cv2.matchTemplate.return_value = np.array([[0.1, 0.9, 0.2]]) # A hit!
         
         from core.ocr import scan_for_keywords
-        matches = scan_for_keywords(['fake.png'], [])
+        with patch('core.frame.cv2') as frame_cv2:
+            frame_cv2.cvtColor.return_value = np.zeros((100, 100), dtype=np.uint8)
+            matches = scan_for_keywords(['fake.png'], [])
+        clear_template_cache()
         
         self.assertTrue(len(matches) > 0)
         self.assertEqual(matches[0]['keyword'], 'fake.png')
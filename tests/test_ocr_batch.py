@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Headless stand-ins for the deps core.ocr imports
+import tests.ocr_mocks
+from core.ocr_batch import pack_mosaics, split_mosaic_data, MosaicCell
+
+
+class TestPackMosaics(unittest.TestCase):
+    """Tests for pack_mosaics()."""
+
+    def test_empty_input(self):
+        self.assertEqual(pack_mosaics([]), [])
+
+    def test_cells_do_not_overlap_and_hold_crops(self):
+        crops = [(i, np.full((20 + i * 5, 60 + i * 10), i, dtype=np.uint8)) for i in range(8)]
+        mosaics = pack_mosaics(crops, gap=10)
+        self.assertEqual(len(mosaics), 1)
+        canvas, cells = mosaics[0]
+        self.assertEqual(len(cells), 8)
+
+        for a in cells:
+            for b in cells:
+                if a is b:
+                    continue
+                overlap_x = a.x < b.x + b.w + 10 and b.x < a.x + a.w + 10
+                overlap_y = a.y < b.y + b.h + 10 and b.y < a.y + a.h + 10
+                self.assertFalse(overlap_x and overlap_y, f"cells {a.key} and {b.key} touch")
+            np.testing.assert_array_equal(canvas[a.y:a.y + a.h, a.x:a.x + a.w], crops[a.key][1])
+
+    def test_splits_into_several_mosaics_when_too_tall(self):
+        crops = [(i, np.zeros((100, 400), dtype=np.uint8)) for i in range(10)]
+        mosaics = pack_mosaics(crops, gap=10, max_side=450)
+        self.assertGreater(len(mosaics), 1)
+        self.assertEqual(sum(len(cells) for _, cells in mosaics), 10)
+        for canvas, _ in mosaics:
+            self.assertLessEqual(canvas.shape[0], 450)
+
+
+class TestSplitMosaicData(unittest.TestCase):
+    """Tests for split_mosaic_data()."""
+
+    def test_words_are_rebased_to_their_cell(self):
+        cells = [MosaicCell('a', 10, 10, 100, 40), MosaicCell('b', 130, 10, 80, 40)]
+        data = {
+            'text': ['Run', '', 'Accept', 'stray'],
+            'conf': [91, -1, 88, 70],
+            'left': [15, 0, 140, 400],
+            'top': [20, 0, 18, 400],
+            'width': [30, 0, 60, 10],
+            'height': [12, 0, 14, 10],
+        }
+        per_cell = split_mosaic_data(data, cells)
+        self.assertEqual(per_cell['a']['text'], ['Run'])
+        self.assertEqual((per_cell['a']['left'][0], per_cell['a']['top'][0]), (5, 10))
+        self.assertEqual(per_cell['b']['text'], ['Accept'])
+        self.assertEqual(per_cell['b']['conf'], [88])
+        self.assertEqual((per_cell['b']['left'][0], per_cell['b']['top'][0]), (10, 8))
+
+
+class TestMosaicScan(unittest.TestCase):
+    """Mosaic mode must produce the same matches as per-contour OCR."""
+
+    def setUp(self):
+        self.log_patcher = patch('core.ocr.logger')
+        self.log_patcher.start()
+
+    def tearDown(self):
+        self.log_patcher.stop()
+
+    def test_mosaic_matches_equal_contour_matches(self):
+        from core import ocr
+        regions = [(0, (30, 40, 120, 40)), (3, (160, 120, 120, 40))]
+        img = np.zeros((200, 300, 3), dtype=np.uint8)
+        word = {'text': ['Accept'], 'conf': [95], 'left': [15], 'top': [15], 'width': [90], 'height': [30]}
+        cfg = {"OCR_CONFIDENCE_THRESHOLD": 50}
+        captured = {}
+        real_pack = ocr.pack_mosaics
+
+        def spy_pack(crops, **kwargs):
+            result = real_pack(crops, **kwargs)
+            captured['cells'] = result[0][1]
+            return result
+
+        def mosaic_ocr(image, psm=3):
+            # Report the same crop-relative word inside every packed cell
+            out = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+            for cell in captured['cells']:
+                out['text'].append('Accept')
+                out['conf'].append(95)
+                out['left'].append(cell.x + 15)
+                out['top'].append(cell.y + 15)
+                out['width'].append(90)
+                out['height'].append(30)
+            return out
+
+        backend = MagicMock()
+        backend.image_to_data.side_effect = mosaic_ocr
+        fake_crop = lambda crop: (np.zeros((crop.shape[0] * 3, crop.shape[1] * 3), dtype=np.uint8), 3.0)
+
+        with patch('core.ocr.config_manager') as mock_cfg, \
+             patch('core.ocr._preprocess_crop', side_effect=fake_crop), \
+             patch('core.ocr.pack_mosaics', side_effect=spy_pack):
+            mock_cfg.get.side_effect = lambda k, d=None: cfg.get(k, d)
+            batched = ocr._ocr_regions_mosaic(regions, img, backend)
+
+            # read_crop hands the contour path its words already mapped back to crop pixels
+            expected, actual = [], []
+            for idx, rect in regions:
+                origin = ocr._pad_box(rect, img.shape)[:2]
+                expected += ocr._collect_region_results(ocr.unscale_data(word, 3.0), idx, rect, origin, (0, 0), ['Accept'], [], None)[1]
+                actual += ocr._collect_region_results(batched[idx], idx, rect, origin, (0, 0), ['Accept'], [], None)[1]
+
+        self.assertEqual(backend.image_to_data.call_count, 1)
+        self.assertEqual(len(expected), 4)
+        self.assertEqual(actual, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
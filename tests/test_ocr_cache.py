@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import ocr_cache
+from core.ocr_cache import OCRResultCache, cached_image_to_data
+
+
+def _data(text):
+    return {'text': [text], 'conf': [90], 'left': [1], 'top': [2], 'width': [3], 'height': [4]}
+
+
+class TestOCRResultCache(unittest.TestCase):
+    """Tests for OCRResultCache."""
+
+    def test_key_depends_on_pixels_shape_and_psm(self):
+        a = np.zeros((10, 20), dtype=np.uint8)
+        b = a.copy()
+        b[5, 5] = 255
+        self.assertEqual(OCRResultCache.make_key(a, 7), OCRResultCache.make_key(a.copy(), 7))
+        self.assertNotEqual(OCRResultCache.make_key(a, 7), OCRResultCache.make_key(a, 8))
+        self.assertNotEqual(OCRResultCache.make_key(a, 7), OCRResultCache.make_key(b, 7))
+        self.assertNotEqual(OCRResultCache.make_key(a, 7), OCRResultCache.make_key(a.reshape(20, 10), 7))
+        self.assertNotEqual(OCRResultCache.make_key(a, 7), OCRResultCache.make_key(a, 7, "keywords"))
+
+    def test_hit_and_miss_counters(self):
+        cache = OCRResultCache()
+        self.assertIsNone(cache.get('k'))
+        cache.put('k', _data('Run'))
+        self.assertEqual(cache.get('k')['text'], ['Run'])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_recorded_lookups_add_to_the_counters(self):
+        cache = OCRResultCache()
+        cache.get('k')
+        cache.record(hits=3, misses=2, evictions=1)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['entries']), (3, 3, 1, 0))
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = OCRResultCache(max_entries=2)
+        cache.put('a', _data('a'))
+        cache.put('b', _data('b'))
+        cache.get('a')  # 'b' is now least recently used
+        cache.put('c', _data('c'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_eviction_by_memory(self):
+        cache = OCRResultCache(max_entries=100, max_bytes=1000)
+        for i in range(10):
+            cache.put(i, _data('x' * 50))
+        self.assertLess(cache.stats()['bytes'], 1000)
+        self.assertGreater(cache.evictions, 0)
+
+
+class TestCachedImageToData(unittest.TestCase):
+    def setUp(self):
+        ocr_cache._cache = None
+        ocr_cache._cache_key = None
+
+    def tearDown(self):
+        ocr_cache._cache = None
+        ocr_cache._cache_key = None
+
+    @patch('core.ocr_cache.config_manager')
+    def test_second_call_skips_backend(self, mock_cfg):
+        mock_cfg.get.side_effect = lambda k, d=None: d
+        backend = MagicMock()
+        backend.image_to_data.return_value = _data('Accept')
+        img = np.ones((30, 90), dtype=np.uint8)
+
+        first = cached_image_to_data(backend, img, psm=8)
+        second = cached_image_to_data(backend, img.copy(), psm=8)
+        self.assertEqual(first, second)
+        backend.image_to_data.assert_called_once()
+
+        cached_image_to_data(backend, img, psm=10)
+        self.assertEqual(backend.image_to_data.call_count, 2)
+
+    @patch('core.ocr_cache.config_manager')
+    def test_disabled_cache_always_calls_backend(self, mock_cfg):
+        mock_cfg.get.side_effect = lambda k, d=None: False if k == "OCR_CACHE_ENABLED" else d
+        backend = MagicMock()
+        img = np.ones((5, 5), dtype=np.uint8)
+        cached_image_to_data(backend, img)
+        cached_image_to_data(backend, img)
+        self.assertEqual(backend.image_to_data.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
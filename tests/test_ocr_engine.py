@@ -0,0 +1,195 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import ocr_engine
+from core.ocr_engine import tsv_to_dict, SubprocessBackend, EnginePoolBackend, TSV_HEADER
+from core.ocr_vocabulary import OCRVocabulary
+
+
+class TestTsvToDict(unittest.TestCase):
+    """Tests for tsv_to_dict()."""
+
+    def test_parses_numeric_and_text_columns(self):
+        tsv = f"{TSV_HEADER}\n5\t1\t1\t1\t1\t1\t10\t20\t30\t15\t96.5\tAccept"
+        data = tsv_to_dict(tsv)
+        self.assertEqual(data['text'], ['Accept'])
+        self.assertEqual(data['conf'], [96])
+        self.assertEqual(data['left'], [10])
+        self.assertEqual(data['height'], [15])
+
+    def test_missing_trailing_text_cell(self):
+        tsv = f"{TSV_HEADER}\n1\t1\t0\t0\t0\t0\t0\t0\t100\t50\t-1"
+        data = tsv_to_dict(tsv)
+        self.assertEqual(data['text'], [''])
+        self.assertEqual(data['conf'], [-1])
+
+    def test_header_only_returns_empty(self):
+        self.assertEqual(tsv_to_dict(TSV_HEADER), {})
+
+
+class TestSubprocessBackend(unittest.TestCase):
+    @patch('core.ocr_engine.pytesseract')
+    def test_passes_psm_config(self, mock_pyt):
+        mock_pyt.Output.DICT = 'dict'
+        SubprocessBackend().image_to_data("img", psm=7)
+        mock_pyt.image_to_data.assert_called_once_with("img", config='--psm 7', output_type='dict')
+
+    @patch('core.ocr_engine.pytesseract')
+    def test_passes_vocabulary(self, mock_pyt):
+        vocabulary = OCRVocabulary(["OK"], directory="/tmp/vocab")
+        backend = SubprocessBackend(vocabulary)
+        backend.image_to_data("img", psm=8)
+        config = mock_pyt.image_to_data.call_args.kwargs['config']
+        self.assertEqual(config, f"--psm 8 {vocabulary.config_path}")
+        self.assertEqual(backend.cache_tag, vocabulary.digest)
+
+
+class TestEnginePoolBackend(unittest.TestCase):
+    def setUp(self):
+        self.log_patcher = patch('core.ocr_engine.logger')
+        self.log_patcher.start()
+        self.tesserocr = MagicMock()
+        self.tesserocr.PyTessBaseAPI.side_effect = lambda **kw: MagicMock(
+            GetTSVText=MagicMock(return_value="5\t1\t1\t1\t1\t1\t1\t2\t3\t4\t90\tRun"))
+        self.tess_patcher = patch('core.ocr_engine.tesserocr', self.tesserocr)
+        self.tess_patcher.start()
+
+    def tearDown(self):
+        self.log_patcher.stop()
+        self.tess_patcher.stop()
+
+    def test_handles_are_reused_per_psm(self):
+        backend = EnginePoolBackend(size=2)
+        img = np.zeros((10, 10), dtype=np.uint8)
+        for _ in range(3):
+            data = backend.image_to_data(img, psm=7)
+        self.assertEqual(data['text'], ['Run'])
+        self.assertEqual(self.tesserocr.PyTessBaseAPI.call_count, 1)
+
+        backend.image_to_data(img, psm=8)
+        self.assertEqual(self.tesserocr.PyTessBaseAPI.call_count, 2)
+
+    def test_handles_are_initialized_with_vocabulary(self):
+        vocabulary = OCRVocabulary(["Run"], directory="/tmp/vocab")
+        backend = EnginePoolBackend(size=1, vocabulary=vocabulary)
+        backend.image_to_data(np.zeros((10, 10), dtype=np.uint8), psm=7)
+        kwargs = self.tesserocr.PyTessBaseAPI.call_args.kwargs
+        self.assertEqual(kwargs['variables'], {"tessedit_char_whitelist": "NRUnru",
+                                               "user_words_file": vocabulary.user_words_path})
+        self.assertIs(backend._fallback.vocabulary, vocabulary)
+
+    def test_falls_back_to_subprocess_on_engine_error(self):
+        self.tesserocr.PyTessBaseAPI.side_effect = RuntimeError("no tessdata")
+        backend = EnginePoolBackend(size=1)
+        with patch.object(SubprocessBackend, 'image_to_data', return_value={'text': ['OK']}) as fallback:
+            data = backend.image_to_data(np.zeros((5, 5), dtype=np.uint8), psm=8)
+        self.assertEqual(data, {'text': ['OK']})
+        fallback.assert_called_once()
+        self.assertTrue(backend._failed)
+
+        # Init failures are final: later images skip the engine
+        with patch.object(SubprocessBackend, 'image_to_data', return_value={'text': ['OK']}):
+            backend.image_to_data(np.zeros((5, 5), dtype=np.uint8), psm=8)
+        self.assertEqual(self.tesserocr.PyTessBaseAPI.call_count, 1)
+
+    def test_handle_failing_on_an_image_is_replaced(self):
+        broken = MagicMock(SetImage=MagicMock(side_effect=RuntimeError("bad image")))
+        healthy = MagicMock(GetTSVText=MagicMock(return_value="5\t1\t1\t1\t1\t1\t1\t2\t3\t4\t90\tRun"))
+        self.tesserocr.PyTessBaseAPI.side_effect = [broken, healthy]
+        backend = EnginePoolBackend(size=1)
+        with patch.object(SubprocessBackend, 'image_to_data') as fallback:
+            data = backend.image_to_data(np.zeros((5, 5), dtype=np.uint8), psm=7)
+            again = backend.image_to_data(np.zeros((5, 5), dtype=np.uint8), psm=7)
+        self.assertEqual(data['text'], ['Run'])
+        self.assertEqual(again['text'], ['Run'])
+        broken.End.assert_called_once()
+        fallback.assert_not_called()
+        self.assertFalse(backend._failed)
+        self.assertEqual(self.tesserocr.PyTessBaseAPI.call_count, 2)
+
+    def test_image_failing_twice_goes_to_subprocess_alone(self):
+        self.tesserocr.PyTessBaseAPI.side_effect = lambda **kw: MagicMock(
+            SetImage=MagicMock(side_effect=RuntimeError("bad image")))
+        backend = EnginePoolBackend(size=1)
+        with patch.object(SubprocessBackend, 'image_to_data', return_value={'text': ['OK']}) as fallback:
+            data = backend.image_to_data(np.zeros((5, 5), dtype=np.uint8), psm=7)
+        self.assertEqual(data, {'text': ['OK']})
+        fallback.assert_called_once()
+        self.assertFalse(backend._failed)
+
+        # The slot is free again and the next image gets a new handle
+        self.tesserocr.PyTessBaseAPI.side_effect = lambda **kw: MagicMock(
+            GetTSVText=MagicMock(return_value="5\t1\t1\t1\t1\t1\t1\t2\t3\t4\t90\tRun"))
+        self.assertEqual(backend.image_to_data(np.zeros((5, 5), dtype=np.uint8), psm=7)['text'], ['Run'])
+
+
+class TestGetOcrBackend(unittest.TestCase):
+    def setUp(self):
+        self.log_patcher = patch('core.ocr_engine.logger')
+        self.log_patcher.start()
+        ocr_engine._backend = None
+        ocr_engine._backend_key = None
+
+    def tearDown(self):
+        self.log_patcher.stop()
+        ocr_engine._backend = None
+        ocr_engine._backend_key = None
+
+    @patch('core.ocr_engine.config_manager')
+    def test_subprocess_when_tesserocr_missing(self, mock_cfg):
+        mock_cfg.get.side_effect = lambda k, d=None: d
+        with patch('core.ocr_engine.tesserocr', None):
+            backend = ocr_engine.get_ocr_backend()
+        self.assertIsInstance(backend, SubprocessBackend)
+
+    @patch('core.ocr_engine.config_manager')
+    def test_backend_is_shared_until_config_changes(self, mock_cfg):
+        cfg = {"OCR_BACKEND": "auto", "SCAN_PARALLELISM": 4}
+        mock_cfg.get.side_effect = lambda k, d=None: cfg.get(k, d)
+        with patch('core.ocr_engine.tesserocr', MagicMock()):
+            first = ocr_engine.get_ocr_backend()
+            self.assertIs(ocr_engine.get_ocr_backend(), first)
+            self.assertIsInstance(first, EnginePoolBackend)
+            self.assertEqual(first.size, 4)
+
+            cfg["SCAN_PARALLELISM"] = 2
+            second = ocr_engine.get_ocr_backend()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.size, 2)
+
+    @patch('core.ocr_engine.config_manager')
+    def test_pool_is_sized_by_ocr_workers(self, mock_cfg):
+        cfg = {"OCR_BACKEND": "auto", "SCAN_PARALLELISM": 4, "OCR_WORKERS": 6}
+        mock_cfg.get.side_effect = lambda k, d=None: cfg.get(k, d)
+        with patch('core.ocr_engine.tesserocr', MagicMock()):
+            first = ocr_engine.get_ocr_backend()
+            self.assertEqual(first.size, 6)
+
+            cfg["OCR_WORKERS"] = 0
+            second = ocr_engine.get_ocr_backend()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.size, 4)
+
+    @patch('core.ocr_engine.get_ocr_vocabulary')
+    @patch('core.ocr_engine.config_manager')
+    def test_backend_is_rebuilt_when_vocabulary_changes(self, mock_cfg, mock_vocab):
+        mock_cfg.get.side_effect = lambda k, d=None: {"OCR_BACKEND": "subprocess"}.get(k, d)
+        mock_vocab.return_value = None
+        first = ocr_engine.get_ocr_backend()
+        self.assertIsNone(first.vocabulary)
+
+        mock_vocab.return_value = OCRVocabulary(["Accept"], directory="/tmp/vocab")
+        second = ocr_engine.get_ocr_backend()
+        self.assertIsNot(second, first)
+        self.assertIs(second.vocabulary, mock_vocab.return_value)
+        self.assertIs(ocr_engine.get_ocr_backend(), second)
+
+
+if __name__ == '__main__':
+    unittest.main()
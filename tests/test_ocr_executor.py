@@ -0,0 +1,133 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class _ChecksumBackend:
+    """Reports the size and pixel sum of every image it is given as the recognized text."""
+    cache_tag = ""
+
+    def image_to_data(self, image, psm=3):
+        return {'text': [f"{image.shape[0]}x{image.shape[1]}:{int(image.sum())}"], 'conf': [90],
+                'left': [0], 'top': [0], 'width': [1], 'height': [1]}
+
+
+def _unchanged(gray, reuse=False):
+    return gray, 1.0
+
+
+class TestProcessOCRExecutor(unittest.TestCase):
+    """Crops reach the worker processes intact through shared memory."""
+
+    def setUp(self):
+        # Forked workers inherit the patch, so no real preprocessing runs in them
+        self.pre_patcher = patch('core.preprocess.preprocess_crop', _unchanged)
+        self.pre_patcher.start()
+        self.cache_patcher = patch('core.preprocess.cached_image_to_data',
+                                   side_effect=lambda backend, image, psm=3: backend.image_to_data(image, psm))
+        self.cache_patcher.start()
+
+    def tearDown(self):
+        self.cache_patcher.stop()
+        self.pre_patcher.stop()
+
+    def test_read_crops_returns_every_crop(self):
+        from core.ocr_executor import ProcessOCRExecutor
+        rng = np.random.default_rng(0)
+        crops = {key: rng.integers(0, 255, (10 + key, 30 + 3 * key), dtype=np.uint8) for key in range(5)}
+        executor = ProcessOCRExecutor(2, backend_factory=_ChecksumBackend)
+        try:
+            jobs = [(key, crop, crop.shape[1], crop.shape[0]) for key, crop in crops.items()]
+            results = dict(executor.read_crops(jobs))
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(set(results), set(crops))
+        for key, crop in crops.items():
+            self.assertEqual(results[key]['text'], [f"{crop.shape[0]}x{crop.shape[1]}:{int(crop.sum())}"])
+
+    def test_no_jobs(self):
+        from core.ocr_executor import ProcessOCRExecutor
+        executor = ProcessOCRExecutor(1, backend_factory=_ChecksumBackend)
+        try:
+            self.assertEqual(list(executor.read_crops([])), [])
+        finally:
+            executor.shutdown()
+
+
+class TestWorkerCacheStats(unittest.TestCase):
+    """Lookups of the workers' own OCR caches show up in the parent's cache stats."""
+
+    def setUp(self):
+        self.pre_patcher = patch('core.preprocess.preprocess_crop', _unchanged)
+        self.pre_patcher.start()
+        # Cache on with its default limits in the parent and, through fork, in the workers
+        self.cfg_patcher = patch('core.ocr_cache.config_manager')
+        self.cfg_patcher.start().get.side_effect = lambda k, d=None: d
+
+    def tearDown(self):
+        self.cfg_patcher.stop()
+        self.pre_patcher.stop()
+
+    def test_worker_hits_reach_the_parent_cache(self):
+        from core.ocr_cache import get_ocr_cache
+        from core.ocr_executor import ProcessOCRExecutor
+        # Pixels no other test reads, so the worker's copy of the cache cannot know them
+        crop = np.random.default_rng(7).integers(0, 255, (10, 20), dtype=np.uint8)
+        before = get_ocr_cache().stats()
+        executor = ProcessOCRExecutor(1, backend_factory=_ChecksumBackend)
+        try:
+            for _ in range(3):
+                list(executor.read_crops([(0, crop, 20, 10)]))
+        finally:
+            executor.shutdown()
+
+        after = get_ocr_cache().stats()
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (2, 1))
+        # The parent never looked the crop up itself
+        self.assertEqual(after['entries'], before['entries'])
+
+
+class TestGetProcessExecutor(unittest.TestCase):
+    """The shared pool is restarted when a setting its workers read changes."""
+
+    def setUp(self):
+        from core import ocr_executor
+        self.module = ocr_executor
+        patchers = [patch('core.ocr_executor.ProcessOCRExecutor',
+                          side_effect=lambda workers: SimpleNamespace(workers=workers, _pool=None,
+                                                                      shutdown=MagicMock())),
+                    patch('core.ocr_executor.logger'),
+                    patch.object(ocr_executor, '_executor', None),
+                    patch.object(ocr_executor, '_executor_stale', False)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_restarted_after_worker_settings_change(self):
+        first = self.module.get_process_executor(2)
+        self.assertIs(self.module.get_process_executor(2), first)
+
+        self.module.invalidate_process_executor("OCR_PREPROCESS_STAGES", ["binarize"])
+        second = self.module.get_process_executor(2)
+        self.assertIsNot(second, first)
+        first.shutdown.assert_called_once()
+        self.assertIs(self.module.get_process_executor(2), second)
+
+    def test_listens_to_worker_settings(self):
+        from core.config_manager import config_manager
+        listened = [keys for keys, callback in config_manager._listeners
+                    if callback is self.module.invalidate_process_executor]
+        self.assertEqual(len(listened), 1)
+        self.assertTrue({"OCR_PREPROCESS_STAGES", "OCR_BACKEND", "CLICK_KEYWORDS", "OCR_CONSTRAIN_TO_KEYWORDS"}
+                        <= listened[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
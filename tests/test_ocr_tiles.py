@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+import random
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.ocr_tiles import plan_tiles, merge_tile_data
+
+
+def _page(height, width, words):
+    """White page with a block of noise for every (x, y, w, h) word box."""
+    rng = np.random.default_rng(0)
+    gray = np.full((height, width), 255, dtype=np.uint8)
+    for x, y, w, h in words:
+        gray[y:y + h, x:x + w] = rng.integers(0, 255, (h, w), dtype=np.uint8)
+    return gray
+
+
+def _fake_ocr(tile, words):
+    """What OCR of the tile window reports: whole words, and the visible part of cut-off ones."""
+    data = {'text': [], 'conf': [], 'left': [], 'top': [], 'width': [], 'height': []}
+    for n, (x, y, w, h) in enumerate(words):
+        x0, y0 = max(x, tile.x), max(y, tile.y)
+        x1, y1 = min(x + w, tile.x + tile.w), min(y + h, tile.y + tile.h)
+        if x1 - x0 < 4 or y1 - y0 < h:
+            continue
+        whole = (x0, y0, x1, y1) == (x, y, x + w, y + h)
+        data['text'].append(f"w{n}" if whole else f"w{n}-part")
+        data['conf'].append(90 if whole else 95)
+        data['left'].append(x0 - tile.x)
+        data['top'].append(y0 - tile.y)
+        data['width'].append(x1 - x0)
+        data['height'].append(y1 - y0)
+    return data
+
+
+def _lines(height, width, rng, line_height=14, pitch=30):
+    words = []
+    for y in range(10, height - line_height, pitch):
+        x = rng.randrange(0, 20)
+        while True:
+            w = rng.randrange(20, 80)
+            if x + w >= width:
+                break
+            words.append((x, y, w, line_height))
+            x += w + rng.randrange(8, 30)
+    return words
+
+
+class TestPlanTiles(unittest.TestCase):
+
+    def test_small_frame_is_one_tile(self):
+        tiles = plan_tiles(np.zeros((100, 200), dtype=np.uint8), tile_size=256)
+        self.assertEqual(len(tiles), 1)
+        self.assertEqual(tiles[0].rect, (0, 0, 200, 100))
+
+    def test_cores_partition_frame_and_tiles_overlap(self):
+        rng = random.Random(1)
+        gray = _page(700, 900, _lines(700, 900, rng))
+        tiles = plan_tiles(gray, tile_size=256, overlap=24)
+        self.assertGreater(len(tiles), 4)
+        owner = np.zeros(gray.shape, dtype=np.int32)
+        for tile in tiles:
+            x, y, w, h = tile.core
+            owner[y:y + h, x:x + w] += 1
+            self.assertLessEqual(tile.x, x)
+            self.assertLessEqual(tile.y, y)
+            self.assertGreaterEqual(tile.x + tile.w, x + w)
+            self.assertGreaterEqual(tile.y + tile.h, y + h)
+        self.assertTrue((owner == 1).all())
+
+    def test_row_cuts_fall_between_lines(self):
+        rng = random.Random(2)
+        words = _lines(700, 500, rng)
+        gray = _page(700, 500, words)
+        tiles = plan_tiles(gray, tile_size=256, overlap=24)
+        inked = set()
+        for _, y, _, h in words:
+            inked.update(range(y + 1, y + h))
+        for tile in tiles:
+            if tile.core[1] > 0:
+                self.assertNotIn(tile.core[1], inked)
+
+
+class TestMergeTileData(unittest.TestCase):
+
+    def test_every_word_is_reported_once_and_whole(self):
+        rng = random.Random(3)
+        words = _lines(700, 900, rng)
+        gray = _page(700, 900, words)
+        tiles = plan_tiles(gray, tile_size=256, overlap=96)
+        merged = merge_tile_data({t.key: _fake_ocr(t, words) for t in tiles}, tiles, gray.shape)
+
+        found = sorted(zip(merged['left'], merged['top'], merged['width'], merged['height'], merged['text']))
+        expected = sorted((x, y, w, h, f"w{n}") for n, (x, y, w, h) in enumerate(words))
+        self.assertEqual(found, expected)
+
+    def test_missing_tiles_and_blank_words_are_skipped(self):
+        tiles = plan_tiles(np.zeros((600, 600), dtype=np.uint8), tile_size=256, overlap=16)
+        first = tiles[0]
+        data = {'text': ['', 'Accept'], 'conf': [-1, 88], 'left': [0, 10], 'top': [0, 12],
+                'width': [5, 40], 'height': [5, 14]}
+        merged = merge_tile_data({first.key: data}, tiles, (600, 600))
+        self.assertEqual(merged['text'], ['Accept'])
+        self.assertEqual((merged['left'][0], merged['top'][0]), (first.x + 10, first.y + 12))
+
+
+if __name__ == '__main__':
+    unittest.main()
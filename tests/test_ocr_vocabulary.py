@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import shlex
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core import ocr_vocabulary
+from core.ocr_vocabulary import OCRVocabulary, get_ocr_vocabulary, invalidate_ocr_vocabulary
+
+
+class TestOCRVocabulary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_words_and_whitelist(self):
+        vocabulary = OCRVocabulary(["Allow Always", "OK", "ok"], directory=self.tmp.name)
+        self.assertEqual(vocabulary.words, ["ALLOW", "ALWAYS", "Allow", "Always", "OK", "Ok", "allow", "always", "ok"])
+        self.assertEqual(vocabulary.whitelist, "AKLOSWYakloswy")
+
+    def test_digest_follows_words(self):
+        a = OCRVocabulary(["Run", "OK"], directory=self.tmp.name)
+        self.assertEqual(a.digest, OCRVocabulary(["ok", "run"], directory=self.tmp.name).digest)
+        self.assertNotEqual(a.digest, OCRVocabulary(["Run"], directory=self.tmp.name).digest)
+
+    def test_write_replaces_older_files(self):
+        old = OCRVocabulary(["Run"], directory=self.tmp.name)
+        old.write()
+        new = OCRVocabulary(["Accept"], directory=self.tmp.name)
+        path = new.write()
+        self.assertEqual(sorted(os.listdir(self.tmp.name)),
+                         sorted([os.path.basename(path), os.path.basename(new.config_path)]))
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read().split(), new.words)
+
+    def test_config_file_holds_the_settings(self):
+        vocabulary = OCRVocabulary(["Don't", "\"Go\""], directory=self.tmp.name)
+        vocabulary.write()
+        with open(vocabulary.config_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines, [f"tessedit_char_whitelist {vocabulary.whitelist}",
+                                 f"user_words_file {vocabulary.user_words_path}"])
+        self.assertIn("'", vocabulary.whitelist)
+        self.assertIn('"', vocabulary.whitelist)
+
+    def test_args_survive_splitting_on_every_platform(self):
+        # pytesseract splits its config string with posix=False on Windows
+        vocabulary = OCRVocabulary(["Don't"], directory=self.tmp.name)
+        config = f"--psm 11 {vocabulary.tesseract_args()}"
+        for posix in (True, False):
+            self.assertEqual(shlex.split(config, posix=posix), ["--psm", "11", vocabulary.config_path])
+
+    def test_args_refuse_paths_with_whitespace(self):
+        vocabulary = OCRVocabulary(["OK"], directory=os.path.join(self.tmp.name, "with space"))
+        with self.assertRaises(ValueError):
+            vocabulary.tesseract_args()
+
+
+class TestGetOcrVocabulary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patchers = [patch('core.ocr_vocabulary.logger'),
+                    patch('core.ocr_vocabulary.DEFAULT_DIRECTORY', self.tmp.name),
+                    patch('core.ocr_vocabulary.config_manager')]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cfg = {"OCR_CONSTRAIN_TO_KEYWORDS": True, "CLICK_KEYWORDS": ["Accept"],
+                    "TYPE_KEYWORDS": ["proceed"], "ANCHOR_KEYWORDS": ["Bell"]}
+        ocr_vocabulary.config_manager.get.side_effect = lambda k, d=None: self.cfg.get(k, d)
+        invalidate_ocr_vocabulary()
+        self.addCleanup(invalidate_ocr_vocabulary)
+
+    def test_off_by_default(self):
+        del self.cfg["OCR_CONSTRAIN_TO_KEYWORDS"]
+        self.assertIsNone(get_ocr_vocabulary())
+
+    def test_built_from_all_keyword_lists(self):
+        vocabulary = get_ocr_vocabulary()
+        self.assertTrue({"Accept", "proceed", "Bell"} <= set(vocabulary.words))
+        self.assertTrue(os.path.exists(vocabulary.user_words_path))
+        self.assertEqual(os.path.dirname(vocabulary.user_words_path), self.tmp.name)
+
+    def test_regenerated_after_keyword_change(self):
+        first = get_ocr_vocabulary()
+        self.cfg["CLICK_KEYWORDS"] = ["Approve"]
+        self.assertIs(get_ocr_vocabulary(), first)
+
+        invalidate_ocr_vocabulary("CLICK_KEYWORDS", ["Approve"])
+        second = get_ocr_vocabulary()
+        self.assertNotEqual(second.digest, first.digest)
+        self.assertIn("Approve", second.words)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)),
+                         sorted(os.path.basename(p) for p in (second.user_words_path, second.config_path)))
+
+    def test_off_when_the_files_cannot_be_passed(self):
+        spaced = os.path.join(self.tmp.name, "with space")
+        with patch('core.ocr_vocabulary.DEFAULT_DIRECTORY', spaced):
+            self.assertIsNone(get_ocr_vocabulary())
+        ocr_vocabulary.logger.error.assert_called_once()
+
+    def test_listens_to_keyword_settings(self):
+        from core.config_manager import config_manager
+        listened = [keys for keys, callback in config_manager._listeners if callback is invalidate_ocr_vocabulary]
+        self.assertEqual(len(listened), 1)
+        self.assertTrue({"CLICK_KEYWORDS", "TYPE_KEYWORDS", "ANCHOR_KEYWORDS"} <= listened[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
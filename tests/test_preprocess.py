@@ -0,0 +1,174 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import threading
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.real_cv2 import load_real_cv2
+
+
+class TestPreprocessPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.cv2 = load_real_cv2()
+        self.cv2_patcher = patch('core.preprocess.cv2', self.cv2)
+        self.cv2_patcher.start()
+
+    def tearDown(self):
+        self.cv2_patcher.stop()
+
+    def _pipeline(self):
+        from core.preprocess import PreprocessPipeline, Clahe, Binarize, Upscale, MedianBlur
+        return PreprocessPipeline([Clahe(), Binarize(), Upscale(3), MedianBlur()])
+
+    def test_output_is_upscaled_binary(self):
+        gray = np.zeros((10, 20), dtype=np.uint8)
+        gray[3:7, 5:15] = 200
+        result, scale = self._pipeline().run(gray)
+        self.assertEqual(scale, 3.0)
+        self.assertEqual(result.shape, (30, 60))
+        # Bright text on dark comes out as dark text on white
+        self.assertEqual(result[0, 0], 255)
+        self.assertEqual(result[15, 30], 0)
+
+    def test_polarity_is_chosen_before_one_threshold(self):
+        from core.preprocess import PreprocessPipeline, Binarize
+        pipeline = PreprocessPipeline([Binarize()])
+        dark = np.full((10, 10), 20, dtype=np.uint8)
+        dark[4:6, 4:6] = 230
+        bright = 255 - dark
+        with patch.object(self.cv2, 'threshold', wraps=self.cv2.threshold) as threshold:
+            pipeline.run(dark)
+            pipeline.run(bright)
+        kinds = [c.args[3] for c in threshold.call_args_list]
+        self.assertEqual(kinds, [self.cv2.THRESH_BINARY_INV + self.cv2.THRESH_OTSU,
+                                 self.cv2.THRESH_BINARY + self.cv2.THRESH_OTSU])
+        # Text comes out dark on white either way
+        self.assertEqual(pipeline.run(dark)[0][0, 0], 255)
+        self.assertEqual(pipeline.run(bright)[0][0, 0], 255)
+
+    def test_clahe_is_created_once_per_thread(self):
+        pipeline = self._pipeline()
+        gray = np.zeros((12, 12), dtype=np.uint8)
+        with patch.object(self.cv2, 'createCLAHE', wraps=self.cv2.createCLAHE) as create_clahe:
+            for _ in range(5):
+                pipeline.run(gray)
+            self.assertEqual(create_clahe.call_count, 1)
+            worker = threading.Thread(target=pipeline.run, args=(gray,))
+            worker.start()
+            worker.join()
+            self.assertEqual(create_clahe.call_count, 2)
+
+    def test_reuse_writes_into_scratch_buffers(self):
+        pipeline = self._pipeline()
+        small = np.zeros((8, 16), dtype=np.uint8)
+        large = np.zeros((10, 20), dtype=np.uint8)
+        first, _ = pipeline.run(large, reuse=True)
+        second, _ = pipeline.run(small, reuse=True)
+        self.assertEqual(second.shape, (24, 48))
+        self.assertTrue(np.shares_memory(first, second))
+        self.assertFalse(np.shares_memory(pipeline.run(small)[0], pipeline.run(small)[0]))
+
+    def test_reused_result_matches_fresh_one(self):
+        pipeline = self._pipeline()
+        rng = np.random.default_rng(0)
+        for shape in ((9, 31), (14, 14), (5, 60)):
+            gray = rng.integers(0, 255, shape, dtype=np.uint8)
+            np.testing.assert_array_equal(pipeline.run(gray, reuse=True)[0], pipeline.run(gray)[0])
+
+
+def _text_crop(glyph_height, glyphs=5, border=True):
+    """A binarized crop: black glyph blocks of `glyph_height` on white, optionally framed."""
+    h, w = glyph_height + 12, glyphs * (glyph_height + 4) + 12
+    crop = np.full((h, w), 255, dtype=np.uint8)
+    for n in range(glyphs):
+        x = 6 + n * (glyph_height + 4)
+        crop[6:6 + glyph_height, x:x + glyph_height // 2 + 1] = 0
+    if border:
+        crop[[0, -1], :] = 0
+        crop[:, [0, -1]] = 0
+    return crop
+
+
+class TestAdaptiveUpscale(unittest.TestCase):
+
+    def setUp(self):
+        self.cv2_patcher = patch('core.preprocess.cv2', load_real_cv2())
+        self.cv2_patcher.start()
+
+    def tearDown(self):
+        self.cv2_patcher.stop()
+
+    def test_x_height_ignores_border(self):
+        from core.preprocess import estimate_x_height
+        self.assertEqual(estimate_x_height(_text_crop(8)), 8.0)
+        self.assertEqual(estimate_x_height(_text_crop(8, border=False)), 8.0)
+        self.assertIsNone(estimate_x_height(np.full((20, 40), 255, dtype=np.uint8)))
+
+    def test_factor_brings_glyphs_into_range(self):
+        from core.preprocess import Upscale
+        upscale = Upscale()
+        self.assertEqual(upscale.scale_for(_text_crop(8)), 3.0)
+        self.assertEqual(Upscale(step=0.25).scale_for(_text_crop(8)), 2.5)
+        self.assertEqual(upscale.scale_for(_text_crop(12)), 2.0)
+        self.assertEqual(upscale.scale_for(_text_crop(7)), 3.0)
+        self.assertEqual(upscale.scale_for(_text_crop(24)), 1.0)
+        self.assertEqual(upscale.scale_for(_text_crop(3)), 4.0)
+        self.assertEqual(Upscale(min_factor=0.5).scale_for(_text_crop(60)), 0.5)
+        self.assertEqual(upscale.scale_for(np.full((20, 40), 255, dtype=np.uint8)), 3.0)
+        self.assertEqual(Upscale(factor=2).scale_for(_text_crop(24)), 2.0)
+
+    def test_pipeline_reports_the_chosen_scale(self):
+        from core.preprocess import PreprocessPipeline, Upscale
+        pipeline = PreprocessPipeline([Upscale(step=0.25)])
+        for glyph_height, expected in ((8, 2.5), (24, 1.0)):
+            crop = _text_crop(glyph_height)
+            for reuse in (False, True):
+                result, scale = pipeline.run(crop, reuse=reuse)
+                self.assertEqual(scale, expected)
+                self.assertEqual(result.shape, (round(crop.shape[0] * scale), round(crop.shape[1] * scale)))
+
+    def test_unscale_data(self):
+        from core.preprocess import unscale_data
+        data = {'text': ['OK'], 'conf': [90], 'left': [30], 'top': [16], 'width': [41], 'height': [20]}
+        mapped = unscale_data(data, 2.5)
+        self.assertEqual((mapped['left'], mapped['top'], mapped['width'], mapped['height']), ([12], [6], [16], [8]))
+        self.assertEqual(data['left'], [30])
+        self.assertIs(unscale_data(data, 1.0), data)
+        self.assertIsNone(unscale_data(None, 3.0))
+
+
+class TestParseStages(unittest.TestCase):
+
+    def setUp(self):
+        self.log_patcher = patch('core.preprocess.logger')
+        self.mock_logger = self.log_patcher.start()
+
+    def tearDown(self):
+        self.log_patcher.stop()
+
+    def test_names_and_parameters(self):
+        from core.preprocess import parse_stages, Clahe, Upscale
+        stages = parse_stages(["clahe", {"stage": "upscale", "factor": 2}, "sharpen", {"factor": 4}])
+        self.assertEqual([type(s) for s in stages], [Clahe, Upscale])
+        self.assertEqual(stages[1].factor, 2)
+        self.assertEqual(self.mock_logger.warning.call_count, 2)
+
+    @patch('core.preprocess.config_manager')
+    def test_pipeline_rebuilt_when_stages_change(self, mock_cfg):
+        from core.preprocess import get_preprocess_pipeline
+        stages = ["clahe", "binarize"]
+        mock_cfg.get.side_effect = lambda k, d=None: stages if k == "OCR_PREPROCESS_STAGES" else d
+        first = get_preprocess_pipeline()
+        self.assertIs(get_preprocess_pipeline(), first)
+        stages = ["binarize"]
+        self.assertIsNot(get_preprocess_pipeline(), first)
+        self.assertEqual(len(get_preprocess_pipeline().stages), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import random
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.spatial_index import SpatialIndex, horizontal_distance
+
+
+def _reference_within(segments, anchor, max_dist, direction):
+    """The line-bucket scan _add_proximity_matches used before the index."""
+    line_map = {}
+    for seg in segments:
+        x, y, w, h = seg[1]
+        key = int((y + h / 2) // 15)
+        for k in range(key - 1, key + 2):
+            line_map.setdefault(k, []).append(seg)
+    ax, ay, aw, ah = anchor
+    found = []
+    for seg in line_map.get(int((ay + ah / 2) // 15), []):
+        tx, ty, tw, th = seg[1]
+        if tx == ax and ty == ay:
+            continue
+        if abs((ay + ah / 2) - (ty + th / 2)) > ah + th:
+            continue
+        dist = horizontal_distance(anchor, seg[1], direction)
+        if dist is not None and 0 <= dist < max_dist:
+            found.append((dist, seg))
+    return found
+
+
+class TestHorizontalDistance(unittest.TestCase):
+
+    def test_sides(self):
+        anchor = (200, 50, 30, 20)
+        self.assertEqual(horizontal_distance(anchor, (80, 52, 90, 16), "LEFT"), 30)
+        self.assertIsNone(horizontal_distance(anchor, (80, 52, 90, 16), "RIGHT"))
+        self.assertEqual(horizontal_distance(anchor, (260, 52, 60, 16), "RIGHT"), 30)
+        self.assertIsNone(horizontal_distance(anchor, (260, 52, 60, 16), "LEFT"))
+
+    def test_straddling_box_is_at_zero_for_both(self):
+        self.assertEqual(horizontal_distance((200, 50, 30, 20), (190, 50, 60, 20), "BOTH"), 0)
+        self.assertIsNone(horizontal_distance((200, 50, 30, 20), (190, 50, 60, 20), "LEFT"))
+
+
+class TestSpatialIndex(unittest.TestCase):
+
+    def test_within_skips_other_lines_and_far_boxes(self):
+        segments = [
+            ('Bell', (200, 50, 30, 20), 90),
+            ('Near', (260, 52, 60, 16), 80),
+            ('Far', (900, 52, 60, 16), 80),
+            ('Below', (260, 400, 60, 16), 80),
+        ]
+        index = SpatialIndex(segments)
+        found = index.within((200, 50, 30, 20), 300, "BOTH")
+        self.assertEqual([seg[0] for _, seg in found], ['Near'])
+
+    def test_nearest_orders_by_distance(self):
+        segments = [
+            ('Far', (400, 50, 40, 20), 80),
+            ('Near', (240, 50, 40, 20), 80),
+            ('Left', (100, 50, 40, 20), 80),
+        ]
+        index = SpatialIndex(segments)
+        nearest = index.nearest((200, 50, 30, 20), k=2)
+        self.assertEqual([seg[0] for _, seg in nearest], ['Near', 'Left'])
+        self.assertEqual([seg[0] for _, seg in index.nearest((200, 50, 30, 20), k=5, direction="RIGHT")],
+                         ['Near', 'Far'])
+
+    def test_matches_line_bucket_scan(self):
+        rng = random.Random(7)
+        segments = []
+        for i in range(400):
+            box = (rng.randrange(0, 1900), rng.randrange(0, 1060), rng.randrange(1, 200), rng.randrange(4, 40))
+            segments.append((f"t{i}", box, 80))
+        index = SpatialIndex(segments)
+        for direction in ("LEFT", "RIGHT", "BOTH"):
+            for max_dist in (1, 50, 300):
+                for _, anchor, _ in segments[:40]:
+                    with self.subTest(direction=direction, max_dist=max_dist, anchor=anchor):
+                        self.assertEqual(index.within(anchor, max_dist, direction),
+                                         _reference_within(segments, anchor, max_dist, direction))
+
+    def test_empty_index(self):
+        index = SpatialIndex([])
+        self.assertEqual(index.within((0, 0, 10, 10), 100), [])
+        self.assertEqual(index.nearest((0, 0, 10, 10)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
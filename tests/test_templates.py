@@ -0,0 +1,168 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.real_cv2 import load_real_cv2
+
+
+class TemplateTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cv2 = load_real_cv2()
+        self.cv2_patcher = patch('core.templates.cv2', self.cv2)
+        self.cv2_patcher.start()
+        self.log_patcher = patch('core.templates.logger')
+        self.log_patcher.start()
+        import core.templates as templates
+        self.templates = templates
+        templates.clear_template_cache()
+        self.rng = np.random.default_rng(11)
+
+    def tearDown(self):
+        self.templates.clear_template_cache()
+        self.cv2_patcher.stop()
+        self.log_patcher.stop()
+
+
+class TestNonMaxSuppression(TemplateTestCase):
+
+    def test_best_hit_wins_and_distant_hits_survive(self):
+        xs, ys = [10, 12, 40, 11], [10, 11, 10, 30]
+        scores = [0.85, 0.95, 0.9, 0.8]
+        keep = self.templates.non_max_suppression(xs, ys, scores, 10, 10)
+        self.assertEqual(keep, [1, 2, 3])
+
+
+class TestMatchTemplate(TemplateTestCase):
+
+    def test_finds_each_instance_once(self):
+        haystack = self.rng.integers(0, 255, (60, 80), dtype=np.uint8)
+        patch_ = haystack[5:17, 7:19].copy()
+        haystack[40:52, 50:62] = patch_
+        template = self.templates.Template('icon.png', patch_)
+        self.assertIsNone(template.small)
+        hits = self.templates.match_template(haystack, template, 0.9)
+        self.assertEqual(sorted((x, y) for x, y, _ in hits), [(7, 5), (50, 40)])
+        self.assertTrue(all(score > 0.99 for _, _, score in hits))
+
+    def test_pyramid_match_is_confirmed_at_full_resolution(self):
+        # Smooth texture so the coarse level still carries the pattern
+        haystack = np.kron(self.rng.integers(0, 255, (20, 25)), np.ones((4, 4))).astype(np.uint8)
+        template = self.templates.Template('button.png', haystack[23:45, 31:53].copy())
+        self.assertEqual(template.small.shape, (11, 11))
+        search = self.templates.SearchImage(haystack)
+        hits = self.templates.match_template(search, template, 0.95)
+        self.assertEqual([(x, y) for x, y, _ in hits], [(31, 23)])
+        self.assertEqual(search.small.shape, (40, 50))
+
+    def test_rendered_text_off_the_pixel_grid_is_found(self):
+        # At an odd offset the coarse level sees the text half a pixel out of phase
+        button = np.full((24, 60), 230, np.uint8)
+        self.cv2.putText(button, "Accept", (4, 17), self.cv2.FONT_HERSHEY_SIMPLEX, 0.6, 30, 1, self.cv2.LINE_AA)
+        haystack = np.full((80, 160), 230, np.uint8)
+        haystack[31:55, 41:101] = button
+        template = self.templates.Template('accept.png', button)
+        hits = self.templates.match_template(haystack, template, 0.9)
+        self.assertEqual([(x, y) for x, y, _ in hits], [(41, 31)])
+
+    def test_many_raw_peaks_are_thinned_to_one_per_object(self):
+        icon = np.pad(np.full((6, 6), 200, np.uint8), 2, constant_values=100)
+        haystack = np.full((100, 100), 100, np.uint8)
+        spots = [(x, y) for y in range(5, 95, 15) for x in range(5, 95, 15)]
+        for x, y in spots:
+            haystack[y:y + 6, x:x + 6] = 200
+        hits = self.templates.match_template(haystack, self.templates.Template('dot.png', icon), 0.6)
+        self.assertEqual(sorted((x + 2, y + 2) for x, y, _ in hits), sorted(spots))
+
+    def test_template_larger_than_haystack(self):
+        template = self.templates.Template('big.png', np.zeros((30, 30), np.uint8))
+        self.assertEqual(self.templates.match_template(np.zeros((20, 40), np.uint8), template, 0.8), [])
+
+    def test_match_templates_keeps_job_order_and_isolates_failures(self):
+        haystack = self.rng.integers(0, 255, (40, 40), dtype=np.uint8)
+        good = self.templates.Template('a.png', haystack[2:12, 3:13].copy())
+        bad = self.templates.Template('b.png', np.zeros((5, 5), np.uint8))
+        bad.gray = None  # makes matching raise
+        with patch('core.templates.config_manager') as mock_cfg:
+            mock_cfg.get.side_effect = lambda k, d=None: 2 if k == 'SCAN_PARALLELISM' else d
+            results = self.templates.match_templates([(haystack, bad, 0.9), (haystack, good, 0.9)])
+        self.assertEqual(results[0], [])
+        self.assertEqual([(x, y) for x, y, _ in results[1]], [(3, 2)])
+
+
+class TestLocationMemory(TemplateTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.haystack = self.rng.integers(0, 255, (80, 100), dtype=np.uint8)
+        self.template = self.templates.Template('bell.png', self.haystack[30:42, 60:72].copy())
+        self.memory = self.templates.LocationMemory(margin=4, full_search_every=3)
+
+    def test_repeat_hit_searches_only_a_window(self):
+        first = self.memory.match('k', self.haystack, self.template, 0.9)
+        second = self.memory.match('k', self.haystack, self.template, 0.9)
+        self.assertEqual([(x, y) for x, y, _ in first], [(60, 30)])
+        self.assertEqual([(x, y) for x, y, _ in second], [(60, 30)])
+        stats = self.memory.stats()
+        self.assertEqual((stats['roi_hits'], stats['full_searches']), (1, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 0.5)
+
+    def test_moved_template_falls_back_to_full_search(self):
+        self.memory.match('k', self.haystack, self.template, 0.9)
+        moved = np.roll(self.haystack, 25, axis=1)
+        hits = self.memory.match('k', moved, self.template, 0.9)
+        self.assertEqual([(x, y) for x, y, _ in hits], [(85, 30)])
+        self.assertEqual(self.memory.stats()['roi_misses'], 1)
+        self.assertEqual(self.memory.stats()['full_searches'], 2)
+
+    def test_full_search_every_n_cycles(self):
+        for _ in range(6):
+            self.memory.match('k', self.haystack, self.template, 0.9)
+        stats = self.memory.stats()
+        self.assertEqual((stats['full_searches'], stats['roi_hits']), (2, 4))
+
+    def test_absent_template_is_always_searched_in_full(self):
+        empty = np.zeros_like(self.haystack)
+        self.memory.match('k', empty, self.template, 0.9)
+        self.memory.match('k', empty, self.template, 0.9)
+        self.assertEqual(self.memory.stats()['full_searches'], 2)
+
+
+class TestTemplateCache(TemplateTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'icon.png')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        super().tearDown()
+
+    def test_reloaded_only_when_mtime_changes(self):
+        self.cv2.imwrite(self.path, np.zeros((10, 10), np.uint8))
+        os.utime(self.path, (1.0, 1.0))
+        first = self.templates.get_template(self.path)
+        self.assertEqual((first.width, first.height), (10, 10))
+        self.assertIs(self.templates.get_template(self.path), first)
+
+        self.cv2.imwrite(self.path, np.zeros((12, 16), np.uint8))
+        os.utime(self.path, (2.0, 2.0))
+        second = self.templates.get_template(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual((second.width, second.height), (16, 12))
+
+    def test_missing_or_unreadable_file(self):
+        self.assertIsNone(self.templates.get_template(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b'not a png')
+        self.assertIsNone(self.templates.get_template(self.path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tests.real_cv2 import load_real_cv2
+
+
+def _word(glyphs=5, height=11, pad=5):
+    """Dark text on a light button: glyphs of thin vertical and horizontal strokes."""
+    crop = np.full((height + 2 * pad, glyphs * 8 + 2 * pad), 230, dtype=np.uint8)
+    for n in range(glyphs):
+        x = pad + n * 8
+        crop[pad:pad + height, x] = 30
+        crop[pad:pad + height, x + 4] = 30
+        crop[pad + height // 2, x:x + 5] = 30
+    return crop
+
+
+def _rendered(text, scale=0.5, thickness=1):
+    """`text` drawn dark on a light button with the real OpenCV, padded like a contour crop."""
+    cv2 = load_real_cv2()
+    (w, h), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+    crop = np.full((h + baseline + 10, w + 10), 230, dtype=np.uint8)
+    cv2.putText(crop, text, (5, h + 5), cv2.FONT_HERSHEY_SIMPLEX, scale, 30, thickness, cv2.LINE_AA)
+    return crop
+
+
+class TestTextLikelihood(unittest.TestCase):
+
+    def setUp(self):
+        self.cv2_patcher = patch('core.text_likelihood.cv2', load_real_cv2())
+        self.cv2_patcher.start()
+
+    def tearDown(self):
+        self.cv2_patcher.stop()
+
+    def test_text_scores_high(self):
+        from core.text_likelihood import text_likelihood
+        self.assertGreater(text_likelihood(_word()), 0.8)
+        # Light text on a dark button is the same
+        self.assertGreater(text_likelihood(255 - _word()), 0.8)
+
+    def test_flat_crop_scores_zero(self):
+        from core.text_likelihood import text_likelihood
+        self.assertEqual(text_likelihood(np.full((20, 40), 90, dtype=np.uint8)), 0.0)
+        self.assertEqual(text_likelihood(np.zeros((0, 0), dtype=np.uint8)), 0.0)
+
+    def test_solid_icon_scores_low(self):
+        from core.text_likelihood import text_likelihood
+        yy, xx = np.mgrid[:24, :24]
+        disk = np.where((yy - 12) ** 2 + (xx - 12) ** 2 < 64, 240, 40).astype(np.uint8)
+        self.assertLess(text_likelihood(disk), 0.5)
+        bar = np.full((60, 20), 40, dtype=np.uint8)
+        bar[5:55, 6:14] = 200
+        self.assertLess(text_likelihood(bar), 0.5)
+
+    def test_panel_with_a_line_of_text(self):
+        from core.text_likelihood import text_likelihood
+        panel = np.full((300, 200), 230, dtype=np.uint8)
+        panel[140:161, 20:70] = _word()
+        self.assertGreater(text_likelihood(panel), 0.8)
+
+    def test_rendered_words_score_high(self):
+        from core.text_likelihood import text_likelihood
+        for word in ("Accept", "Bell", "Co."):
+            for thickness in (1, 2):
+                self.assertGreater(text_likelihood(_rendered(word, thickness=thickness)), 0.5, word)
+
+    def test_single_glyphs_score_below_the_default_threshold(self):
+        # Why short keywords lower the bar: one or two glyphs look like an icon
+        from core.text_likelihood import text_likelihood
+        for text in ("+", "-", "El"):
+            self.assertLess(text_likelihood(_rendered(text, scale=0.4, thickness=2)), 0.5, text)
+
+    def test_short_keywords_clear_their_lower_bars(self):
+        from core.text_likelihood import SHORT_KEYWORD_THRESHOLD, SYMBOL_KEYWORD_THRESHOLD, text_likelihood
+        for scale in (0.4, 0.8, 1.2):
+            for thickness in (1, 2):
+                for text in ("OK", "El", "ll"):
+                    self.assertGreater(text_likelihood(_rendered(text, scale, thickness)), SHORT_KEYWORD_THRESHOLD, text)
+                for text in ("+", "-"):
+                    self.assertGreater(text_likelihood(_rendered(text, scale, thickness)), SYMBOL_KEYWORD_THRESHOLD, text)
+
+    def test_solid_shapes_stay_below_the_symbol_bar(self):
+        from core.text_likelihood import SYMBOL_KEYWORD_THRESHOLD, text_likelihood
+        yy, xx = np.mgrid[:24, :24]
+        disk = np.where((yy - 12) ** 2 + (xx - 12) ** 2 < 64, 240, 40).astype(np.uint8)
+        square = np.full((40, 40), 40, dtype=np.uint8)
+        square[8:32, 8:32] = 220
+        gradient = np.tile(np.linspace(0, 255, 60).astype(np.uint8), (30, 1))
+        for crop in (disk, square, gradient):
+            self.assertLess(text_likelihood(crop), SYMBOL_KEYWORD_THRESHOLD)
+
+
+class TestKeywordThreshold(unittest.TestCase):
+
+    def test_words_keep_the_configured_threshold(self):
+        from core.text_likelihood import keyword_threshold
+        self.assertEqual(keyword_threshold(["Accept", "Bell", "Co.", "Run all"], 0.5), 0.5)
+        self.assertEqual(keyword_threshold([], 0.5), 0.5)
+
+    def test_short_and_symbol_keywords_lower_it(self):
+        from core.text_likelihood import SHORT_KEYWORD_THRESHOLD, SYMBOL_KEYWORD_THRESHOLD, keyword_threshold
+        for keyword in ("El", "OK", " x "):
+            self.assertEqual(keyword_threshold(["Accept", keyword], 0.5), SHORT_KEYWORD_THRESHOLD, keyword)
+        for keyword in ("+", "-", "©", "..."):
+            self.assertEqual(keyword_threshold(["Accept", "OK", keyword], 0.5), SYMBOL_KEYWORD_THRESHOLD, keyword)
+
+    def test_never_raises_a_lower_configured_threshold(self):
+        from core.text_likelihood import keyword_threshold
+        self.assertEqual(keyword_threshold(["OK"], 0.1), 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -53,9 +53,10 @@ def verify_and_click_proximity():
     
     # Save debug image
     from core.ocr import get_target_region, capture_screen
+    from PIL import Image
     region = get_target_region()
     screenshot = capture_screen(region=region)
-    screenshot.save("debug_screen.png")
+    Image.fromarray(screenshot.rgb.copy()).save("debug_screen.png")
     logger.info("Saved debug_screen.png")
     
     # Dump all segments to see what OCR saw